@@ -8,8 +8,11 @@ from flight.logger import logging, get_log_dataframe
 from flight.config.configuration import Configuration
 from flight.utils.utils import write_yaml, read_yaml
 from flight.constant import get_current_time_stamp, CONFIG_DIR
-from flight.entity.flight_predictor import FlightData, FlightPredictor
-from flask import Flask, render_template, abort, send_file, request
+from flight.entity.flight_predictor import FlightData, FlightPredictor, FLIGHT_DATA_COLUMNS
+from flight.entity.schema_validator import SchemaValidator
+from flight.entity.micro_batch_predictor import MicroBatchPredictor
+from flight.metrics import metrics_registry, request_seconds, prediction_stage_seconds
+from flask import Flask, render_template, abort, send_file, request, jsonify, Response
 
 
 app = Flask(__name__)
@@ -23,9 +26,39 @@ MODEL_CONFIG_FILE_PATH = os.path.join(ROOT_DIR, CONFIG_DIR, "model.yaml")
 LOG_DIR = os.path.join(ROOT_DIR, LOG_FOLDER_NAME)
 PIPELINE_DIR = os.path.join(ROOT_DIR, PIPELINE_FOLDER_NAME)
 MODEL_DIR = os.path.join(ROOT_DIR, SAVED_MODELS_DIR_NAME)
+SCHEMA_FILE_PATH = os.path.join(ROOT_DIR, CONFIG_DIR, "schema.yaml")
 
 PRICE_KEY = "Price"
 FLIGHT_DATA_KEY = "flight_data"
+PRICES_KEY = "prices"
+ERRORS_KEY = "errors"
+
+# compiled once, checks the categorical inputs against the schema domain values
+schema_validator = SchemaValidator.from_schema_file(SCHEMA_FILE_PATH)
+# request field name of each dataset column, to name fields in error messages
+FLIGHT_DATA_FIELD_NAMES = {column_name: field_name for field_name, column_name in FLIGHT_DATA_COLUMNS.items()}
+
+prediction_service_config = Configuration().get_prediction_service_config()
+flight_predictor = FlightPredictor(model_dir=MODEL_DIR,
+                                   model_load_mode=prediction_service_config.model_load_mode)
+if prediction_service_config.micro_batching:
+    flight_predictor = MicroBatchPredictor(flight_predictor=flight_predictor,
+                                           batch_window_ms=prediction_service_config.batch_window_ms,
+                                           max_batch_size=prediction_service_config.max_batch_size,
+                                           prediction_timeout_seconds=prediction_service_config.prediction_timeout_seconds)
+
+def load_model_before_fork():
+    """
+    Called by the gunicorn master when the app is preloaded (gunicorn.conf.py).
+    The model is loaded into the process wide cache once, and forked workers
+    inherit it copy-on-write instead of each unpickling their own copy.
+    """
+    try:
+        FlightPredictor(model_dir=MODEL_DIR,
+                        model_load_mode=prediction_service_config.model_load_mode).get_latest_model()
+    except Exception as e:
+        # no model has been trained yet, workers load it on their first request
+        logging.info(f"Model not loaded before fork: {e}")
 
 @app.route("/artifact", defaults={"req_path": "flight"})
 @app.route("/artifact/<path:req_path>")
@@ -99,37 +132,73 @@ def predict():
         PRICE_KEY: None
     }
     if request.method == "POST":
-        airline = request.form["airline"]
-        date_of_journey = request.form["date_of_journey"]
-        source = request.form["source"]
-        destination = request.form["destination"]
-        duration = request.form["duration"]
-        total_stops = request.form["total_stops"]
-        additional_info = request.form["additional_info"]
-        arrival_time = request.form["arrival_time"]
-        dep_time = request.form["dep_time"]
-
-        # print(request.values)
-        flight_data = FlightData(airline=airline,
-                                 date_of_journey=date_of_journey,
-                                 source=source,
-                                 destination=destination,
-                                 duration=duration,
-                                 additional_info=additional_info,
-                                 total_stops=total_stops,
-                                 arrival_time=arrival_time,
-                                 dep_time=dep_time)
-        flight_df = flight_data.get_flight_input_data_frame()
-        flight_predictor = FlightPredictor(model_dir=MODEL_DIR)
-        price = flight_predictor.predict(X=flight_df)
-        context = {
-            FLIGHT_DATA_KEY: flight_data.get_flight_data_as_dict(),
-            PRICE_KEY: price
-        }
-        print(f"context: {context}")
-        return render_template("predict.html", context=context)
+        with request_seconds.time(endpoint="predict"):
+            with prediction_stage_seconds.time(stage="parse"):
+                airline = request.form["airline"]
+                date_of_journey = request.form["date_of_journey"]
+                source = request.form["source"]
+                destination = request.form["destination"]
+                duration = request.form["duration"]
+                total_stops = request.form["total_stops"]
+                additional_info = request.form["additional_info"]
+                arrival_time = request.form["arrival_time"]
+                dep_time = request.form["dep_time"]
+
+            with prediction_stage_seconds.time(stage="flight_data"):
+                flight_data = FlightData(airline=airline,
+                                         date_of_journey=date_of_journey,
+                                         source=source,
+                                         destination=destination,
+                                         duration=duration,
+                                         additional_info=additional_info,
+                                         total_stops=total_stops,
+                                         arrival_time=arrival_time,
+                                         dep_time=dep_time)
+
+            with prediction_stage_seconds.time(stage="validate"):
+                invalid_values = schema_validator.validate_record(flight_data.get_flight_data_as_record())
+            if invalid_values:
+                context[ERRORS_KEY] = [f"[{value}] is not a valid {FLIGHT_DATA_FIELD_NAMES[column_name]}"
+                                       for column_name, value in invalid_values.items()]
+                return render_template("predict.html", context=context), 400
+
+            price = flight_predictor.predict_flight_data(flight_data=flight_data)
+            context = {
+                FLIGHT_DATA_KEY: flight_data.get_flight_data_as_dict(),
+                PRICE_KEY: price
+            }
+            logging.info(f"Prediction context: {context}")
+            with prediction_stage_seconds.time(stage="render"):
+                return render_template("predict.html", context=context)
     return render_template("predict.html", context=context)
 
+@app.route("/api/predict", methods=["POST"])
+def api_predict():
+    with request_seconds.time(endpoint="api_predict"):
+        with prediction_stage_seconds.time(stage="parse"):
+            flight_records = request.get_json(silent=True)
+            if not isinstance(flight_records, list) or len(flight_records) == 0:
+                return jsonify({ERRORS_KEY: ["Request body must be a non empty JSON array of flight records"]}), 400
+
+            errors = FlightData.validate_flight_records(flight_records)
+            if errors:
+                return jsonify({ERRORS_KEY: errors}), 400
+
+        with prediction_stage_seconds.time(stage="flight_data"):
+            flight_df = FlightData.get_flight_batch_data_frame(flight_records)
+        with prediction_stage_seconds.time(stage="validate"):
+            report = schema_validator.validate(flight_df, columns=list(FLIGHT_DATA_COLUMNS.values()))
+        if not report["is_valid"]:
+            errors = SchemaValidator.get_errors(report, column_names=FLIGHT_DATA_FIELD_NAMES, row_name="record")
+            return jsonify({ERRORS_KEY: errors}), 400
+        prices = flight_predictor.predict(X=flight_df)
+        with prediction_stage_seconds.time(stage="render"):
+            return jsonify({PRICES_KEY: prices.tolist()})
+
+@app.route("/metrics")
+def metrics():
+    return Response(metrics_registry.render(), mimetype="text/plain; version=0.0.4")
+
 @app.route("/saved_models", defaults={"req_path": "saved_models"})
 @app.route("/saved_models/<path:req_path>")
 def saved_models_dir(req_path):
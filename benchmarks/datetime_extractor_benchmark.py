@@ -0,0 +1,70 @@
+"""
+Benchmark of DateTimeExtractor against the pd.to_datetime based extraction it
+replaced, on a frame with every date and time format of the dataset
+including arrival times carrying the arrival date ("01:10 22 Mar"), and
+reports the speedup. Their parity is checked by
+tests/test_datetime_extractor.py. Run from the repository root:
+
+    python benchmarks/datetime_extractor_benchmark.py --rows 200000
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from flight.constant import COLUMN_DATE_OF_JOURNEY, COLUMN_DEP_TIME, COLUMN_ARRIVAL_TIME
+from flight.component.data_transformation import DateTimeExtractor
+from flight.utils.synthetic_data import get_flight_data
+
+
+def make_flights(n_rows: int, seed: int) -> pd.DataFrame:
+    flight_df = get_flight_data(n_rows=n_rows, seed=seed, with_price=False)
+    return flight_df[[COLUMN_DATE_OF_JOURNEY, COLUMN_DEP_TIME, COLUMN_ARRIVAL_TIME]]
+
+
+def to_datetime_extract_date_and_time(X: pd.DataFrame) -> np.ndarray:
+    """The previous implementation of DateTimeExtractor.extract_date_and_time"""
+    journey_day = X.loc[:, COLUMN_DATE_OF_JOURNEY].str.split('/').str[0].astype(int)
+    journey_month = X.loc[:, COLUMN_DATE_OF_JOURNEY].str.split('/').str[1].astype(int)
+    dep_hour = pd.to_datetime(X.loc[:, COLUMN_DEP_TIME]).dt.hour
+    dep_min = pd.to_datetime(X.loc[:, COLUMN_DEP_TIME]).dt.minute
+    arrival_hour = pd.to_datetime(X.loc[:, COLUMN_ARRIVAL_TIME]).dt.hour
+    arrival_min = pd.to_datetime(X.loc[:, COLUMN_ARRIVAL_TIME]).dt.minute
+    return np.c_[journey_day, journey_month, dep_hour, dep_min, arrival_hour, arrival_min]
+
+
+def best_time(function, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start_time)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark date and time extraction of DateTimeExtractor")
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per implementation, the fastest is reported")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    X = make_flights(n_rows=args.rows, seed=args.seed)
+    date_time_extractor = DateTimeExtractor()
+
+    to_datetime_time = best_time(lambda: to_datetime_extract_date_and_time(X), args.repeat)
+    single_pass_time = best_time(lambda: date_time_extractor.transform(X), args.repeat)
+    print(f"rows:           {args.rows}")
+    print(f"pd.to_datetime: {to_datetime_time:.3f}s")
+    print(f"single pass:    {single_pass_time:.3f}s")
+    print(f"speedup:        {to_datetime_time / single_pass_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark of CleanDurationCol against the eval based duration conversion it
+replaced on a frame of durations in every format of the dataset ("2h 50m",
+"19h", "5m") and reports the speedup. Their parity is checked by
+tests/test_duration_parser.py. Run from the repository root:
+
+    python benchmarks/duration_parser_benchmark.py --rows 1000000
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from flight.constant import COLUMN_DURATION
+from flight.component.data_transformation import CleanDurationCol
+from flight.utils.synthetic_data import get_flight_data
+
+
+def make_durations(n_rows: int, seed: int) -> pd.DataFrame:
+    flight_df = get_flight_data(n_rows=n_rows, seed=seed, with_price=False)
+    return flight_df[[COLUMN_DURATION]]
+
+
+def eval_convert_duration_to_minutes(X: pd.DataFrame) -> np.ndarray:
+    """The previous implementation of CleanDurationCol.convert_duration_to_minutes"""
+    clean_duration = \
+        X.loc[:, COLUMN_DURATION].str.replace("h", '*60').str.replace(' ', '+').str.replace('m', '*1').apply(eval)
+    return np.array(clean_duration).reshape(-1, 1)
+
+
+def best_time(function, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start_time)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark duration parsing of CleanDurationCol")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per implementation, the fastest is reported")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    X = make_durations(n_rows=args.rows, seed=args.seed)
+    clean_duration_col = CleanDurationCol()
+    eval_time = best_time(lambda: eval_convert_duration_to_minutes(X), args.repeat)
+    vectorized_time = best_time(lambda: clean_duration_col.transform(X), args.repeat)
+    print(f"rows:       {args.rows}")
+    print(f"eval:       {eval_time:.3f}s")
+    print(f"vectorized: {vectorized_time:.3f}s")
+    print(f"speedup:    {eval_time / vectorized_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Load test of the prediction service.
+
+Sends synthetic flights, drawn by flight.utils.synthetic_data from config/schema.yaml,
+to /predict and /api/predict at a fixed concurrency and reports throughput
+and p50/p95/p99 latency. Requests go through the Flask test client of app.py
+by default, or to a running server with --url. Run from the repository root:
+
+    python benchmarks/serving_benchmark.py --requests 2000 --concurrency 8 --output results.json
+    python benchmarks/serving_benchmark.py --url http://127.0.0.1:8000 --baseline results.json
+
+The results are compared with the stored baseline benchmarks/serving_baseline.json,
+or another results file given with --baseline, and the script exits with
+status 1 when throughput drops, or p95/p99 latency grows, by more than
+--max-regression. The stored baseline was measured on one machine: refresh it
+with --output benchmarks/serving_baseline.json on the machine the benchmark
+gates, and skip the comparison with --baseline "".
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from flight.utils.synthetic_data import get_flight_data
+from flight.constant import CONFIG_DIR
+
+
+SCHEMA_FILE_PATH = os.path.join(ROOT_DIR, CONFIG_DIR, "schema.yaml")
+BASELINE_FILE_PATH = os.path.join(ROOT_DIR, "benchmarks", "serving_baseline.json")
+# run settings that make results comparable
+COMPARED_CONFIG_KEYS = ["target", "concurrency", "batch_size", "cpu_count"]
+ENDPOINTS = ["predict", "api_predict"]
+ENDPOINT_PATHS = {"predict": "/predict", "api_predict": "/api/predict"}
+LATENCY_PERCENTILES = [50, 95, 99]
+# /predict form field of each column of the dataset
+FORM_FIELD_NAMES = {"Airline": "airline", "Date_of_Journey": "date_of_journey", "Source": "source",
+                    "Destination": "destination", "Duration": "duration", "Total_Stops": "total_stops",
+                    "Additional_Info": "additional_info", "Arrival_Time": "arrival_time", "Dep_Time": "dep_time"}
+
+
+def make_flight_records(n_records: int, seed: int) -> list:
+    """
+    :return: flight records keyed by the /predict form field names, in the formats of the dataset: list
+    """
+    flight_df = get_flight_data(n_rows=n_records, seed=seed, with_price=False, schema_file_path=SCHEMA_FILE_PATH)
+    return flight_df[list(FORM_FIELD_NAMES)].rename(columns=FORM_FIELD_NAMES).to_dict("records")
+
+
+class TestClientTransport:
+    """
+    Sends requests to app.py in process through the Flask test client
+    """
+
+    def __init__(self):
+        os.chdir(ROOT_DIR)
+        import app
+        self.app = app.app
+        self.local = threading.local()
+
+    def get_client(self):
+        # one test client per thread
+        if not hasattr(self.local, "client"):
+            self.local.client = self.app.test_client()
+        return self.local.client
+
+    def post_form(self, path: str, data: dict) -> int:
+        return self.get_client().post(path, data=data).status_code
+
+    def post_json(self, path: str, data) -> int:
+        return self.get_client().post(path, json=data).status_code
+
+
+class HttpTransport:
+    """
+    Sends requests to a running server, e.g a local gunicorn
+    """
+
+    def __init__(self, url: str, timeout: float=30):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def post(self, path: str, body: bytes, content_type: str) -> int:
+        http_request = urllib.request.Request(f"{self.url}{path}", data=body,
+                                              headers={"Content-Type": content_type}, method="POST")
+        try:
+            with urllib.request.urlopen(http_request, timeout=self.timeout) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    def post_form(self, path: str, data: dict) -> int:
+        return self.post(path, urllib.parse.urlencode(data).encode(), "application/x-www-form-urlencoded")
+
+    def post_json(self, path: str, data) -> int:
+        return self.post(path, json.dumps(data).encode(), "application/json")
+
+
+def send_request(transport, endpoint: str, payload) -> int:
+    if endpoint == "predict":
+        return transport.post_form(ENDPOINT_PATHS[endpoint], payload)
+    return transport.post_json(ENDPOINT_PATHS[endpoint], payload)
+
+
+def make_payloads(endpoint: str, n_requests: int, batch_size: int, seed: int) -> list:
+    if endpoint == "predict":
+        return make_flight_records(n_requests, seed)
+    flight_records = make_flight_records(n_requests * batch_size, seed)
+    return [flight_records[start:start + batch_size] for start in range(0, len(flight_records), batch_size)]
+
+
+def run_endpoint(transport, endpoint: str, payloads: list, concurrency: int, n_warmup: int, rows_per_request: int) -> dict:
+    """
+    Sends the first n_warmup payloads unmeasured, then the rest with
+    concurrency requests in flight at any time
+    :return: throughput and latency summary of the endpoint: dict
+    """
+    for payload in payloads[:n_warmup]:
+        send_request(transport, endpoint, payload)
+    payloads = payloads[n_warmup:]
+
+    def timed_request(payload):
+        start_time = time.perf_counter()
+        status_code = send_request(transport, endpoint, payload)
+        return time.perf_counter() - start_time, status_code
+
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(timed_request, payloads))
+    elapsed = time.perf_counter() - start_time
+
+    latencies_ms = np.array([latency for latency, _ in results]) * 1000
+    n_errors = sum(1 for _, status_code in results if status_code != 200)
+    summary = {
+        "requests": len(payloads),
+        "errors": n_errors,
+        "concurrency": concurrency,
+        "rows_per_request": rows_per_request,
+        "elapsed_seconds": elapsed,
+        "throughput_rps": len(payloads) / elapsed,
+        "rows_per_second": len(payloads) * rows_per_request / elapsed,
+        "latency_ms": {
+            "mean": float(latencies_ms.mean()),
+            "max": float(latencies_ms.max()),
+        }
+    }
+    for percentile in LATENCY_PERCENTILES:
+        summary["latency_ms"][f"p{percentile}"] = float(np.percentile(latencies_ms, percentile))
+    return summary
+
+
+def compare_with_baseline(results: dict, baseline: dict, max_regression: float) -> list:
+    """
+    :return: description of every metric that regressed beyond max_regression: list
+    """
+    regressions = []
+    for key in COMPARED_CONFIG_KEYS:
+        if results["config"].get(key) != baseline.get("config", {}).get(key):
+            print(f"Warning: {key} [{results['config'].get(key)}] differs from the baseline "
+                  f"[{baseline.get('config', {}).get(key)}], the results may not be comparable")
+    print(f"\n{'endpoint':<12} {'metric':<16} {'baseline':>12} {'current':>12} {'change':>9}")
+    for endpoint, summary in results["endpoints"].items():
+        baseline_summary = baseline.get("endpoints", {}).get(endpoint)
+        if baseline_summary is None:
+            print(f"{endpoint:<12} not in baseline")
+            continue
+        comparisons = [("throughput_rps", summary["throughput_rps"], baseline_summary["throughput_rps"], False)]
+        for percentile in LATENCY_PERCENTILES:
+            key = f"p{percentile}"
+            comparisons.append((f"latency_{key}_ms", summary["latency_ms"][key],
+                                baseline_summary["latency_ms"][key], True))
+
+        for metric_name, current, previous, lower_is_better in comparisons:
+            change = (current - previous) / previous if previous else 0.0
+            regressed = change > max_regression if lower_is_better else change < -max_regression
+            # p50 is reported but only throughput and tail latency gate the result
+            regressed = regressed and metric_name != "latency_p50_ms"
+            if regressed:
+                regressions.append(f"{endpoint} {metric_name}: {previous:.2f} -> {current:.2f} ({change:+.1%})")
+            print(f"{endpoint:<12} {metric_name:<16} {previous:>12.2f} {current:>12.2f} {change:>+9.1%}"
+                  f"{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test /predict and /api/predict")
+    parser.add_argument("--url", default=None, help="base url of a running server, defaults to the Flask test client")
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=ENDPOINTS)
+    parser.add_argument("--requests", type=int, default=1000, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=4, help="requests in flight at once")
+    parser.add_argument("--batch-size", type=int, default=32, help="flights per /api/predict request")
+    parser.add_argument("--warmup", type=int, default=20, help="requests sent before measuring")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="json file the results are written to")
+    parser.add_argument("--baseline", default=BASELINE_FILE_PATH,
+                        help="results json of a previous run to compare with, \"\" to skip the comparison")
+    parser.add_argument("--max-regression", type=float, default=0.10,
+                        help="allowed relative drop of throughput or growth of p95/p99 latency")
+    args = parser.parse_args()
+
+    transport = HttpTransport(url=args.url) if args.url else TestClientTransport()
+
+    results = {
+        "config": {
+            "target": args.url or "test_client",
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "batch_size": args.batch_size,
+            "seed": args.seed,
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+        },
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "endpoints": dict(),
+    }
+    for endpoint in args.endpoints:
+        rows_per_request = 1 if endpoint == "predict" else args.batch_size
+        payloads = make_payloads(endpoint, args.requests + args.warmup, args.batch_size, args.seed)
+        summary = run_endpoint(transport, endpoint, payloads, args.concurrency, args.warmup, rows_per_request)
+        results["endpoints"][endpoint] = summary
+        latency = summary["latency_ms"]
+        print(f"{endpoint:<12} {summary['throughput_rps']:>9.1f} req/s {summary['rows_per_second']:>10.1f} rows/s "
+              f"p50 {latency['p50']:.2f}ms p95 {latency['p95']:.2f}ms p99 {latency['p99']:.2f}ms "
+              f"errors {summary['errors']}")
+
+    baseline = None
+    if args.baseline and not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}, comparison skipped")
+    elif args.baseline:
+        # read before --output may replace it with these results
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=4)
+        print(f"Results written to {args.output}")
+
+    if baseline is not None:
+        regressions = compare_with_baseline(results, baseline, args.max_regression)
+        if regressions:
+            print("\nRegressions beyond the allowed threshold:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,6 @@ import os
 import shutil
 import sys
 
-import opendatasets
 import pandas as pd
 import numpy as np
 
@@ -11,17 +10,85 @@ from flight.entity.config_entity import DataIngestionConfig
 from flight.entity.artifact_entity import DataIngestionArtifact
 from flight.exception import FlightException
 from flight.logger import logging
+from flight.constant import INGESTED_FILE_EXTENSION, EXCEL_FILE_EXTENSION, DATASET_SOURCE_LOCAL, \
+    INGESTED_DELTA_FILE_SUFFIX, SCHEMA_COLUMNS_KEY
+from flight.entity.dataset_source import DatasetSource, DatasetCache, get_dataset_source
+from flight.entity.artifact_store import ArtifactStore
+from flight.entity.ingestion_state import IngestionState, RowIndex, get_row_hashes
+from flight.utils.utils import read_dataframe, write_dataframe, read_dataframe_in_chunks, ParquetChunkWriter, \
+    get_file_checksum, link_or_copy_file, read_yaml
 from sklearn.model_selection import StratifiedShuffleSplit
 
 
+PRICE_CATEGORY_COLUMN = "price_cat"
+PRICE_CATEGORY_BINS = [0, 3000, 6000, 9000, np.inf]
+PRICE_CATEGORY_LABELS = ["cheap", "affordable", "expensive", "very_expensive"]
+VALIDATION_SIZE = 0.2
+SPLIT_RANDOM_STATE = 30
+
+
+def get_price_category(prices: pd.Series) -> pd.Series:
+    """
+    :return: price category each row is stratified on: pd.Series
+    """
+    return pd.cut(prices, bins=PRICE_CATEGORY_BINS, labels=PRICE_CATEGORY_LABELS)
+
+
+class StratifiedSlotSampler:
+    """
+    Assigns rows arriving in chunks to validation or train with the
+    proportions of StratifiedShuffleSplit, without holding previous rows.
+    Each stratum fills blocks of block_size slots, validation_size of which,
+    at random positions, are validation slots: every full block of a stratum
+    holds exactly its share of validation rows and memory does not grow
+    with the number of rows.
+    """
+
+    def __init__(self, validation_size: float, random_state: int=None, block_size: int=1000):
+        try:
+            self.block_size = block_size
+            self.n_validation_slots = int(round(validation_size * block_size))
+            self.random_state = np.random.default_rng(random_state)
+            # stratum -> validation flags of the slots left in its current block
+            self.open_slots = dict()
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def draw_slots(self, n_slots: int) -> np.ndarray:
+        n_blocks = -(-n_slots // self.block_size)
+        blocks = np.zeros((n_blocks, self.block_size), dtype=bool)
+        blocks[:, :self.n_validation_slots] = True
+        return self.random_state.permuted(blocks, axis=1).ravel()
+
+    def assign(self, strata) -> np.ndarray:
+        """
+        :param strata: stratum of each row of a chunk, in order of arrival
+        :return: True for the rows assigned to validation: np.ndarray
+        """
+        try:
+            strata = np.asarray(strata)
+            is_validation = np.zeros(len(strata), dtype=bool)
+            for stratum in pd.unique(strata):
+                rows = np.flatnonzero(strata == stratum)
+                slots = self.open_slots.get(stratum, np.zeros(0, dtype=bool))
+                if len(slots) < len(rows):
+                    slots = np.concatenate([slots, self.draw_slots(len(rows) - len(slots))])
+                is_validation[rows] = slots[:len(rows)]
+                self.open_slots[stratum] = slots[len(rows):]
+            return is_validation
+        except Exception as e:
+            raise FlightException(e, sys)
+
+
 class DataIngestion:
     """This class is responsible for carrying out all data ingestion processes
     and returning its data ingestion artifact"""
 
-    def __init__(self, data_ingestion_config: DataIngestionConfig):
+    def __init__(self, data_ingestion_config: DataIngestionConfig, artifact_store: ArtifactStore=None):
         try:
             logging.info(f"{'='*20} Data Ingestion log started. -{'='*20}")
             self.data_ingestion_config = data_ingestion_config
+            self.artifact_store = artifact_store or ArtifactStore()
         except Exception as e:
             raise FlightException(e, sys)
 
@@ -51,26 +118,35 @@ class DataIngestion:
     #     except Exception as e:
     #         raise FlightException(e, sys)
 
+    def get_dataset_source(self) -> DatasetSource:
+        try:
+            if self.data_ingestion_config.dataset_source == DATASET_SOURCE_LOCAL:
+                location = self.data_ingestion_config.local_dataset_dir
+            else:
+                location = self.data_ingestion_config.dataset_download_url
+            return get_dataset_source(source_type=self.data_ingestion_config.dataset_source, location=location)
+        except Exception as e:
+            raise FlightException(e, sys)
+
     def download_flight_data(self) -> str:
         """
-        Download the dataset from kaggle
+        Gets the dataset from its source, through the dataset cache when one is configured
         :return: Folder name of the dataset: str
         """
         try:
-            download_url = self.data_ingestion_config.dataset_download_url
+            dataset_source = self.get_dataset_source()
             raw_data_dir = self.data_ingestion_config.raw_data_dir
-
-            # if os.path.exists(raw_data_dir):
-            #     os.remove(raw_data_dir)
-
             os.makedirs(raw_data_dir, exist_ok=True)
-            logging.info(f"Downloading file from [{download_url}] into: [{raw_data_dir}]")
 
-            # requires kaggle name and api key gotten from your kaggle account setting kaggle.json file
-            # to be placed in the root dir of the project i.e: ./kaggle.json
-            opendatasets.download(download_url, raw_data_dir+"/")
-            logging.info(f"File {raw_data_dir} downloaded successfully!")
-            raw_data_dir_dataset_dir_name = os.listdir(raw_data_dir)[0]
+            if self.data_ingestion_config.dataset_cache_dir:
+                dataset_cache = DatasetCache(cache_dir=self.data_ingestion_config.dataset_cache_dir,
+                                             refresh=self.data_ingestion_config.refresh_dataset)
+                raw_data_dir_dataset_dir_name = dataset_cache.get_dataset(dataset_source=dataset_source,
+                                                                          raw_data_dir=raw_data_dir)
+            else:
+                dataset_dir = dataset_source.fetch(download_dir=raw_data_dir)
+                raw_data_dir_dataset_dir_name = os.path.basename(dataset_dir)
+            logging.info(f"Dataset {raw_data_dir_dataset_dir_name} available in {raw_data_dir}")
             return raw_data_dir_dataset_dir_name
         except Exception as e:
             raise FlightException(e, sys)
@@ -91,81 +167,285 @@ class DataIngestion:
     #     except Exception as e:
     #         raise FlightException(e, sys)
 
-    def split_data_as_train_validation(self, raw_data_dir_dataset_dir_name) -> Tuple[str, str]:
+    def get_split_file_paths(self, raw_data_dir_dataset_dir_name) -> Tuple[str, str, str]:
         """
-        Splits the training data into train and validation sets
         :param raw_data_dir_dataset_dir_name: folder of the downloaded data
-        :return: Train file path and validation file path: tuple
+        :return: Raw train file path, train file path and validation file path: tuple
         """
         try:
             raw_data_dir = self.data_ingestion_config.raw_data_dir
             raw_data_dir_path = os.path.join(raw_data_dir, raw_data_dir_dataset_dir_name)
-            train_data_filename = os.listdir(raw_data_dir_path)[1]
-            data_file_extension = train_data_filename.split(".")[-1]
+            train_data_filename = self.data_ingestion_config.train_file_name
             raw_data_train_filepath = os.path.join(raw_data_dir_path,
                                                    train_data_filename)
 
-            logging.info(f"Reading Train data file: [{raw_data_train_filepath}]")
-            flight_df = pd.read_excel(raw_data_train_filepath)
-            flight_df["price_cat"] = pd.cut(flight_df["Price"],
-                                            bins=[0, 3000, 6000, 9000, np.inf],
-                                            labels=["cheap", "affordable", "expensive", "very_expensive"])
-
-            logging.info("Splitting train data into train and validation sets")
-            strat_train_set = None
-            strat_validation_set = None
-
-            split = StratifiedShuffleSplit(n_splits=1, test_size=0.2, random_state=30)
-
-            for train_index, test_index in split.split(flight_df, flight_df["price_cat"]):
-                strat_train_set = flight_df.loc[train_index].drop(["price_cat"], axis=1)
-                strat_validation_set = flight_df.loc[test_index].drop(["price_cat"], axis=1)
-
             train_file_path = os.path.join(self.data_ingestion_config.ingested_train_dir,
-                                           train_data_filename)
+                                           os.path.splitext(train_data_filename)[0] + INGESTED_FILE_EXTENSION)
 
             ingested_validation_dir = self.data_ingestion_config.ingested_validation_dir
-            validation_filename = os.path.basename(ingested_validation_dir)+"."+data_file_extension
+            validation_filename = os.path.basename(ingested_validation_dir) + INGESTED_FILE_EXTENSION
 
             validation_file_path = os.path.join(
                 self.data_ingestion_config.ingested_validation_dir,
                 validation_filename
             )
+            return raw_data_train_filepath, train_file_path, validation_file_path
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def split_data_as_train_validation(self, raw_data_dir_dataset_dir_name) -> Tuple[str, str]:
+        """
+        Splits the training data into train and validation sets
+        :param raw_data_dir_dataset_dir_name: folder of the downloaded data
+        :return: Train file path and validation file path: tuple
+        """
+        try:
+            raw_data_train_filepath, train_file_path, validation_file_path = \
+                self.get_split_file_paths(raw_data_dir_dataset_dir_name)
+
+            if self.data_ingestion_config.chunk_size:
+                self.split_data_in_chunks(raw_data_train_filepath=raw_data_train_filepath,
+                                          train_file_path=train_file_path,
+                                          validation_file_path=validation_file_path)
+                return train_file_path, validation_file_path
+
+            logging.info(f"Reading Train data file: [{raw_data_train_filepath}]")
+            flight_df = read_dataframe(raw_data_train_filepath)
+            flight_df[PRICE_CATEGORY_COLUMN] = get_price_category(flight_df["Price"])
+
+            logging.info("Splitting train data into train and validation sets")
+            strat_train_set = None
+            strat_validation_set = None
+
+            split = StratifiedShuffleSplit(n_splits=1, test_size=VALIDATION_SIZE, random_state=SPLIT_RANDOM_STATE)
+
+            for train_index, test_index in split.split(flight_df, flight_df[PRICE_CATEGORY_COLUMN]):
+                strat_train_set = flight_df.loc[train_index].drop([PRICE_CATEGORY_COLUMN], axis=1)
+                strat_validation_set = flight_df.loc[test_index].drop([PRICE_CATEGORY_COLUMN], axis=1)
 
             if strat_train_set is not None:
-                os.makedirs(
-                    self.data_ingestion_config.ingested_train_dir,
-                    exist_ok=True
-                )
                 logging.info(f"Exporting training dataset to file: [{train_file_path}]")
-                strat_train_set.to_excel(train_file_path, index=False)
+                self.write_ingested_data(strat_train_set, train_file_path)
 
             if strat_validation_set is not None:
-                os.makedirs(
-                    self.data_ingestion_config.ingested_validation_dir,
-                    exist_ok=True
-                )
                 logging.info(f"Exporting validation dataset to file: [{validation_file_path}]")
-                strat_validation_set.to_excel(validation_file_path, index=False)
+                self.write_ingested_data(strat_validation_set, validation_file_path)
 
             return train_file_path, validation_file_path
         except Exception as e:
             raise FlightException(e, sys)
 
+    def split_data_in_chunks(self,
+                             raw_data_train_filepath: str,
+                             train_file_path: str,
+                             validation_file_path: str) -> None:
+        """
+        Streaming counterpart of the split for raw files larger than memory:
+        the raw file is read chunk_size rows at a time, each row is assigned
+        to a split by a StratifiedSlotSampler on its price category, rows
+        with a missing price forming their own stratum, and both splits are
+        appended to their parquet files. The excel copies are not written.
+        """
+        try:
+            chunk_size = self.data_ingestion_config.chunk_size
+            logging.info(f"Splitting [{raw_data_train_filepath}] in chunks of [{chunk_size}] rows")
+            sampler = StratifiedSlotSampler(validation_size=VALIDATION_SIZE, random_state=SPLIT_RANDOM_STATE)
+            column_types = self.get_column_types()
+            train_writer = ParquetChunkWriter(file_path=train_file_path, column_types=column_types)
+            validation_writer = ParquetChunkWriter(file_path=validation_file_path, column_types=column_types)
+            try:
+                for flight_df in read_dataframe_in_chunks(file_path=raw_data_train_filepath, chunk_size=chunk_size):
+                    is_validation = sampler.assign(get_price_category(flight_df["Price"]).cat.codes)
+                    train_writer.write(flight_df[~is_validation])
+                    validation_writer.write(flight_df[is_validation])
+            finally:
+                train_writer.close()
+                validation_writer.close()
+            logging.info(f"[{train_writer.n_rows}] training rows exported to [{train_file_path}] and "
+                         f"[{validation_writer.n_rows}] validation rows to [{validation_file_path}]")
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def get_column_types(self) -> dict:
+        """
+        :return: column name -> type of config/schema.yaml, the types the splits are written with: dict
+        """
+        try:
+            schema_file_path = self.data_ingestion_config.schema_file_path
+            if not schema_file_path:
+                return dict()
+            return read_yaml(file_path=schema_file_path)[SCHEMA_COLUMNS_KEY]
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def read_ingestion_chunks(self, file_path: str):
+        """
+        :return: chunks of chunk_size rows of file_path, the whole file when chunk_size is not set
+        """
+        if self.data_ingestion_config.chunk_size:
+            return read_dataframe_in_chunks(file_path=file_path, chunk_size=self.data_ingestion_config.chunk_size)
+        return [read_dataframe(file_path)]
+
+    def split_data_incrementally(self, raw_data_dir_dataset_dir_name) -> Tuple[str, str, str, str, int]:
+        """
+        Incremental counterpart of the split: only the rows of the raw file
+        that previous runs have not ingested are assigned to a split, by the
+        sampler those runs left off with, and written as new part files of
+        the splits kept in the ingestion state. Rows already ingested keep
+        their split and are neither read nor written again. The run gets the
+        splits as parquet dataset directories linking every part file, and
+        links to the new part files as delta files.
+        :param raw_data_dir_dataset_dir_name: folder of the downloaded data
+        :return: Train, validation, train delta and validation delta file paths, a delta
+        file path being None when no row is new to its split, and number of new rows: tuple
+        """
+        try:
+            raw_data_train_filepath, train_file_path, validation_file_path = \
+                self.get_split_file_paths(raw_data_dir_dataset_dir_name)
+            ingestion_state = IngestionState(state_dir=self.data_ingestion_config.ingestion_state_dir)
+            raw_file_checksum = get_file_checksum(raw_data_train_filepath)
+            train_file_name = os.path.basename(train_file_path)
+            validation_file_name = os.path.basename(validation_file_path)
+
+            new_part_file_paths = [None, None]
+            if not ingestion_state.is_empty() and ingestion_state.state["raw_file_checksum"] == raw_file_checksum:
+                logging.info(f"[{raw_data_train_filepath}] unchanged since the last ingestion, no new rows")
+                n_new_rows = 0
+            else:
+                n_new_rows, new_part_file_paths = self.append_new_rows(ingestion_state=ingestion_state,
+                                                                       raw_data_train_filepath=raw_data_train_filepath,
+                                                                       raw_file_checksum=raw_file_checksum,
+                                                                       train_file_name=train_file_name,
+                                                                       validation_file_name=validation_file_name)
+
+            delta_file_paths = []
+            for file_path, split_file_name, new_part_file_path in zip([train_file_path, validation_file_path],
+                                                                      [train_file_name, validation_file_name],
+                                                                      new_part_file_paths):
+                ingestion_state.link_split(split_file_name=split_file_name, dataset_dir=file_path)
+                if self.data_ingestion_config.export_excel:
+                    write_dataframe(dataframe=read_dataframe(file_path),
+                                    file_path=os.path.splitext(file_path)[0] + EXCEL_FILE_EXTENSION)
+                delta_file_path = None
+                if new_part_file_path is not None:
+                    delta_file_path = os.path.splitext(file_path)[0] + INGESTED_DELTA_FILE_SUFFIX + \
+                        INGESTED_FILE_EXTENSION
+                    link_or_copy_file(src=new_part_file_path, dst=delta_file_path)
+                delta_file_paths.append(delta_file_path)
+
+            train_delta_file_path, validation_delta_file_path = delta_file_paths
+            return train_file_path, validation_file_path, train_delta_file_path, validation_delta_file_path, \
+                n_new_rows
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def append_new_rows(self,
+                        ingestion_state: IngestionState,
+                        raw_data_train_filepath: str,
+                        raw_file_checksum: str,
+                        train_file_name: str,
+                        validation_file_name: str) -> Tuple[int, list]:
+        """
+        Writes a new version of the ingestion state: the new rows of the raw
+        file go to one new part file per split, the existing part files are
+        kept as they are
+        :return: number of new rows, and the new train and validation part files,
+        None for a split without new rows: tuple
+        """
+        try:
+            row_index = ingestion_state.get_row_index()
+            sampler = ingestion_state.get_sampler() or StratifiedSlotSampler(validation_size=VALIDATION_SIZE,
+                                                                             random_state=SPLIT_RANDOM_STATE)
+            version_dir = ingestion_state.new_version()
+            split_file_names = [train_file_name, validation_file_name]
+            column_types = self.get_column_types()
+            train_writer, validation_writer = writers = [
+                ParquetChunkWriter(file_path=ingestion_state.get_part_file_path(split_file_name=split_file_name,
+                                                                                version_dir=version_dir),
+                                   column_types=column_types)
+                for split_file_name in split_file_names
+            ]
+            try:
+                seen = RowIndex()
+                new_row_hashes = []
+                logging.info(f"Looking for rows of [{raw_data_train_filepath}] not ingested among [{len(row_index)}]")
+                for flight_df in self.read_ingestion_chunks(raw_data_train_filepath):
+                    row_hashes = get_row_hashes(flight_df, column_types=column_types)
+                    is_new = row_index.get_new_rows(row_hashes, seen=seen)
+                    seen.add(row_hashes)
+                    new_row_hashes.append(row_hashes[is_new])
+
+                    new_rows = flight_df[is_new]
+                    is_validation = sampler.assign(get_price_category(new_rows["Price"]).cat.codes)
+                    for writer, rows in [(train_writer, new_rows[~is_validation]),
+                                         (validation_writer, new_rows[is_validation])]:
+                        # a part file is only created for a split that gets new rows
+                        if len(rows):
+                            writer.write(rows)
+            finally:
+                for writer in writers:
+                    writer.close()
+
+            n_new_rows = train_writer.n_rows + validation_writer.n_rows
+            logging.info(f"[{n_new_rows}] new rows: [{train_writer.n_rows}] appended to the training "
+                         f"rows and [{validation_writer.n_rows}] to the validation rows")
+            for row_hashes in new_row_hashes:
+                row_index.add(row_hashes)
+            new_part_file_paths = [writer.file_path if writer.n_rows else None for writer in writers]
+            parts = {split_file_name: [os.path.basename(part_file_path) for part_file_path in
+                                       ingestion_state.get_part_file_paths(split_file_name)]
+                     + ([os.path.basename(new_part_file_path)] if new_part_file_path else [])
+                     for split_file_name, new_part_file_path in zip(split_file_names, new_part_file_paths)}
+            previous_state = ingestion_state.state or dict()
+            ingestion_state.commit(version_dir=version_dir,
+                                   row_index=row_index,
+                                   sampler=sampler,
+                                   state={"raw_file_checksum": raw_file_checksum,
+                                          "parts": parts,
+                                          "n_train_rows": previous_state.get("n_train_rows", 0) + train_writer.n_rows,
+                                          "n_validation_rows": previous_state.get("n_validation_rows", 0)
+                                          + validation_writer.n_rows,
+                                          "n_new_rows": n_new_rows})
+            return n_new_rows, new_part_file_paths
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def write_ingested_data(self, dataframe: pd.DataFrame, file_path: str) -> None:
+        """
+        Writes an ingested split as parquet, which the following components
+        read, and as an excel copy next to it when export_excel is set
+        :param dataframe: train or validation split
+        :param file_path: parquet file path of the split
+        """
+        try:
+            self.artifact_store.put_dataframe(file_path=file_path, dataframe=dataframe)
+            if self.data_ingestion_config.export_excel:
+                excel_file_path = os.path.splitext(file_path)[0] + EXCEL_FILE_EXTENSION
+                logging.info(f"Exporting excel copy to file: [{excel_file_path}]")
+                write_dataframe(dataframe=dataframe, file_path=excel_file_path)
+        except Exception as e:
+            raise FlightException(e, sys)
+
     def get_test_data(self,
                       train_file_path,
                       validation_file_path,
-                      raw_data_dir_dataset_dir_name) -> DataIngestionArtifact:
+                      raw_data_dir_dataset_dir_name,
+                      train_delta_file_path=None,
+                      validation_delta_file_path=None,
+                      n_new_rows=None) -> DataIngestionArtifact:
         """
         Copy test data from raw data dir to ingested test dir
         :param train_file_path: str
         :param validation_file_path: str
         :param raw_data_dir_dataset_dir_name: str
+        :param train_delta_file_path: str training rows new to an incremental ingestion
+        :param validation_delta_file_path: str validation rows new to an incremental ingestion
+        :param n_new_rows: int number of new rows, None when the splits were rebuilt
         :return: DataIngestionArtifact
         """
         raw_data_dir = self.data_ingestion_config.raw_data_dir
         raw_data_dir_path = os.path.join(raw_data_dir, raw_data_dir_dataset_dir_name)
-        test_data_filename = os.listdir(raw_data_dir_path)[-1]
+        test_data_filename = self.data_ingestion_config.test_file_name
         raw_data_test_filepath = os.path.join(raw_data_dir_path, test_data_filename)
         logging.info(f"Obtaining file path of test data from: [{raw_data_test_filepath}]")
 
@@ -181,7 +461,10 @@ class DataIngestion:
             test_file_path=test_file_path,
             validation_file_path=validation_file_path,
             is_ingested=True,
-            message="Data ingestion completed successfully!"
+            message="Data ingestion completed successfully!",
+            train_delta_file_path=train_delta_file_path,
+            validation_delta_file_path=validation_delta_file_path,
+            n_new_rows=n_new_rows
         )
         logging.info(f"Data Ingestion artifact: [{data_ingestion_artifact}]")
         return data_ingestion_artifact
@@ -238,6 +521,20 @@ class DataIngestion:
     def initiate_data_ingestion(self) -> DataIngestionArtifact:
         try:
             raw_data_dir_dataset_dir_name = self.download_flight_data()
+            if self.data_ingestion_config.incremental:
+                train_file_path, validation_file_path, train_delta_file_path, validation_delta_file_path, \
+                    n_new_rows = self.split_data_incrementally(
+                        raw_data_dir_dataset_dir_name=raw_data_dir_dataset_dir_name
+                    )
+                return self.get_test_data(
+                    train_file_path=train_file_path,
+                    validation_file_path=validation_file_path,
+                    raw_data_dir_dataset_dir_name=raw_data_dir_dataset_dir_name,
+                    train_delta_file_path=train_delta_file_path,
+                    validation_delta_file_path=validation_delta_file_path,
+                    n_new_rows=n_new_rows
+                )
+
             train_file_path, validation_file_path = \
                 self.split_data_as_train_validation(
                     raw_data_dir_dataset_dir_name=raw_data_dir_dataset_dir_name
@@ -1,9 +1,14 @@
 import os
 import sys
+import copy
+import shutil
+import hashlib
+import sklearn
 import numpy as np
 import pandas as pd
 
 from typing import Tuple
+from collections import Counter
 from flight.constant import *
 from flight.logger import logging
 from sklearn.pipeline import Pipeline
@@ -11,15 +16,192 @@ from flight.utils.utils import *
 from sklearn.impute import SimpleImputer
 from flight.exception import FlightException
 from sklearn.compose import ColumnTransformer
-from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.base import BaseEstimator, TransformerMixin, clone
 from sklearn.preprocessing import StandardScaler, OrdinalEncoder
+from flight.entity.artifact_store import ArtifactStore
 from flight.entity.config_entity import DataTransformationConfig
 from flight.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact, DataTransformationArtifact
 
 
+# durations look like "2h 50m", "19h" or "5m"
+DURATION_PATTERN = r"^\s*(?:(?P<hours>\d+)h)?\s*(?:(?P<minutes>\d+)m)?\s*$"
+# journey dates look like "24/03/2019" or "1/05/2019"
+JOURNEY_DATE_PATTERN = r"^\s*(?P<day>\d{1,2})/(?P<month>\d{1,2})/"
+JOURNEY_DATE_BOUNDS = [(1, 31), (1, 12)]
+# times look like "22:20", arrival times may carry the arrival date: "01:10 22 Mar"
+CLOCK_TIME_PATTERN = r"^\s*(?P<hour>\d{1,2}):(?P<minute>\d{2})"
+CLOCK_TIME_BOUNDS = [(0, 23), (0, 59)]
+
+
+def parse_duration_column(durations: pd.Series) -> np.ndarray:
+    """
+    Vectorized conversion of durations to minutes. The pattern is matched
+    once per distinct value, which flight durations have few of, and the
+    results are spread back over the rows.
+    :param durations: raw duration column: pd.Series
+    :return: minutes as float, NaN for missing or malformed durations: np.ndarray
+    """
+    codes, uniques = pd.factorize(durations)
+    parts = pd.Series(uniques, dtype=object).astype(str).str.extract(DURATION_PATTERN)
+    hours = pd.to_numeric(parts["hours"]).to_numpy(dtype=np.float64)
+    minutes = pd.to_numeric(parts["minutes"]).to_numpy(dtype=np.float64)
+    unique_minutes = np.where(np.isnan(hours) & np.isnan(minutes),
+                              np.nan,
+                              np.nan_to_num(hours) * 60 + np.nan_to_num(minutes))
+    # code -1 marks missing values and picks the trailing NaN
+    return np.append(unique_minutes, np.nan)[codes]
+
+
+def parse_column_fields(values: pd.Series, pattern: str, bounds: list) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized extraction of the integer fields (named groups) of pattern.
+    The pattern is matched once per distinct value and the results are
+    spread back over the rows.
+    :param values: raw column: pd.Series
+    :param pattern: regex with one named group per field
+    :param bounds: inclusive (min, max) of each field, values out of bounds are invalid
+    :return: fields of shape (len(values), n_fields), 0 where invalid, and the
+             mask of valid rows: tuple
+    """
+    codes, uniques = pd.factorize(values)
+    parts = pd.Series(uniques, dtype=object).astype(str).str.extract(pattern)
+    unique_valid = parts.notna().all(axis=1).to_numpy()
+    unique_fields = parts.fillna(0).astype(np.int64).to_numpy()
+    for index, (lower_bound, upper_bound) in enumerate(bounds):
+        unique_valid &= (unique_fields[:, index] >= lower_bound) & (unique_fields[:, index] <= upper_bound)
+    unique_fields[~unique_valid] = 0
+    # code -1 marks missing values and picks the trailing invalid row
+    unique_fields = np.vstack([unique_fields, np.zeros((1, len(bounds)), dtype=np.int64)])
+    unique_valid = np.append(unique_valid, False)
+    return unique_fields[codes], unique_valid[codes]
+
+
+def normalize_additional_info(value) -> str:
+    """
+    Spellings of the same Additional_Info value, such as "No Info" and
+    "No info", share one normalized key
+    """
+    return " ".join(str(value).split()).lower()
+
+
+def run_preprocessing(preprocessing_obj: ColumnTransformer, X: pd.DataFrame, fit: bool=False) -> np.ndarray:
+    """
+    Runs transform, or fit_transform when fit, of the preprocessing object.
+    Its sub pipelines run in parallel_n_jobs processes when X has at least
+    parallel_min_rows rows. Smaller batches, such as serving requests, stay
+    in this process since starting the workers would cost more than it saves.
+    The saved preprocessing object always keeps n_jobs=None.
+    :param preprocessing_obj: ColumnTransformer built by get_data_transformer_object
+    :param X: flight input dataframe
+    :param fit: whether to fit the preprocessing object first
+    :return: transformed features: np.ndarray
+    """
+    try:
+        n_jobs = getattr(preprocessing_obj, "parallel_n_jobs", None)
+        parallel_min_rows = getattr(preprocessing_obj, "parallel_min_rows", None)
+        if n_jobs in (None, 1) or parallel_min_rows is None or len(X) < parallel_min_rows:
+            return preprocessing_obj.fit_transform(X) if fit else preprocessing_obj.transform(X)
+
+        logging.info(f"Running preprocessing of [{len(X)}] rows in [{n_jobs}] jobs")
+        if fit:
+            preprocessing_obj.set_params(n_jobs=n_jobs)
+            try:
+                return preprocessing_obj.fit_transform(X)
+            finally:
+                preprocessing_obj.set_params(n_jobs=None)
+        # a shallow copy shares the fitted sub pipelines, so concurrent
+        # callers of the shared preprocessing object are not affected
+        parallel_preprocessing_obj = copy.copy(preprocessing_obj)
+        parallel_preprocessing_obj.n_jobs = n_jobs
+        return parallel_preprocessing_obj.transform(X)
+    except Exception as e:
+        raise FlightException(e, sys)
+
+
+def get_transformed_arrays(features: np.ndarray, target) -> dict:
+    """
+    Arrays of a transformed dataset: float32 features and the target in
+    its own array. Tree based models fit on float32 features, so they see
+    the same values as with the float64 output of the preprocessing object,
+    and the features can be memory mapped without any conversion.
+    :param features: output of the preprocessing object
+    :param target: target column
+    :return: dict name -> np.ndarray, saved with save_dataset
+    """
+    try:
+        return {
+            TRANSFORMED_FEATURES_KEY: np.asarray(features, dtype=np.float32),
+            TRANSFORMED_TARGET_KEY: np.asarray(target),
+        }
+    except Exception as e:
+        raise FlightException(e, sys)
+
+
+def load_transformed_arrays(dataset_dir: str, mmap_mode: str="r") -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Opens the features and target of a transformed dataset, memory mapped
+    by default: they are used in place, without a copy, and worker
+    processes of a grid search map the same pages instead of receiving a
+    copy of the arrays. Arrays saved before the dataset directories hold
+    the target in their last column.
+    :param dataset_dir: transformed train or validation dataset
+    :param mmap_mode: mode of np.load, None reads the arrays in memory
+    :return: features and target
+    """
+    try:
+        if not os.path.isdir(dataset_dir):
+            array = load_numpy_array_data(dataset_dir)
+            return array[:, :-1], array[:, -1]
+        arrays, _ = load_dataset(dataset_dir=dataset_dir, mmap_mode=mmap_mode)
+        return arrays[TRANSFORMED_FEATURES_KEY], arrays[TRANSFORMED_TARGET_KEY]
+    except Exception as e:
+        raise FlightException(e, sys)
+
+
+def update_value_counts(pipeline: Pipeline, X: pd.DataFrame, value_counts: list=None) -> list:
+    """
+    Counts the values each output column of the imputer of a sub pipeline
+    sees in a chunk. Most frequent and mean imputation values and encoder
+    categories of the whole data follow from the counts of all chunks.
+    CleanAddInfoCol is fitted from the counts, so its raw values are counted.
+    :param pipeline: sub pipeline of the preprocessing object
+    :param X: chunk of the columns of the sub pipeline
+    :param value_counts: counts of the previous chunks, one Counter per column
+    :return: updated counts: list
+    """
+    cleaning_step = pipeline.steps[0][1]
+    if isinstance(cleaning_step, (CleanDurationCol, DateTimeExtractor)):
+        values = pd.DataFrame(cleaning_step.transform(X))
+    else:
+        values = X
+    if value_counts is None:
+        value_counts = [Counter() for _ in range(values.shape[1])]
+    for column_value_counts, (_, column) in zip(value_counts, values.items()):
+        column_value_counts.update(column.value_counts(dropna=True).to_dict())
+    return value_counts
+
+
+def get_imputation_value(strategy: str, value_counts: Counter):
+    """
+    :param strategy: strategy of the SimpleImputer
+    :param value_counts: value -> count of a column
+    :return: the value SimpleImputer.fit would learn from the column
+    """
+    if strategy == "most_frequent":
+        # SimpleImputer breaks ties with the smallest value
+        most_frequent_count = max(value_counts.values())
+        return min(value for value, count in value_counts.items() if count == most_frequent_count)
+    if strategy == "mean":
+        return sum(value * count for value, count in value_counts.items()) / sum(value_counts.values())
+    raise Exception(f"Imputation strategy [{strategy}] cannot be fitted in chunks")
+
+
 class CleanAddInfoCol(BaseEstimator, TransformerMixin):
     """This class performs data cleaning operations on the ADDITIONAL_INFO col"""
 
+    # used by models fitted before the mapping was learned in fit
+    default_value_mapping = {"no info": "No info"}
+
     def __init__(self):
         try:
             self.add_info_status = False
@@ -27,30 +209,56 @@ class CleanAddInfoCol(BaseEstimator, TransformerMixin):
         except Exception as e:
             raise FlightException(e, sys)
 
+    def fit(self, X, y=None):
+        """
+        Learns the spelling each normalized value is cleaned to: the most
+        frequent spelling of it in the training data
+        """
+        try:
+            return self.fit_value_counts(X.loc[:, self.add_info_col].value_counts(dropna=True).to_dict())
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def fit_value_counts(self, value_counts: dict):
+        """
+        Same as fit, from the number of occurrences of each value
+        :param value_counts: value -> count: dict
+        """
+        try:
+            value_mapping = dict()
+            for value, _ in sorted(value_counts.items(), key=lambda item: (-item[1], str(item[0]))):
+                value_mapping.setdefault(normalize_additional_info(value), value)
+            self.value_mapping_ = value_mapping
+            self.add_info_status = len(value_mapping) < len(value_counts)
+            logging.info(f"Incorrect spellings present in Additional Info col: [{self.add_info_status}]")
+            return self
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def clean_value(self, value):
+        """
+        :return: spelling of value learned in fit, unseen values are left as they are
+        """
+        value_mapping = getattr(self, "value_mapping_", None) or CleanAddInfoCol.default_value_mapping
+        return value_mapping.get(normalize_additional_info(value), value)
+
     def clean_additional_info(self, X):
+        """
+        Replaces every value by the spelling learned in fit. Each distinct
+        value is looked up once, so the output of a row does not depend on
+        the rest of the batch.
+        """
         try:
             logging.info("Cleaning Additional Info col started.")
-            if len(X.loc[:, self.add_info_col].unique()) > 9:
-                if "No Info" in X.loc[:, self.add_info_col].unique():
-                    clean_add_info = \
-                        X.loc[:, self.add_info_col].apply(lambda x: "No info" if x == "No Info" else x)
-                    self.add_info_status = True
-                    logging.info(f"Incorrect value 'No Info' present: [{self.add_info_status}]")
-                    logging.info("Additional info column cleaned successfully!")
-                else:
-                    raise Exception(
-                        "Incorrect domain values found in Additional_Info column, Please confirm with schema.yaml"
-                    )
-                return clean_add_info
-            else:
-                logging.info(f"Incorrect value 'No Info' present: [{self.add_info_status}]")
-                return X
+            codes, uniques = pd.factorize(X.loc[:, self.add_info_col])
+            clean_uniques = [self.clean_value(value) for value in uniques]
+            # code -1 marks missing values and picks the trailing NaN
+            clean_add_info = np.array(clean_uniques + [np.nan], dtype=object)[codes]
+            logging.info("Additional info column cleaned successfully!")
+            return clean_add_info
         except Exception as e:
             raise FlightException(e, sys)
 
-    def fit(self, X, y=None):
-        return self
-
     def transform(self, X, y=None):
         try:
             clean_add_info = self.clean_additional_info(X)
@@ -72,8 +280,10 @@ class CleanDurationCol(BaseEstimator, TransformerMixin):
     def convert_duration_to_minutes(self, X):
         try:
             logging.info("Converting duration column to minutes")
-            clean_duration = \
-                X.loc[:, self.duration_col].str.replace("h", '*60').str.replace(' ', '+').str.replace('m',  '*1').apply(eval)
+            clean_duration = parse_duration_column(X.loc[:, self.duration_col])
+            n_invalid = int(np.isnan(clean_duration).sum())
+            if n_invalid:
+                logging.info(f"[{n_invalid}] missing or malformed durations are left for the imputer")
             logging.info("Conversion of duration column to minutes successfully!")
             return clean_duration
         except Exception as e:
@@ -106,16 +316,33 @@ class DateTimeExtractor(BaseEstimator, TransformerMixin):
             raise FlightException(e, sys)
 
     def extract_date_and_time(self, X):
+        """
+        Parses each of the three columns once with a fixed format and fills
+        one preallocated array of [journey_day, journey_month, dep_hour,
+        dep_min, arrival_hour, arrival_min]. Missing or malformed values are
+        returned as NaN for the imputer, in which case the array is float.
+        :param X: flight input dataframe
+        :return: array of shape (len(X), 6): np.ndarray
+        """
         try:
             logging.info("Extracting date and time from cols: [date_of_journey, arrival_time and dep_time]")
-            journey_day = X.loc[:, self.date_of_journey].str.split('/').str[0].astype(int)
-            journey_month = X.loc[:, self.date_of_journey].str.split('/').str[1].astype(int)
-            dep_hour = pd.to_datetime(X.loc[:, self.dep_time]).dt.hour
-            dep_min = pd.to_datetime(X.loc[:, self.dep_time]).dt.minute
-            arrival_hour = pd.to_datetime(X.loc[:, self.arrival_time]).dt.hour
-            arrival_min = pd.to_datetime(X.loc[:, self.arrival_time]).dt.minute
+            date_time_feats = np.empty((len(X), 6), dtype=np.int64)
+            invalid = np.zeros((len(X), 6), dtype=bool)
+            column_formats = [(self.date_of_journey, JOURNEY_DATE_PATTERN, JOURNEY_DATE_BOUNDS),
+                              (self.dep_time, CLOCK_TIME_PATTERN, CLOCK_TIME_BOUNDS),
+                              (self.arrival_time, CLOCK_TIME_PATTERN, CLOCK_TIME_BOUNDS)]
+            for index, (column, pattern, bounds) in enumerate(column_formats):
+                fields, valid = parse_column_fields(X.loc[:, column], pattern, bounds)
+                date_time_feats[:, 2 * index:2 * index + 2] = fields
+                invalid[:, 2 * index:2 * index + 2] = ~valid[:, np.newaxis]
+
+            if invalid.any():
+                logging.info(f"[{int(invalid.any(axis=1).sum())}] rows with missing or malformed "
+                             f"date or time are left for the imputer")
+                date_time_feats = date_time_feats.astype(np.float64)
+                date_time_feats[invalid] = np.nan
             logging.info("Extraction completed successfully!")
-            return np.c_[journey_day, journey_month, dep_hour, dep_min, arrival_hour, arrival_min]
+            return date_time_feats
         except Exception as e:
             raise FlightException(e, sys)
 
@@ -136,11 +363,13 @@ class DataTransformation:
     def __init__(self,
                  data_transformation_config: DataTransformationConfig,
                  data_ingestion_artifact: DataIngestionArtifact,
-                 data_validation_artifact: DataValidationArtifact):
+                 data_validation_artifact: DataValidationArtifact,
+                 artifact_store: ArtifactStore=None):
         try:
             self.data_transformation_config = data_transformation_config
             self.data_ingestion_artifact = data_ingestion_artifact
             self.data_validation_artifact = data_validation_artifact
+            self.artifact_store = artifact_store or ArtifactStore()
         except Exception as e:
             raise FlightException(e, sys)
 
@@ -184,56 +413,108 @@ class DataTransformation:
                 ("clean_dur_pipeline", clean_duration_col_pipeline, [unclean_columns[-1]]),
                 ("numerical_col_pipeline", numerical_col_pipeline, unclean_columns[1:-1])
             ])
+            # read by run_preprocessing, plain attributes rather than
+            # ColumnTransformer params so the saved object stays single process
+            preprocessing.parallel_n_jobs = self.data_transformation_config.n_jobs
+            preprocessing.parallel_min_rows = self.data_transformation_config.parallel_min_rows
             return preprocessing
 
         except Exception as e:
             raise FlightException(e, sys)
 
-    def initiate_data_transformation(self) -> DataTransformationArtifact:
+    def get_transformation_cache_key(self) -> str:
+        """
+        The transformed datasets depend on the ingested train and validation
+        data, the schema, this module's code and the library versions only.
+        The parallel settings are saved on the preprocessing object, so they
+        are part of the key too.
+        :return: sha256 hex digest: str
+        """
         try:
-            logging.info("Obtaining preprocessing object")
-            preprocessing_obj = self.get_data_transformer_object()
+            cache_key = hashlib.sha256()
+            for file_path in [self.data_ingestion_artifact.train_file_path,
+                              self.data_ingestion_artifact.validation_file_path,
+                              self.data_validation_artifact.schema_file_path,
+                              os.path.abspath(__file__)]:
+                cache_key.update(get_file_content_hash(file_path).encode())
+            # chunked fitting accumulates the statistics in a different order
+            for version in [np.__version__, pd.__version__, sklearn.__version__,
+                            str(self.data_transformation_config.chunk_size),
+                            str(self.data_transformation_config.n_jobs),
+                            str(self.data_transformation_config.parallel_min_rows)]:
+                cache_key.update(version.encode())
+            return cache_key.hexdigest()
+        except Exception as e:
+            raise FlightException(e, sys)
 
+    def get_cached_file_paths(self, cache_key: str) -> Tuple[str, str, str]:
+        """
+        :return: cached train dataset, validation dataset and preprocessing object paths: tuple
+        """
+        cache_entry_dir = os.path.join(self.data_transformation_config.cache_dir, cache_key)
+        return (os.path.join(cache_entry_dir, DATA_TRANSFORMATION_CACHE_TRAIN_DIR_NAME),
+                os.path.join(cache_entry_dir, DATA_TRANSFORMATION_CACHE_VALIDATION_DIR_NAME),
+                os.path.join(cache_entry_dir, DATA_TRANSFORMATION_CACHE_PREPROCESSED_OBJECT_FILE_NAME))
+
+    def load_from_cache(self, cache_key: str, file_paths: Tuple[str, str, str]) -> bool:
+        """
+        Links the cached datasets and preprocessing object to the artifact paths of this run
+        :param cache_key: str
+        :param file_paths: train dataset, validation dataset and preprocessing object paths of this run
+        :return: True on a cache hit: bool
+        """
+        try:
+            cached_file_paths = self.get_cached_file_paths(cache_key)
+            if not all(os.path.exists(cached_file_path) for cached_file_path in cached_file_paths):
+                logging.info(f"Transformation cache miss: [{cache_key}]")
+                return False
+            for cached_file_path, file_path in zip(cached_file_paths, file_paths):
+                link_or_copy_file(src=cached_file_path, dst=file_path)
+            logging.info(f"Transformation cache hit: [{cache_key}], feature pipeline skipped")
+            return True
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def save_to_cache(self, cache_key: str, file_paths: Tuple[str, str, str]) -> None:
+        """
+        Stores the artifacts of this run under cache_key. They are linked into
+        a temporary directory renamed into place, so an entry is either
+        complete or absent.
+        """
+        try:
+            cache_dir = self.data_transformation_config.cache_dir
+            cache_entry_dir = os.path.join(cache_dir, cache_key)
+            if os.path.exists(cache_entry_dir):
+                return
+            temp_cache_entry_dir = os.path.join(cache_dir, f"{cache_key}.{os.getpid()}.tmp")
+            for cached_file_path, file_path in zip(self.get_cached_file_paths(cache_key), file_paths):
+                link_or_copy_file(src=file_path,
+                                  dst=os.path.join(temp_cache_entry_dir, os.path.basename(cached_file_path)))
+            try:
+                os.rename(temp_cache_entry_dir, cache_entry_dir)
+            except OSError:
+                # stored meanwhile by another run
+                shutil.rmtree(temp_cache_entry_dir, ignore_errors=True)
+            logging.info(f"Transformation artifacts cached in: [{cache_entry_dir}]")
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def initiate_data_transformation(self) -> DataTransformationArtifact:
+        try:
             logging.info("Obtaining train and test file path")
             train_file_path = self.data_ingestion_artifact.train_file_path
             validation_file_path = self.data_ingestion_artifact.validation_file_path
 
-            schema_file_path = self.data_validation_artifact.schema_file_path
-
-            logging.info("Loading training and validation data as a dataframe")
-            train_df = pd.read_excel(train_file_path)
-            validation_df = pd.read_excel(validation_file_path)
-            schema_file = read_yaml(file_path=schema_file_path)
-
-            target_column_name = schema_file[SCHEMA_TARGET_COLUMN_KEY]
-
-            logging.info("Splitting input and target feature from training data")
-            input_train_feature_df = train_df.drop(columns=[target_column_name], axis=1)
-            target_feature_train_df = train_df[target_column_name]
-
-            input_validation_feature_df = validation_df.drop(columns="Price", axis=1)
-            target_feature_validation_df = validation_df[target_column_name]
-
-            logging.info("Applying preprocessing object on training and validation dataframe")
-            input_feature_train_arr = preprocessing_obj.fit_transform(
-                input_train_feature_df
-            )
-            input_feature_validation_arr = preprocessing_obj.transform(
-                input_validation_feature_df
-            )
-
-            train_arr = np.c_[input_feature_train_arr, target_feature_train_df]
-            validation_arr = np.c_[input_feature_validation_arr, target_feature_validation_df]
-
             transformed_train_dir = \
                 self.data_transformation_config.transformed_train_dir
             transformed_validation_dir = \
                 self.data_transformation_config.transformed_validation_dir
 
+            # transformed datasets are directories named after the ingested files
             train_file_name = \
-                os.path.basename(train_file_path).replace(".xlsx", ".npz")
+                os.path.splitext(os.path.basename(train_file_path))[0]
             validation_file_name = \
-                os.path.basename(validation_file_path).replace(".xlsx", ".npz")
+                os.path.splitext(os.path.basename(validation_file_path))[0]
 
             transformed_train_file_path = os.path.join(
                 transformed_train_dir,
@@ -245,16 +526,17 @@ class DataTransformation:
                 validation_file_name
             )
 
-            logging.info("Saving transformed training and validation array")
-            save_numpy_array_data(transformed_train_file_path, train_arr)
-            save_numpy_array_data(transformed_validation_file_path, validation_arr)
-
             preprocessing_obj_file_path = \
                 self.data_transformation_config.preprocessed_object_file_path
 
-            logging.info("Saving preprocessing object.")
-            save_object(file_path=preprocessing_obj_file_path,
-                        obj=preprocessing_obj)
+            file_paths = (transformed_train_file_path, transformed_validation_file_path, preprocessing_obj_file_path)
+            cache_key = None
+            if self.data_transformation_config.cache_dir:
+                cache_key = self.get_transformation_cache_key()
+            if cache_key is None or not self.load_from_cache(cache_key=cache_key, file_paths=file_paths):
+                self.transform_data(file_paths=file_paths)
+                if cache_key is not None:
+                    self.save_to_cache(cache_key=cache_key, file_paths=file_paths)
 
             data_transformation_artifact = DataTransformationArtifact(
                 transformed_train_file_path=transformed_train_file_path,
@@ -269,6 +551,173 @@ class DataTransformation:
         except Exception as e:
             raise FlightException(e, sys)
 
+    def transform_data(self, file_paths: Tuple[str, str, str]) -> None:
+        """
+        Fits the preprocessing object on the training data, then saves the
+        transformed train and validation arrays and the preprocessing object
+        :param file_paths: train dataset, validation dataset and preprocessing object paths
+        """
+        try:
+            if self.data_transformation_config.chunk_size:
+                return self.transform_data_in_chunks(file_paths=file_paths)
+
+            transformed_train_file_path, transformed_validation_file_path, preprocessing_obj_file_path = file_paths
+
+            logging.info("Obtaining preprocessing object")
+            preprocessing_obj = self.get_data_transformer_object()
+
+            schema_file_path = self.data_validation_artifact.schema_file_path
+
+            logging.info("Loading training and validation data as a dataframe")
+            train_df = self.artifact_store.get_dataframe(self.data_ingestion_artifact.train_file_path)
+            validation_df = self.artifact_store.get_dataframe(self.data_ingestion_artifact.validation_file_path)
+            schema_file = read_yaml(file_path=schema_file_path)
+
+            target_column_name = schema_file[SCHEMA_TARGET_COLUMN_KEY]
+
+            logging.info("Splitting input and target feature from training data")
+            input_train_feature_df = train_df.drop(columns=[target_column_name], axis=1)
+            target_feature_train_df = train_df[target_column_name]
+
+            input_validation_feature_df = validation_df.drop(columns="Price", axis=1)
+            target_feature_validation_df = validation_df[target_column_name]
+
+            logging.info("Applying preprocessing object on training and validation dataframe")
+            input_feature_train_arr = run_preprocessing(
+                preprocessing_obj, input_train_feature_df, fit=True
+            )
+            input_feature_validation_arr = run_preprocessing(
+                preprocessing_obj, input_validation_feature_df
+            )
+
+            logging.info("Saving transformed training and validation datasets")
+            for dataset_dir, input_feature_arr, target_feature_df in [
+                (transformed_train_file_path, input_feature_train_arr, target_feature_train_df),
+                (transformed_validation_file_path, input_feature_validation_arr, target_feature_validation_df)
+            ]:
+                arrays = get_transformed_arrays(input_feature_arr, target_feature_df)
+                save_dataset(dataset_dir=dataset_dir, arrays=arrays)
+                # handed to the model trainer memory mapped, so grid search workers
+                # map the saved pages instead of receiving a pickled copy
+                self.artifact_store.put(dataset_dir, load_transformed_arrays(dataset_dir))
+
+            logging.info("Saving preprocessing object.")
+            save_object(file_path=preprocessing_obj_file_path,
+                        obj=preprocessing_obj)
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def fit_in_chunks(self, preprocessing_obj: ColumnTransformer, train_file_path: str, target_column_name: str) -> None:
+        """
+        Fits the preprocessing object on a training file read chunk_size rows
+        at a time, so memory use is bounded by the chunk size:
+        1. one pass counts the values every imputer sees, from which the most
+           frequent and mean imputation values, the encoder categories and
+           the Additional_Info spellings of the whole file follow
+        2. the ColumnTransformer is fitted on the first chunk to set up its
+           sub pipelines, whose statistics are then replaced by those of pass 1
+        3. a second pass fits the scalers incrementally with partial_fit
+        """
+        try:
+            chunk_size = self.data_transformation_config.chunk_size
+            transformers = preprocessing_obj.transformers
+            value_counts = [None] * len(transformers)
+            first_chunk = None
+            n_rows = 0
+            for chunk in read_dataframe_in_chunks(file_path=train_file_path, chunk_size=chunk_size):
+                input_chunk = chunk.drop(columns=[target_column_name])
+                first_chunk = input_chunk if first_chunk is None else first_chunk
+                n_rows += len(input_chunk)
+                for index, (_, pipeline, columns) in enumerate(transformers):
+                    value_counts[index] = update_value_counts(pipeline=pipeline,
+                                                              X=input_chunk.loc[:, columns],
+                                                              value_counts=value_counts[index])
+            logging.info(f"Value counts of [{n_rows}] training rows collected")
+
+            preprocessing_obj.fit(first_chunk)
+            fitted_pipelines = [(pipeline, columns) for _, pipeline, columns in preprocessing_obj.transformers_[:len(transformers)]]
+            for (pipeline, _), pipeline_value_counts in zip(fitted_pipelines, value_counts):
+                steps = [step for _, step in pipeline.steps]
+                if isinstance(steps[0], CleanAddInfoCol):
+                    steps[0].fit_value_counts(dict(pipeline_value_counts[0]))
+                    clean_value_counts = Counter()
+                    for value, count in pipeline_value_counts[0].items():
+                        clean_value_counts[steps[0].clean_value(value)] += count
+                    pipeline_value_counts = [clean_value_counts]
+
+                imputer = next(step for step in steps if isinstance(step, SimpleImputer))
+                imputer.statistics_ = np.array([get_imputation_value(imputer.strategy, column_value_counts)
+                                                for column_value_counts in pipeline_value_counts],
+                                               dtype=imputer.statistics_.dtype)
+                encoder = next((step for step in steps if isinstance(step, OrdinalEncoder)), None)
+                if encoder is not None:
+                    encoder.categories_ = [np.array(sorted(column_value_counts), dtype=categories.dtype)
+                                           for column_value_counts, categories in zip(pipeline_value_counts,
+                                                                                       encoder.categories_)]
+
+            scalers = [clone(pipeline.steps[-1][1]) for pipeline, _ in fitted_pipelines]
+            for chunk in read_dataframe_in_chunks(file_path=train_file_path, chunk_size=chunk_size):
+                for scaler, (pipeline, columns) in zip(scalers, fitted_pipelines):
+                    scaler.partial_fit(pipeline[:-1].transform(chunk.loc[:, columns]))
+            for scaler, (pipeline, _) in zip(scalers, fitted_pipelines):
+                pipeline.steps[-1] = (pipeline.steps[-1][0], scaler)
+            logging.info("Preprocessing object fitted in chunks")
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def transform_file_in_chunks(self,
+                                 preprocessing_obj: ColumnTransformer,
+                                 file_path: str,
+                                 target_column_name: str,
+                                 transformed_file_path: str) -> None:
+        """
+        Transforms a file chunk_size rows at a time and appends the arrays
+        of get_transformed_arrays to the dataset transformed_file_path
+        """
+        try:
+            array_chunks = (
+                get_transformed_arrays(run_preprocessing(preprocessing_obj, chunk.drop(columns=[target_column_name])),
+                                       chunk[target_column_name])
+                for chunk in read_dataframe_in_chunks(file_path=file_path,
+                                                      chunk_size=self.data_transformation_config.chunk_size)
+            )
+            shapes = save_dataset_chunks(dataset_dir=transformed_file_path,
+                                         array_chunks=array_chunks)
+            logging.info(f"Transformed arrays of shapes {shapes} saved in chunks to [{transformed_file_path}]")
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def transform_data_in_chunks(self, file_paths: Tuple[str, str, str]) -> None:
+        """
+        Chunked counterpart of transform_data for training data larger than memory
+        :param file_paths: train dataset, validation dataset and preprocessing object paths
+        """
+        try:
+            transformed_train_file_path, transformed_validation_file_path, preprocessing_obj_file_path = file_paths
+            logging.info(f"Transforming data in chunks of [{self.data_transformation_config.chunk_size}] rows")
+
+            preprocessing_obj = self.get_data_transformer_object()
+            schema_file = read_yaml(file_path=self.data_validation_artifact.schema_file_path)
+            target_column_name = schema_file[SCHEMA_TARGET_COLUMN_KEY]
+
+            self.fit_in_chunks(preprocessing_obj=preprocessing_obj,
+                               train_file_path=self.data_ingestion_artifact.train_file_path,
+                               target_column_name=target_column_name)
+            self.transform_file_in_chunks(preprocessing_obj=preprocessing_obj,
+                                          file_path=self.data_ingestion_artifact.train_file_path,
+                                          target_column_name=target_column_name,
+                                          transformed_file_path=transformed_train_file_path)
+            self.transform_file_in_chunks(preprocessing_obj=preprocessing_obj,
+                                          file_path=self.data_ingestion_artifact.validation_file_path,
+                                          target_column_name=target_column_name,
+                                          transformed_file_path=transformed_validation_file_path)
+
+            logging.info("Saving preprocessing object.")
+            save_object(file_path=preprocessing_obj_file_path,
+                        obj=preprocessing_obj)
+        except Exception as e:
+            raise FlightException(e, sys)
+
     def __del__(self):
         logging.info(f"{'>>'*20}Data Transformation log completed.{'<<'*20} \n\n")
 
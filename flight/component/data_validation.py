@@ -3,9 +3,9 @@ import os
 import json
 import pandas as pd
 
-from typing import List
 from flight.constant import *
-from flight.utils.utils import read_yaml
+from flight.entity.artifact_store import ArtifactStore
+from flight.entity.schema_validator import SchemaValidator
 from flight.exception import FlightException
 from flight.logger import logging
 from flight.entity.config_entity import DataValidationConfig
@@ -23,11 +23,15 @@ class DataValidation:
     """
     def __init__(self,
                  data_validation_config: DataValidationConfig,
-                 data_ingestion_artifact: DataIngestionArtifact):
+                 data_ingestion_artifact: DataIngestionArtifact,
+                 artifact_store: ArtifactStore=None):
         try:
             logging.info(f"{'='*20} Data Validation log started. {'='*20} \n\n")
             self.data_validation_config = data_validation_config
             self.data_ingestion_artifact = data_ingestion_artifact
+            self.artifact_store = artifact_store or ArtifactStore()
+            self.schema_validator = SchemaValidator.from_schema_file(data_validation_config.schema_file_path)
+            self.schema_report = None
         except Exception as e:
             raise FlightException(e, sys)
 
@@ -59,72 +63,75 @@ class DataValidation:
 
     def get_train_and_validation_df(self) -> pd.DataFrame:
         """
+        Dataframes of the artifact store, only read from disk when not in it
         :return: train and validation dataframe: pd.DataFrame
         """
         try:
-            train_df = pd.read_excel(self.data_ingestion_artifact.train_file_path)
-            validation_df = pd.read_excel(self.data_ingestion_artifact.validation_file_path)
+            train_df = self.artifact_store.get_dataframe(self.data_ingestion_artifact.train_file_path)
+            validation_df = self.artifact_store.get_dataframe(self.data_ingestion_artifact.validation_file_path)
             return train_df, validation_df
         except Exception as e:
             raise FlightException(e, sys)
 
+    def get_schema_report(self) -> dict:
+        """
+        Checks train and validation df against config/schema.yaml, once per run
+        :return: SchemaValidator report of each dataset: dict
+        """
+        try:
+            if self.schema_report is None:
+                train_df, validation_df = self.get_train_and_validation_df()
+                logging.info("Validating train and validation datasets against the schema")
+                self.schema_report = {"train": self.schema_validator.validate(train_df),
+                                      "validation": self.schema_validator.validate(validation_df)}
+            return self.schema_report
+        except Exception as e:
+            raise FlightException(e, sys)
+
     def dataset_column_validation(self) -> bool:
         """
         Compares the train df schema with that in config/schema.yaml file
         :return: bool
         """
         try:
-            validation_status = False
-            schema_file_path = self.data_validation_config.schema_file_path
-            schema_file = read_yaml(schema_file_path)
-            train_df, _ = self.get_train_and_validation_df()
-
             logging.info("Starting dataset column name and datatype validation")
-            schema_columns = schema_file[SCHEMA_COLUMNS_KEY]
-            if len(train_df.columns) == len(schema_columns):
-                for col_name in train_df.columns:
-                    if col_name in schema_columns:
-                        if train_df[col_name].dtypes == schema_columns[col_name]:
-                            pass
-                        else:
-                            logging.info(f"""Column datatype mismatch with schema file datatype: 
-                            [{col_name}: {train_df[col_name].dtypes}] != [{col_name}: {schema_columns[col_name]}]""")
-                            raise Exception("Dataframe datatype and schema file datatype mismatch")
-                    else:
-                        logging.info(f"Column name {col_name} not in schema file")
-                        raise Exception(f"Column name {col_name} not in schema file ")
-                validation_status = True
-                logging.info(f"Column name and data type validation with schema file successful? {validation_status}")
-            else:
-                logging.info(f"Number of columns mismatch: Dataframe col = {len(train_df.columns)} while Schema file col = {schema_columns}")
-                raise Exception("No of dataframe cols doesn't match that of schema file")
+            train_report = self.get_schema_report()["train"]
+            validation_status = SchemaValidator.is_structure_valid(train_report)
+            if not validation_status:
+                for error in SchemaValidator.get_structure_errors(train_report):
+                    logging.info(error)
+                raise Exception("Train dataframe columns or datatypes don't match those of the schema file")
+            logging.info(f"Column name and data type validation with schema file successful? {validation_status}")
             return validation_status
         except Exception as e:
             raise FlightException(e, sys)
 
-    # def cat_column_domain_values_validation(self, cat_columns: List[str]):
-    #     # commented because bugs occur when missing values are present
-    #     try:
-    #         validation_status = False
-    #         schema_file_path = self.data_validation_config.schema_file_path
-    #         train_df, test_df = self.get_train_and_test_df()
-    #         schema_file = read_yaml(schema_file_path)
-    #         # schema_file_categorical = schema_file[SCHEMA_CATEGORICAL_COLUMNS_KEY]
-    #         for col_name in cat_columns:
-    #             for value in train_df[col_name].unique():
-    #                 if len(train_df[col_name].unique()) == len(schema_file[SCHEMA_DOMAIN_VALUE_KEY][col_name]):
-    #                     if value not in schema_file[SCHEMA_DOMAIN_VALUE_KEY][col_name]:
-    #                         logging.info(f"Dataframe col [{col_name}] with domain value [{value}] is not in schema file col [{col_name}]")
-    #                         raise Exception(f"Domain value: [{value}] not in schema file [{col_name}] domain values")
-    #                 else:
-    #                     raise Exception(f"Dataframe domain values in {col_name} = {len(train_df[col_name].unique())} while schema file domain_values of [{col_name}] = {len(schema_file[SCHEMA_DOMAIN_VALUE_KEY][col_name])} ")
-    #             logging.info(f"Domain_value validation for {col_name} successful")
-    #
-    #         validation_status = True
-    #         logging.info(f"All columns domain values validated successfully? {validation_status}")
-    #         return validation_status
-    #     except Exception as e:
-    #         raise FlightException(e, sys)
+    def cat_column_domain_values_validation(self) -> bool:
+        """
+        Checks the categorical columns of train and validation df against the
+        domain values of the schema and saves the report. Out of domain values
+        are reported, not raised, the preprocessing encodes them as unknown
+        categories. Additional_Info spellings such as "No Info" are valid.
+        :return: True when every value is in the schema domain values: bool
+        """
+        try:
+            schema_report = self.get_schema_report()
+            validation_status = True
+            for dataset_name, report in schema_report.items():
+                for error in SchemaValidator.get_domain_value_errors(report):
+                    logging.info(f"{dataset_name} dataset: {error}")
+                validation_status = validation_status and \
+                    all(column_report["n_invalid"] == 0 for column_report in report["domain_values"].values())
+
+            schema_report_file_path = self.data_validation_config.schema_report_file_path
+            os.makedirs(os.path.dirname(schema_report_file_path), exist_ok=True)
+            with open(schema_report_file_path, "w") as schema_report_file:
+                json.dump(schema_report, schema_report_file, indent=4)
+            logging.info(f"All columns domain values validated successfully? {validation_status}, "
+                         f"report saved at {schema_report_file_path}")
+            return validation_status
+        except Exception as e:
+            raise FlightException(e, sys)
 
     def validate_dataset_schema(self) -> bool:
         try:
@@ -159,7 +166,7 @@ class DataValidation:
 
             report_file_path = self.data_validation_config.report_file_path
             report_dir = os.path.dirname(report_file_path)
-            os.makedirs(report_dir)
+            os.makedirs(report_dir, exist_ok=True)
 
             with open(report_file_path, "w") as report_file:
                 json.dump(report, report_file, indent=6)
@@ -199,11 +206,7 @@ class DataValidation:
         try:
             self.is_train_validation_file_exists()
             self.dataset_column_validation()
-            # self.cat_column_domain_values_validation(cat_columns=["Airline",
-            #                                                       "Source",
-            #                                                       "Destination",
-            #                                                       "Total_Stops",
-            #                                                       "Additional_Info"])
+            is_schema_valid = self.cat_column_domain_values_validation()
             self.validate_dataset_schema()
             self.is_data_drift_found()
             data_validation_artifact = DataValidationArtifact(
@@ -211,7 +214,9 @@ class DataValidation:
                 report_file_path=self.data_validation_config.report_file_path,
                 report_file_page_path=self.data_validation_config.report_page_file_path,
                 is_validated=True,
-                message="Data Validation performed successfully"
+                message="Data Validation performed successfully",
+                schema_report_file_path=self.data_validation_config.schema_report_file_path,
+                is_schema_valid=is_schema_valid
             )
             logging.info(f"Data validation artifact: {data_validation_artifact}")
             return data_validation_artifact
@@ -1,12 +1,12 @@
 import sys
 import numpy as np
-import pandas as pd
 
 from flight.constant import *
 from flight.logger import logging
 from flight.exception import FlightException
 from flight.entity.config_entity import ModelEvaluationConfig
 from flight.entity.model_factory import evaluate_regression_model
+from flight.entity.artifact_store import ArtifactStore
 from flight.utils.utils import load_object, read_yaml, write_yaml
 from flight.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact, \
     ModelTrainerArtifact, ModelEvaluationArtifact
@@ -18,13 +18,15 @@ class ModelEvaluation:
                  model_evaluation_config: ModelEvaluationConfig,
                  data_ingestion_artifact: DataIngestionArtifact,
                  data_validation_artifact: DataValidationArtifact,
-                 model_trainer_artifact: ModelTrainerArtifact):
+                 model_trainer_artifact: ModelTrainerArtifact,
+                 artifact_store: ArtifactStore=None):
         try:
             logging.info(f"{'>>' * 30} Model Evaluation log started. {'<<' * 30}")
             self.model_evaluation_config = model_evaluation_config
             self.data_ingestion_artifact = data_ingestion_artifact
             self.data_validation_artifact = data_validation_artifact
             self.model_trainer_artifact = model_trainer_artifact
+            self.artifact_store = artifact_store or ArtifactStore()
         except Exception as e:
             raise FlightException(e, sys)
 
@@ -92,8 +94,8 @@ class ModelEvaluation:
 
             schema_file_path = self.data_validation_artifact.schema_file_path
 
-            train_dataframe = pd.read_excel(train_file_path)
-            validation_dataframe = pd.read_excel(validation_file_path)
+            train_dataframe = self.artifact_store.get_dataframe(train_file_path)
+            validation_dataframe = self.artifact_store.get_dataframe(validation_file_path)
 
             schema_content = read_yaml(file_path=schema_file_path)
             target_column_name = schema_content[SCHEMA_TARGET_COLUMN_KEY]
@@ -106,8 +108,9 @@ class ModelEvaluation:
 
             # dropping target column from the dataframe
             logging.info("Dropping target column from the dataframe.")
-            train_dataframe.drop(target_column_name, axis=1, inplace=True)
-            validation_dataframe.drop(target_column_name, axis=1, inplace=True)
+            # not inplace, the dataframes of the artifact store are shared
+            train_dataframe = train_dataframe.drop(target_column_name, axis=1)
+            validation_dataframe = validation_dataframe.drop(target_column_name, axis=1)
             logging.info(f"Dropping target column from train and validation dataframe successful.")
 
             model = self.get_best_model()
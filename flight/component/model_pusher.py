@@ -4,19 +4,25 @@ import shutil
 
 from flight.logger import logging
 from flight.exception import FlightException
+from flight.utils.utils import load_object
+from flight.constant import SHARED_MODEL_DIR_NAME
+from flight.entity.model_registry import ModelRegistry
+from flight.entity.shared_model import export_shared_model
 from flight.entity.config_entity import ModelPusherConfig
 from flight.entity.artifact_entity import ModelEvaluationArtifact, \
-    ModelPusherArtifact
+    ModelPusherArtifact, ModelTrainerArtifact
 
 
 class ModelPusher:
     def __init__(self,
                  model_pusher_config: ModelPusherConfig,
-                 model_evaluation_artifact: ModelEvaluationArtifact):
+                 model_evaluation_artifact: ModelEvaluationArtifact,
+                 model_trainer_artifact: ModelTrainerArtifact=None):
         try:
             logging.info(f"{'>>' * 30} Model Pusher log started {'<<' * 30}")
             self.model_pusher_config = model_pusher_config
             self.model_evaluation_artifact = model_evaluation_artifact
+            self.model_trainer_artifact = model_trainer_artifact
         except Exception as e:
             raise FlightException(e, sys)
 
@@ -36,6 +42,9 @@ class ModelPusher:
             logging.info(
                 f"Trained model: {evaluated_model_file_path} is copied in export dir: [{export_model_file_path}]"
             )
+            export_shared_model(model=load_object(file_path=export_model_file_path),
+                                shared_model_dir=os.path.join(export_dir, SHARED_MODEL_DIR_NAME))
+            self.register_model(export_model_file_path=export_model_file_path)
             model_pusher_artifact = ModelPusherArtifact(
                 is_model_pusher=True,
                 export_model_file_path=export_model_file_path
@@ -45,6 +54,34 @@ class ModelPusher:
         except Exception as e:
             raise FlightException(e, sys)
 
+    def get_model_metrics(self) -> dict:
+        if self.model_trainer_artifact is None:
+            return dict()
+        return {
+            "train_rmse": float(self.model_trainer_artifact.train_rmse),
+            "validation_rmse": float(self.model_trainer_artifact.validation_rmse),
+            "train_accuracy": float(self.model_trainer_artifact.train_accuracy),
+            "validation_accuracy": float(self.model_trainer_artifact.validation_accuracy),
+            "model_accuracy": float(self.model_trainer_artifact.model_accuracy),
+        }
+
+    def register_model(self, export_model_file_path: str) -> dict:
+        """
+        Records the exported model in the registry manifest of the model
+        export root and promotes it to the current model
+        :param export_model_file_path: exported model file
+        :return: manifest entry of the model: dict
+        """
+        try:
+            export_dir = self.model_pusher_config.export_dir_path
+            model_registry = ModelRegistry(model_dir=os.path.dirname(export_dir))
+            return model_registry.register_model(version=os.path.basename(export_dir),
+                                                 model_file_path=export_model_file_path,
+                                                 metrics=self.get_model_metrics(),
+                                                 promoted=True)
+        except Exception as e:
+            raise FlightException(e, sys)
+
     def initiate_model_pusher(self) -> ModelPusherArtifact:
         try:
             return self.export_model()
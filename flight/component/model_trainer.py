@@ -3,23 +3,28 @@ import sys
 from typing import List
 from flight.logger import logging
 from flight.exception import FlightException
+from flight.entity.artifact_store import ArtifactStore
 from flight.entity.config_entity import ModelTrainerConfig
+from flight.entity.fast_preprocessor import FastPreprocessor
+from flight.component.data_transformation import run_preprocessing, load_transformed_arrays
 from flight.entity.model_factory import evaluate_regression_model
-from flight.utils.utils import load_numpy_array_data, load_object, save_object
+from flight.utils.utils import load_object, save_object
 from flight.entity.artifact_entity import DataTransformationArtifact, ModelTrainerArtifact
 from flight.entity.model_factory import ModelFactory, GridSearchedBestModel, \
     MetricInfoArtifact
 
 
 class FlightEstimatorModel:
-    def __init__(self, preprocessing_object, trained_model_object):
+    def __init__(self, preprocessing_object, trained_model_object, fast_preprocessor=None):
         """
         TrainedModel constructor
         :param preprocessing_object: preprocessing_object
         :param trained_model_object: trained_model_object
+        :param fast_preprocessor: preprocessing_object compiled by FastPreprocessor.compile
         """
         self.preprocessing_object = preprocessing_object
         self.trained_model_object = trained_model_object
+        self.fast_preprocessor = fast_preprocessor
 
     def predict(self, X):
         """
@@ -28,7 +33,12 @@ class FlightEstimatorModel:
         inputs are in the same form as the training data.
         Finally it performs prediction on transformed features
         """
-        transformed_feature = self.preprocessing_object.transform(X)
+        # models saved before fast_preprocessor existed don't have the attribute
+        fast_preprocessor = getattr(self, "fast_preprocessor", None)
+        if fast_preprocessor is not None:
+            transformed_feature = fast_preprocessor.transform(X)
+        else:
+            transformed_feature = run_preprocessing(self.preprocessing_object, X)
         return self.trained_model_object.predict(transformed_feature)
 
     def __repr__(self):
@@ -41,11 +51,13 @@ class FlightEstimatorModel:
 class ModelTrainer:
     def __init__(self,
                  model_trainer_config: ModelTrainerConfig,
-                 data_transformation_artifact: DataTransformationArtifact):
+                 data_transformation_artifact: DataTransformationArtifact,
+                 artifact_store: ArtifactStore=None):
         try:
             logging.info(f"{'>>' * 30}Model trainer log started.{'<<' * 30} ")
             self.model_trainer_config = model_trainer_config
             self.data_transformation_artifact = data_transformation_artifact
+            self.artifact_store = artifact_store or ArtifactStore()
         except Exception as e:
             raise FlightException(e, sys)
 
@@ -54,16 +66,15 @@ class ModelTrainer:
             logging.info("Loading transformed training dataset")
             transformed_train_file_path = \
                 self.data_transformation_artifact.transformed_train_file_path
-            train_array = load_numpy_array_data(transformed_train_file_path)
+            # float32 features, memory mapped, from the artifact store when the
+            # transformation ran in this process; estimators that need float64
+            # convert them when fitting
+            x_train, y_train = self.artifact_store.get(transformed_train_file_path, load_transformed_arrays)
 
             logging.info("Loading transformed validation dataset")
             transformed_validation_file_path = \
                 self.data_transformation_artifact.transformed_validation_file_path
-            validation_array = load_numpy_array_data(transformed_validation_file_path)
-
-            logging.info("Splitting training and validation input and target features")
-            x_train, y_train, x_test, y_test = \
-                train_array[:, :-1], train_array[:, -1], validation_array[:, :-1], validation_array[:, -1]
+            x_test, y_test = self.artifact_store.get(transformed_validation_file_path, load_transformed_arrays)
 
             logging.info("Extracting model config file path")
             model_config_file_path = self.model_trainer_config.model_config_file_path
@@ -101,9 +112,13 @@ class ModelTrainer:
             )
             model_object = metric_info.model_object
 
+            logging.info("Compiling preprocessing object into fast preprocessor")
+            fast_preprocessor = FastPreprocessor.compile(preprocessing_object=preprocessing_obj)
+
             trained_model_file_path = self.model_trainer_config.trained_model_file_path
             flight_model = FlightEstimatorModel(preprocessing_object=preprocessing_obj,
-                                                trained_model_object=model_object)
+                                                trained_model_object=model_object,
+                                                fast_preprocessor=fast_preprocessor)
             logging.info(f"Saving model at path: {trained_model_file_path}")
             save_object(file_path=trained_model_file_path, obj=flight_model)
 
@@ -1,5 +1,5 @@
 from flight.entity.config_entity import DataIngestionConfig, DataValidationConfig, DataTransformationConfig,\
-    ModelTrainerConfig, ModelEvaluationConfig, ModelPusherConfig, TrainingPipelineConfig
+    ModelTrainerConfig, ModelEvaluationConfig, ModelPusherConfig, TrainingPipelineConfig, PredictionServiceConfig
 from datetime import datetime
 from flight.utils.utils import read_yaml
 from flight.logger import logging
@@ -35,6 +35,16 @@ class Configuration:
 
             data_ingestion_info = self.config_info[DATA_INGESTION_CONFIG_KEY]
             dataset_download_url = data_ingestion_info[DATASET_DOWNLOAD_URL_KEY]
+            local_dataset_dir = data_ingestion_info.get(LOCAL_DATASET_DIR_KEY)
+            # shared by every run, unlike the timestamped artifact dirs
+            dataset_cache_dir = data_ingestion_info.get(DATASET_CACHE_DIR_KEY)
+            if dataset_cache_dir is not None:
+                dataset_cache_dir = os.path.join(artifact_dir, DATA_INGESTION_ARTIFACT_DIR, dataset_cache_dir)
+            ingestion_state_dir = os.path.join(artifact_dir, DATA_INGESTION_ARTIFACT_DIR,
+                                               data_ingestion_info.get(INGESTION_STATE_DIR_KEY, "ingestion_state"))
+            # column types of the ingested splits
+            schema_file_path = os.path.join(ROOT_DIR, CONFIG_DIR,
+                                            self.config_info[DATA_VALIDATION_CONFIG_KEY][DATA_VALIDATION_SCHEMA_FILE_NAME_KEY])
             raw_data_dir = os.path.join(data_ingestion_artifact_dir,
                                         data_ingestion_info[RAW_DATA_DIR_KEY])
             zip_download_dir = os.path.join(data_ingestion_artifact_dir,
@@ -51,13 +61,25 @@ class Configuration:
                                              ingested_dir,
                                              data_ingestion_info[INGESTED_TEST_DIR_KEY])
 
-            data_ingestion_config = DataIngestionConfig(dataset_download_url=dataset_download_url,
+            data_ingestion_config = DataIngestionConfig(dataset_source=data_ingestion_info.get(DATASET_SOURCE_KEY,
+                                                                                               DATASET_SOURCE_KAGGLE),
+                                                        dataset_download_url=dataset_download_url,
+                                                        local_dataset_dir=local_dataset_dir,
+                                                        dataset_cache_dir=dataset_cache_dir,
+                                                        refresh_dataset=data_ingestion_info.get(REFRESH_DATASET_KEY, False),
+                                                        train_file_name=data_ingestion_info[TRAIN_FILE_NAME_KEY],
+                                                        test_file_name=data_ingestion_info[TEST_FILE_NAME_KEY],
                                                         raw_data_dir=raw_data_dir,
                                                         zip_download_dir=zip_download_dir,
                                                         ingested_dir=ingested_dir,
                                                         ingested_train_dir=ingested_train_dir,
                                                         ingested_validation_dir=ingested_validation_dir,
-                                                        ingested_test_dir=ingested_test_dir)
+                                                        ingested_test_dir=ingested_test_dir,
+                                                        export_excel=data_ingestion_info.get(EXPORT_EXCEL_KEY, False),
+                                                        chunk_size=data_ingestion_info.get(DATA_INGESTION_CHUNK_SIZE_KEY),
+                                                        incremental=data_ingestion_info.get(INCREMENTAL_INGESTION_KEY, False),
+                                                        ingestion_state_dir=ingestion_state_dir,
+                                                        schema_file_path=schema_file_path)
             # print(data_ingestion_config)
             logging.info(f"Data Ingestion config: {data_ingestion_config}")
             return data_ingestion_config
@@ -81,10 +103,15 @@ class Configuration:
             report_page_file_path = os.path.join(data_validation_artifact_dir,
                                                  data_validation_config[DATA_VALIDATION_REPORT_PAGE_FILE_NAME_KEY])
 
+            schema_report_file_path = os.path.join(
+                data_validation_artifact_dir,
+                data_validation_config.get(DATA_VALIDATION_SCHEMA_REPORT_FILE_NAME_KEY, "schema_report.json"))
+
             data_validation_config = DataValidationConfig(schema_dir=schema_dir,
                                                           schema_file_path=schema_file_path,
                                                           report_file_path=report_file_path,
-                                                          report_page_file_path=report_page_file_path)
+                                                          report_page_file_path=report_page_file_path,
+                                                          schema_report_file_path=schema_report_file_path)
 
             logging.info(f"Data Validation config: [{data_validation_config}]")
             return data_validation_config
@@ -102,6 +129,10 @@ class Configuration:
                                            DATA_TRANSFORMATION_DIR_KEY,
                                            self.current_time_stamp)
 
+            cache_dir = data_transformation_config.get(DATA_TRANSFORMATION_CACHE_DIR_KEY)
+            if cache_dir:
+                cache_dir = os.path.join(artifact_dir, DATA_TRANSFORMATION_DIR_KEY, cache_dir)
+
             preprocessed_object_file_path = os.path.join(data_transformation_dir,
                                                          data_transformation_config[DATA_TRANSFORMATION_PREPROCESSING_DIR_KEY],
                                                          data_transformation_config[DATA_TRANSFORMATION_PREPROCESSED_OBJECT_FILE_NAME_KEY])
@@ -127,7 +158,11 @@ class Configuration:
                                                                   transformed_validation_dir=transformed_validation_dir,
                                                                   # transformed_test_dir=transformed_test_dir,
                                                                   # preprocessing_dir=preprocessing_dir,
-                                                                  preprocessed_object_file_path=preprocessed_object_file_path)
+                                                                  preprocessed_object_file_path=preprocessed_object_file_path,
+                                                                  n_jobs=data_transformation_config[DATA_TRANSFORMATION_N_JOBS_KEY],
+                                                                  parallel_min_rows=data_transformation_config[DATA_TRANSFORMATION_PARALLEL_MIN_ROWS_KEY],
+                                                                  cache_dir=cache_dir,
+                                                                  chunk_size=data_transformation_config.get(DATA_TRANSFORMATION_CHUNK_SIZE_KEY))
             logging.info(f"Data Transformation Config: [{data_transformation_config}]")
             return data_transformation_config
         except Exception as e:
@@ -202,16 +237,34 @@ class Configuration:
         except Exception as e:
             raise FlightException(e, sys)
 
+    def get_prediction_service_config(self) -> PredictionServiceConfig:
+        try:
+            prediction_service_config = self.config_info[PREDICTION_SERVICE_CONFIG_KEY]
+            response = PredictionServiceConfig(
+                micro_batching=prediction_service_config[PREDICTION_SERVICE_MICRO_BATCHING_KEY],
+                batch_window_ms=prediction_service_config[PREDICTION_SERVICE_BATCH_WINDOW_MS_KEY],
+                max_batch_size=prediction_service_config[PREDICTION_SERVICE_MAX_BATCH_SIZE_KEY],
+                prediction_timeout_seconds=prediction_service_config.get(
+                    PREDICTION_SERVICE_PREDICTION_TIMEOUT_SECONDS_KEY, 10),
+                model_load_mode=prediction_service_config[PREDICTION_SERVICE_MODEL_LOAD_MODE_KEY]
+            )
+            logging.info(f"Prediction service config: {response}")
+            return response
+        except Exception as e:
+            raise FlightException(e, sys)
+
     def get_training_pipeline_config(self) -> ModelTrainerConfig:
         try:
             training_pipeline_config = self.config_info[TRAINING_PIPELINE_CONFIG_KEY]
             artifact_dir = os.path.join(ROOT_DIR,
                                         training_pipeline_config[TRAINING_PIPELINE_NAME_KEY],
                                         training_pipeline_config[TRAINING_PIPELINE_ARTIFACT_DIR_KEY])
-            training_pipeline_config = TrainingPipelineConfig(artifact_dir=artifact_dir)
+            artifact_store_max_mb = training_pipeline_config.get(TRAINING_PIPELINE_ARTIFACT_STORE_MAX_MB_KEY, 1024)
+            training_pipeline_config = TrainingPipelineConfig(artifact_dir=artifact_dir,
+                                                              artifact_store_max_mb=artifact_store_max_mb)
             logging.info(f"Training pipeline config: {training_pipeline_config}")
             # print(training_pipeline_config)
-            return TrainingPipelineConfig(artifact_dir=artifact_dir)
+            return training_pipeline_config
         except Exception as e:
             raise FlightException(e, sys)
 
@@ -17,17 +17,39 @@ CONFIG_FILE_PATH = os.path.join(ROOT_DIR, CONFIG_DIR, CONFIG_FILE_NAME)
 TRAINING_PIPELINE_CONFIG_KEY = "training_pipeline_config"
 TRAINING_PIPELINE_NAME_KEY = "pipeline_name"
 TRAINING_PIPELINE_ARTIFACT_DIR_KEY = "artifact_dir"
+TRAINING_PIPELINE_ARTIFACT_STORE_MAX_MB_KEY = "artifact_store_max_mb"
 
 # Data ingestion related variables
 DATA_INGESTION_ARTIFACT_DIR = "data_ingestion"
 DATA_INGESTION_CONFIG_KEY = "data_ingestion_config"
 DATASET_DOWNLOAD_URL_KEY = "dataset_download_url"
+DATASET_SOURCE_KEY = "dataset_source"
+LOCAL_DATASET_DIR_KEY = "local_dataset_dir"
+DATASET_CACHE_DIR_KEY = "dataset_cache_dir"
+REFRESH_DATASET_KEY = "refresh_dataset"
+TRAIN_FILE_NAME_KEY = "train_file_name"
+TEST_FILE_NAME_KEY = "test_file_name"
+DATASET_SOURCE_KAGGLE = "kaggle"
+DATASET_SOURCE_LOCAL = "local"
+DATASET_CACHE_OBJECTS_DIR_NAME = "objects"
+DATASET_CACHE_SOURCES_DIR_NAME = "sources"
 RAW_DATA_DIR_KEY = "raw_data_dir"
 ZIP_DOWNLOAD_DIR_KEY = "zip_download_dir"
 INGESTED_DIR_KEY = "ingested_dir"
 INGESTED_TRAIN_DIR_KEY = "ingested_train_dir"
 INGESTED_VALIDATION_DIR_KEY = "ingested_validation_dir"
 INGESTED_TEST_DIR_KEY = "ingested_test_dir"
+EXPORT_EXCEL_KEY = "export_excel"
+DATA_INGESTION_CHUNK_SIZE_KEY = "chunk_size"
+INGESTED_FILE_EXTENSION = ".parquet"
+EXCEL_FILE_EXTENSION = ".xlsx"
+INCREMENTAL_INGESTION_KEY = "incremental"
+INGESTION_STATE_DIR_KEY = "ingestion_state_dir"
+INGESTION_STATE_FILE_NAME = "state.json"
+INGESTION_ROW_INDEX_FILE_NAME = "row_index.npz"
+INGESTION_SAMPLER_FILE_NAME = "sampler.pkl"
+INGESTION_PARTS_DIR_NAME = "parts"
+INGESTED_DELTA_FILE_SUFFIX = "_delta"
 
 
 # Data Validation related variables
@@ -36,6 +58,7 @@ DATA_VALIDATION_SCHEMA_FILE_NAME_KEY = "schema_file_name"
 DATA_VALIDATION_ARTIFACT_DIR = "data_validation"
 DATA_VALIDATION_REPORT_FILE_NAME_KEY = "report_file_name"
 DATA_VALIDATION_REPORT_PAGE_FILE_NAME_KEY = "report_page_file_name"
+DATA_VALIDATION_SCHEMA_REPORT_FILE_NAME_KEY = "schema_report_file_name"
 
 # Data Transformation related variables
 DATA_TRANSFORMATION_CONFIG_KEY = "data_transformation_config"
@@ -46,6 +69,20 @@ DATA_TRANSFORMATION_TRAIN_DIR_KEY = "transformed_train_dir"
 DATA_TRANSFORMATION_VALIDATION_DIR_KEY = "transformed_validation_dir"
 DATA_TRANSFORMATION_PREPROCESSING_DIR_KEY = "preprocessing_dir"
 DATA_TRANSFORMATION_PREPROCESSED_OBJECT_FILE_NAME_KEY = "preprocessed_object_file_name"
+DATA_TRANSFORMATION_N_JOBS_KEY = "n_jobs"
+DATA_TRANSFORMATION_PARALLEL_MIN_ROWS_KEY = "parallel_min_rows"
+DATA_TRANSFORMATION_CACHE_DIR_KEY = "cache_dir"
+DATA_TRANSFORMATION_CHUNK_SIZE_KEY = "chunk_size"
+# transformed datasets: directories of .npy files described by a header
+DATASET_HEADER_FILE_NAME = "header.json"
+DATASET_FORMAT_VERSION_KEY = "format_version"
+DATASET_FORMAT_VERSION = 1
+DATASET_ARRAYS_KEY = "arrays"
+TRANSFORMED_FEATURES_KEY = "features"
+TRANSFORMED_TARGET_KEY = "target"
+DATA_TRANSFORMATION_CACHE_TRAIN_DIR_NAME = "train"
+DATA_TRANSFORMATION_CACHE_VALIDATION_DIR_NAME = "validation"
+DATA_TRANSFORMATION_CACHE_PREPROCESSED_OBJECT_FILE_NAME = "preprocessed.pkl"
 
 # >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>> cross check these variables <<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<
 # Dataset schema related variables
@@ -87,6 +124,22 @@ MODEL_PUSHER_ARTIFACT_DIR = "model_pusher"
 MODEL_PUSHER_CONFIG_KEY = "model_pusher_config"
 MODEL_PUSHER_MODEL_EXPORT_DIR_KEY = "model_export_dir"
 
+# Model registry related variables
+MODEL_REGISTRY_FILE_NAME = "manifest.json"
+MODEL_REGISTRY_CURRENT_KEY = "current"
+MODEL_REGISTRY_MODELS_KEY = "models"
+SHARED_MODEL_DIR_NAME = "shared_model"
+
+# Prediction service related variables
+PREDICTION_SERVICE_CONFIG_KEY = "prediction_service_config"
+PREDICTION_SERVICE_MICRO_BATCHING_KEY = "micro_batching"
+PREDICTION_SERVICE_BATCH_WINDOW_MS_KEY = "batch_window_ms"
+PREDICTION_SERVICE_MAX_BATCH_SIZE_KEY = "max_batch_size"
+PREDICTION_SERVICE_PREDICTION_TIMEOUT_SECONDS_KEY = "prediction_timeout_seconds"
+PREDICTION_SERVICE_MODEL_LOAD_MODE_KEY = "model_load_mode"
+MODEL_LOAD_MODE_PICKLE = "pickle"
+MODEL_LOAD_MODE_MMAP = "mmap"
+
 # Experiment related variables
 EXPERIMENT_DIR_NAME = "experiment"
 EXPERIMENT_FILE_NAME = "experiment.csv"
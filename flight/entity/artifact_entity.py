@@ -4,13 +4,18 @@ DataIngestionArtifact = namedtuple("DataIngestionArtifact", ["test_file_path",
                                                              "train_file_path",
                                                              "validation_file_path",
                                                              "is_ingested",
-                                                             "message"])
+                                                             "message",
+                                                             "train_delta_file_path",
+                                                             "validation_delta_file_path",
+                                                             "n_new_rows"])
 
 DataValidationArtifact = namedtuple("DataValidationArtifact", ["schema_file_path",
                                                                "report_file_path",
                                                                "report_file_page_path",
                                                                "is_validated",
-                                                               "message"])
+                                                               "message",
+                                                               "schema_report_file_path",
+                                                               "is_schema_valid"])
 
 DataTransformationArtifact = namedtuple("DataTransformationArtifact", ["is_transformed",
                                                                        "message",
@@ -31,4 +36,10 @@ ModelEvaluationArtifact = namedtuple("ModelEvaluationArtifact", ["is_model_accep
                                                                  "evaluated_model_path"])
 
 ModelPusherArtifact = namedtuple("ModelPusherArtifact", ["is_model_pusher",
-                                                         "export_model_file_path"])
\ No newline at end of file
+                                                         "export_model_file_path"])
+
+BatchPredictionArtifact = namedtuple("BatchPredictionArtifact", ["model_file_path",
+                                                                 "output_file_path",
+                                                                 "n_rows",
+                                                                 "execution_time",
+                                                                 "rows_per_second"])
@@ -0,0 +1,138 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from flight.logger import logging
+from flight.exception import FlightException
+from flight.utils.utils import read_dataframe, write_dataframe
+
+
+DEFAULT_ARTIFACT_STORE_MAX_BYTES = 1024 * 1024 * 1024
+
+
+def get_artifact_size(value) -> int:
+    """
+    :param value: dataframe, array, or tuple, list or dict of them
+    :return: bytes of memory held by value, memory mapped arrays are free: int
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.memmap):
+        return 0
+    if isinstance(value, np.ndarray):
+        # views of memory mapped arrays are backed by the page cache as well
+        return 0 if isinstance(value.base, np.memmap) else value.nbytes
+    if isinstance(value, dict):
+        return sum(get_artifact_size(item) for item in value.values())
+    if isinstance(value, (tuple, list)):
+        return sum(get_artifact_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class ArtifactStore:
+    """
+    Artifacts loaded during one pipeline run, kept in memory and keyed by
+    the path of their file, so a component reuses what an earlier one
+    wrote or read instead of loading the file again. Files are still
+    written for lineage. An entry is reloaded when its file changed since
+    it was stored, and the least recently used entries are evicted once
+    the store holds more than max_bytes.
+    Stored values are shared between components and must not be modified
+    in place.
+    """
+
+    def __init__(self, max_bytes: int=DEFAULT_ARTIFACT_STORE_MAX_BYTES):
+        try:
+            self.max_bytes = max_bytes
+            self.entries = OrderedDict()
+            self.n_bytes = 0
+            self.n_hits = 0
+            self.n_misses = 0
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    @staticmethod
+    def get_key(file_path: str) -> str:
+        return os.path.abspath(file_path)
+
+    @staticmethod
+    def get_file_version(file_path: str) -> int:
+        return os.stat(file_path).st_mtime_ns
+
+    def put(self, file_path: str, value) -> None:
+        """
+        Stores value as the content of file_path, which must already be written
+        :param file_path: path of the artifact file or directory
+        :param value: loaded artifact
+        """
+        try:
+            self.discard(file_path)
+            size = get_artifact_size(value)
+            if size > self.max_bytes:
+                logging.info(f"Artifact [{file_path}] of [{size}] bytes exceeds the store limit, not kept in memory")
+                return
+            self.entries[self.get_key(file_path)] = (self.get_file_version(file_path), size, value)
+            self.n_bytes += size
+            self.evict()
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def get(self, file_path: str, loader):
+        """
+        :param file_path: path of the artifact file or directory
+        :param loader: function loading the artifact from file_path on a miss
+        :return: the stored artifact, loaded and stored first if needed
+        """
+        try:
+            key = self.get_key(file_path)
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == self.get_file_version(file_path):
+                self.entries.move_to_end(key)
+                self.n_hits += 1
+                return entry[2]
+
+            self.n_misses += 1
+            value = loader(file_path)
+            self.put(file_path, value)
+            return value
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def discard(self, file_path: str) -> None:
+        entry = self.entries.pop(self.get_key(file_path), None)
+        if entry is not None:
+            self.n_bytes -= entry[1]
+
+    def evict(self) -> None:
+        while self.n_bytes > self.max_bytes and self.entries:
+            key, (_, size, _) = self.entries.popitem(last=False)
+            self.n_bytes -= size
+            logging.info(f"Artifact [{key}] of [{size}] bytes evicted from the store")
+
+    def clear(self) -> None:
+        logging.info(f"Artifact store cleared: [{self.n_hits}] hits, [{self.n_misses}] misses")
+        self.entries.clear()
+        self.n_bytes = 0
+
+    def get_dataframe(self, file_path: str) -> pd.DataFrame:
+        """
+        :param file_path: parquet, csv or excel file
+        :return: the dataframe of file_path: pd.DataFrame
+        """
+        return self.get(file_path, read_dataframe)
+
+    def put_dataframe(self, file_path: str, dataframe: pd.DataFrame) -> None:
+        """
+        Writes dataframe to file_path and keeps it in memory for the next components
+        """
+        try:
+            # the file does not keep the index, neither does the stored dataframe
+            dataframe = dataframe.reset_index(drop=True)
+            write_dataframe(dataframe=dataframe, file_path=file_path)
+            self.put(file_path, dataframe)
+        except Exception as e:
+            raise FlightException(e, sys)
@@ -1,23 +1,39 @@
 from collections import namedtuple
 
-DataIngestionConfig = namedtuple("DataIngestionConfig", ["dataset_download_url",
+DataIngestionConfig = namedtuple("DataIngestionConfig", ["dataset_source",
+                                                         "dataset_download_url",
+                                                         "local_dataset_dir",
+                                                         "dataset_cache_dir",
+                                                         "refresh_dataset",
+                                                         "train_file_name",
+                                                         "test_file_name",
                                                          "raw_data_dir",
                                                          "zip_download_dir",
                                                          "ingested_dir",
                                                          "ingested_train_dir",
                                                          "ingested_validation_dir",
-                                                         "ingested_test_dir"])
+                                                         "ingested_test_dir",
+                                                         "export_excel",
+                                                         "chunk_size",
+                                                         "incremental",
+                                                         "ingestion_state_dir",
+                                                         "schema_file_path"])
 
 DataValidationConfig = namedtuple("DataValidationConfig", ["schema_dir",
                                                            "schema_file_path",
                                                            "report_file_path",
-                                                           "report_page_file_path"])
+                                                           "report_page_file_path",
+                                                           "schema_report_file_path"])
 
 DataTransformationConfig = namedtuple("DataTransformationConfig", [# "generate_clean_date_cols",
                                                                    "transformed_dir",
                                                                    "transformed_train_dir",
                                                                    "transformed_validation_dir",
-                                                                   "preprocessed_object_file_path"])
+                                                                   "preprocessed_object_file_path",
+                                                                   "n_jobs",
+                                                                   "parallel_min_rows",
+                                                                   "cache_dir",
+                                                                   "chunk_size"])
 
 ModelTrainerConfig = namedtuple("ModelTrainerconfig", ["trained_model_file_path",
                                                        "model_config_file_path",
@@ -28,4 +44,10 @@ ModelEvaluationConfig = namedtuple("ModelEvaluationConfig", ["model_evaluation_f
 
 ModelPusherConfig = namedtuple("ModelPusherConfig", ["export_dir_path"])
 
-TrainingPipelineConfig = namedtuple("TrainingPipelineConfig", ["artifact_dir"])
+PredictionServiceConfig = namedtuple("PredictionServiceConfig", ["micro_batching",
+                                                                 "batch_window_ms",
+                                                                 "max_batch_size",
+                                                                 "prediction_timeout_seconds",
+                                                                 "model_load_mode"])
+
+TrainingPipelineConfig = namedtuple("TrainingPipelineConfig", ["artifact_dir", "artifact_store_max_mb"])
@@ -0,0 +1,228 @@
+import os
+import sys
+import json
+import shutil
+import hashlib
+
+from datetime import datetime
+from flight.logger import logging
+from flight.exception import FlightException
+from flight.utils.utils import get_file_checksum, link_or_copy_file, write_json_atomic
+from flight.constant import DATASET_SOURCE_KAGGLE, DATASET_SOURCE_LOCAL, DATASET_CACHE_OBJECTS_DIR_NAME, \
+    DATASET_CACHE_SOURCES_DIR_NAME
+
+
+def get_dataset_content_hash(dataset_dir: str) -> str:
+    """
+    :param dataset_dir: directory of dataset files
+    :return: sha256 of the relative path and checksum of every file: str
+    """
+    try:
+        content_hash = hashlib.sha256()
+        for dir_path, dir_names, file_names in os.walk(dataset_dir):
+            dir_names.sort()
+            for file_name in sorted(file_names):
+                file_path = os.path.join(dir_path, file_name)
+                content_hash.update(os.path.relpath(file_path, dataset_dir).encode())
+                content_hash.update(get_file_checksum(file_path).encode())
+        return content_hash.hexdigest()
+    except Exception as e:
+        raise FlightException(e, sys)
+
+
+class DatasetSource:
+    """
+    Where the raw dataset comes from. A source fetches the dataset files
+    into a directory, and may tell the content hash of the dataset without
+    fetching it, which lets DatasetCache detect changed datasets.
+    """
+
+    def __init__(self, location: str):
+        self.location = location
+
+    def get_source_id(self) -> str:
+        """
+        :return: location identifying the source in the cache: str
+        """
+        return self.location
+
+    def get_dataset_name(self) -> str:
+        """
+        :return: name of the dataset directory in raw_data_dir: str
+        """
+        raise NotImplementedError
+
+    def get_content_hash(self):
+        """
+        :return: content hash of the dataset, None when it is only known after fetching
+        """
+        return None
+
+    def fetch(self, download_dir: str) -> str:
+        """
+        :param download_dir: empty directory to fetch into
+        :return: directory holding the dataset files: str
+        """
+        raise NotImplementedError
+
+
+class KaggleDatasetSource(DatasetSource):
+    """
+    Kaggle dataset downloaded with opendatasets, which requires the kaggle
+    name and api key from the kaggle.json file of your kaggle account
+    settings, placed in the root dir of the project i.e: ./kaggle.json
+    """
+
+    def get_dataset_name(self) -> str:
+        # https://www.kaggle.com/datasets/<owner>/<dataset>/download
+        parts = [part for part in self.location.rstrip("/").split("/") if part != "download"]
+        return parts[-1]
+
+    def fetch(self, download_dir: str) -> str:
+        try:
+            # imported here so offline runs from a local source don't need it
+            import opendatasets
+            logging.info(f"Downloading dataset from [{self.location}] into: [{download_dir}]")
+            opendatasets.download(self.location, download_dir + "/")
+            return os.path.join(download_dir, os.listdir(download_dir)[0])
+        except Exception as e:
+            raise FlightException(e, sys)
+
+
+class LocalDatasetSource(DatasetSource):
+    """
+    Directory of dataset files, for offline runs and tests
+    """
+
+    def get_source_id(self) -> str:
+        return os.path.abspath(self.location)
+
+    def get_dataset_name(self) -> str:
+        return os.path.basename(os.path.abspath(self.location))
+
+    def get_content_hash(self) -> str:
+        return get_dataset_content_hash(self.location)
+
+    def fetch(self, download_dir: str) -> str:
+        try:
+            dataset_dir = os.path.join(download_dir, self.get_dataset_name())
+            # copied, not linked: later edits of the source must not reach the cached files
+            shutil.copytree(self.location, dataset_dir)
+            return dataset_dir
+        except Exception as e:
+            raise FlightException(e, sys)
+
+
+def get_dataset_source(source_type: str, location: str) -> DatasetSource:
+    """
+    :param source_type: kaggle or local
+    :param location: dataset url or directory
+    :return: DatasetSource
+    """
+    dataset_sources = {
+        DATASET_SOURCE_KAGGLE: KaggleDatasetSource,
+        DATASET_SOURCE_LOCAL: LocalDatasetSource,
+    }
+    if source_type not in dataset_sources:
+        raise FlightException(Exception(f"Unknown dataset source [{source_type}], "
+                                        f"expected one of {list(dataset_sources)}"), sys)
+    return dataset_sources[source_type](location)
+
+
+class DatasetCache:
+    """
+    Raw datasets kept across pipeline runs:
+        <cache_dir>/objects/<content hash>/   dataset files, never modified
+        <cache_dir>/sources/<sha256 of source id>.json   content hash last fetched from a source
+    A dataset is fetched again when its source reports a different content
+    hash, or when refresh is set for sources that can't tell it beforehand.
+    Runs get hard links to the cached files, not copies.
+    """
+
+    def __init__(self, cache_dir: str, refresh: bool=False):
+        try:
+            self.cache_dir = cache_dir
+            self.refresh = refresh
+            self.objects_dir = os.path.join(cache_dir, DATASET_CACHE_OBJECTS_DIR_NAME)
+            self.sources_dir = os.path.join(cache_dir, DATASET_CACHE_SOURCES_DIR_NAME)
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def get_source_entry_path(self, dataset_source: DatasetSource) -> str:
+        source_key = hashlib.sha256(dataset_source.get_source_id().encode()).hexdigest()
+        return os.path.join(self.sources_dir, f"{source_key}.json")
+
+    def get_cached_content_hash(self, dataset_source: DatasetSource):
+        """
+        :return: content hash of the cached dataset of the source, None on a cache miss
+        """
+        try:
+            source_entry_path = self.get_source_entry_path(dataset_source)
+            if not os.path.exists(source_entry_path):
+                return None
+            with open(source_entry_path) as source_entry_file:
+                content_hash = json.load(source_entry_file)["content_hash"]
+            if not os.path.isdir(os.path.join(self.objects_dir, content_hash)):
+                return None
+
+            source_content_hash = dataset_source.get_content_hash()
+            if source_content_hash is not None:
+                return content_hash if source_content_hash == content_hash else None
+            return None if self.refresh else content_hash
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def fetch(self, dataset_source: DatasetSource) -> str:
+        """
+        Fetches the dataset of the source into the cache
+        :return: content hash of the dataset: str
+        """
+        try:
+            download_dir = os.path.join(self.cache_dir, f"download.{os.getpid()}.tmp")
+            shutil.rmtree(download_dir, ignore_errors=True)
+            os.makedirs(download_dir)
+            try:
+                dataset_dir = dataset_source.fetch(download_dir=download_dir)
+                content_hash = get_dataset_content_hash(dataset_dir)
+                object_dir = os.path.join(self.objects_dir, content_hash)
+                if not os.path.isdir(object_dir):
+                    os.makedirs(self.objects_dir, exist_ok=True)
+                    try:
+                        os.rename(dataset_dir, object_dir)
+                    except OSError:
+                        # cached meanwhile by another run
+                        if not os.path.isdir(object_dir):
+                            raise
+            finally:
+                shutil.rmtree(download_dir, ignore_errors=True)
+
+            write_json_atomic(file_path=self.get_source_entry_path(dataset_source),
+                              data={"source": dataset_source.get_source_id(),
+                                    "content_hash": content_hash,
+                                    "fetched_at": datetime.now().isoformat()})
+            return content_hash
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def get_dataset(self, dataset_source: DatasetSource, raw_data_dir: str) -> str:
+        """
+        Links the dataset of the source into raw_data_dir, fetching it first
+        when it is not cached or has changed
+        :param dataset_source: DatasetSource
+        :param raw_data_dir: directory of the run the dataset directory is linked into
+        :return: name of the dataset directory in raw_data_dir: str
+        """
+        try:
+            content_hash = self.get_cached_content_hash(dataset_source)
+            if content_hash is None:
+                logging.info(f"Dataset cache miss for [{dataset_source.get_source_id()}]")
+                content_hash = self.fetch(dataset_source)
+            else:
+                logging.info(f"Dataset cache hit for [{dataset_source.get_source_id()}]: [{content_hash}]")
+
+            dataset_name = dataset_source.get_dataset_name()
+            link_or_copy_file(src=os.path.join(self.objects_dir, content_hash),
+                              dst=os.path.join(raw_data_dir, dataset_name))
+            return dataset_name
+        except Exception as e:
+            raise FlightException(e, sys)
@@ -0,0 +1,347 @@
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+from typing import List, Tuple
+from collections import namedtuple
+from sklearn.pipeline import Pipeline
+from sklearn.impute import SimpleImputer
+from flight.logger import logging
+from flight.exception import FlightException
+from sklearn.compose import ColumnTransformer
+from sklearn.preprocessing import StandardScaler, OrdinalEncoder
+from flight.component.data_transformation import CleanAddInfoCol, CleanDurationCol, DateTimeExtractor, \
+    DURATION_PATTERN, JOURNEY_DATE_PATTERN, JOURNEY_DATE_BOUNDS, CLOCK_TIME_PATTERN, CLOCK_TIME_BOUNDS, \
+    parse_duration_column
+
+
+DURATION_REGEX = re.compile(DURATION_PATTERN)
+JOURNEY_DATE_REGEX = re.compile(JOURNEY_DATE_PATTERN)
+CLOCK_TIME_REGEX = re.compile(CLOCK_TIME_PATTERN)
+
+# one group of output features produced by a sub pipeline of the ColumnTransformer
+FeatureGroup = namedtuple("FeatureGroup", ["columns",
+                                           "cleaning_step",
+                                           "fill_values",
+                                           "category_codes",
+                                           "means",
+                                           "scales",
+                                           "category_indexes",
+                                           "lookup_tables",
+                                           "scaled_fill_values"])
+
+
+def parse_duration_minutes(duration: str) -> float:
+    """
+    Converts a duration such as "2h 40m", "19h" or "5m" to minutes, like
+    parse_duration_column does for a whole column
+    :param duration: str
+    :return: minutes, NaN when missing or malformed: float
+    """
+    match = DURATION_REGEX.match(str(duration)) if not pd.isna(duration) else None
+    if match is None or match.group("hours") is None and match.group("minutes") is None:
+        return np.nan
+    return float(int(match.group("hours") or 0) * 60 + int(match.group("minutes") or 0))
+
+
+def parse_fields(value: str, regex, bounds: list) -> Tuple[float, ...]:
+    """
+    Extracts the integer fields of a single value the way
+    parse_column_fields does for a whole column
+    :return: fields, all NaN when missing or malformed: tuple
+    """
+    match = regex.match(str(value)) if not pd.isna(value) else None
+    if match is not None:
+        fields = tuple(int(field) for field in match.groups())
+        if all(lower_bound <= field <= upper_bound for field, (lower_bound, upper_bound) in zip(fields, bounds)):
+            return tuple(float(field) for field in fields)
+    return (np.nan,) * len(bounds)
+
+
+def parse_clock_time(clock_time: str) -> Tuple[float, float]:
+    """
+    Extracts hour and minute from "22:20" or "01:10 22 Mar"
+    :param clock_time: str
+    :return: hour and minute: tuple
+    """
+    return parse_fields(clock_time, CLOCK_TIME_REGEX, CLOCK_TIME_BOUNDS)
+
+
+def parse_journey_date(date_of_journey: str) -> Tuple[float, float]:
+    """
+    Extracts day and month from "24/03/2019"
+    :param date_of_journey: str
+    :return: day and month: tuple
+    """
+    return parse_fields(date_of_journey, JOURNEY_DATE_REGEX, JOURNEY_DATE_BOUNDS)
+
+
+class FastPreprocessor:
+    """
+    Compiled form of the fitted preprocessing ColumnTransformer. The fitted
+    imputer values, encoder categories and scaler statistics are read out of
+    the preprocessing object once and folded together:
+    - transform_record() turns a single flight record straight into its
+      feature vector without building a dataframe.
+    - transform() parses each distinct raw value of a batch once, then fills
+      one output buffer using precomputed category lookup tables of already
+      scaled codes and combined impute then scale constants, instead of
+      running the custom cleaning steps, imputer, encoder and scaler of
+      every sub pipeline.
+    """
+
+    def __init__(self, preprocessing_object: ColumnTransformer):
+        try:
+            self.feature_groups = [
+                FastPreprocessor.get_feature_group(pipeline=pipeline, columns=columns)
+                for _, pipeline, columns in preprocessing_object.transformers_
+                if not (isinstance(pipeline, str) and pipeline == "drop")
+            ]
+            self.n_features = sum(len(feature_group.scales) for feature_group in self.feature_groups)
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    @staticmethod
+    def extract_values(feature_group: FeatureGroup, record: dict) -> list:
+        """
+        Mirrors the custom cleaning step of a sub pipeline on a single record
+        :param feature_group: FeatureGroup
+        :param record: flight record, column name -> raw value: dict
+        :return: raw feature values of the group: list
+        """
+        step = feature_group.cleaning_step
+        if step is None:
+            return [record[column] for column in feature_group.columns]
+        if isinstance(step, CleanAddInfoCol):
+            value = record[step.add_info_col]
+            return [np.nan if pd.isna(value) else step.clean_value(value)]
+        if isinstance(step, CleanDurationCol):
+            return [parse_duration_minutes(record[step.duration_col])]
+        return [*parse_journey_date(record[step.date_of_journey]),
+                *parse_clock_time(record[step.dep_time]),
+                *parse_clock_time(record[step.arrival_time])]
+
+    @staticmethod
+    def extract_columns(feature_group: FeatureGroup, X: pd.DataFrame) -> List[np.ndarray]:
+        """
+        Vectorized counterpart of extract_values for a batch
+        :param feature_group: FeatureGroup
+        :param X: flight input dataframe
+        :return: raw feature columns of the group: List[np.ndarray]
+        """
+        step = feature_group.cleaning_step
+        if step is None:
+            return [X[column].to_numpy() for column in feature_group.columns]
+        if isinstance(step, CleanAddInfoCol):
+            return [step.clean_additional_info(X)]
+        if isinstance(step, CleanDurationCol):
+            return [parse_duration_column(X[step.duration_col])]
+        date_time_feats = step.extract_date_and_time(X)
+        return [date_time_feats[:, index] for index in range(date_time_feats.shape[1])]
+
+    @staticmethod
+    def get_feature_group(pipeline: Pipeline, columns: List[str]) -> FeatureGroup:
+        """
+        Reads the fitted statistics out of a sub pipeline made of an optional
+        custom cleaning step, a SimpleImputer, an optional OrdinalEncoder and
+        a StandardScaler.
+        """
+        if not isinstance(pipeline, Pipeline):
+            raise Exception(f"Unsupported preprocessing step: [{type(pipeline).__name__}]")
+        steps = [step for _, step in pipeline.steps]
+
+        cleaning_step = None
+        if not isinstance(steps[0], SimpleImputer):
+            cleaning_step = steps.pop(0)
+            if not isinstance(cleaning_step, (CleanAddInfoCol, CleanDurationCol, DateTimeExtractor)):
+                raise Exception(f"Unsupported preprocessing step: [{type(cleaning_step).__name__}]")
+
+        imputer = steps.pop(0)
+        encoder = steps.pop(0) if isinstance(steps[0], OrdinalEncoder) else None
+        scaler = steps.pop(0)
+        if not isinstance(imputer, SimpleImputer) or not isinstance(scaler, StandardScaler) or steps:
+            raise Exception(f"Unsupported preprocessing pipeline: [{pipeline}]")
+        if imputer.add_indicator or encoder is not None and encoder.handle_unknown != "error":
+            raise Exception(f"Unsupported preprocessing pipeline: [{pipeline}]")
+
+        fill_values = list(imputer.statistics_)
+        category_codes = [None] * len(fill_values)
+        if encoder is not None:
+            category_codes = [{category: float(code) for code, category in enumerate(categories)}
+                              for categories in encoder.categories_]
+        means = list(scaler.mean_) if scaler.with_mean else [None] * len(fill_values)
+        scales = list(scaler.scale_) if scaler.with_std else [None] * len(fill_values)
+
+        # batch lookup tables: position k holds the scaled value of category k,
+        # the last position holds the scaled imputation value for missing values
+        category_indexes = [None] * len(fill_values)
+        lookup_tables = [None] * len(fill_values)
+        scaled_fill_values = []
+        for index, (fill_value, mean, scale) in enumerate(zip(fill_values, means, scales)):
+            if category_codes[index] is not None:
+                categories = encoder.categories_[index]
+                category_indexes[index] = pd.Index(categories)
+                codes = [float(code) for code in range(len(categories))] + [category_codes[index][fill_value]]
+                lookup_tables[index] = np.array([FastPreprocessor.scale_value(code, mean, scale) for code in codes])
+                scaled_fill_values.append(lookup_tables[index][-1])
+            else:
+                scaled_fill_values.append(FastPreprocessor.scale_value(float(fill_value), mean, scale))
+
+        return FeatureGroup(columns=columns,
+                            cleaning_step=cleaning_step,
+                            fill_values=fill_values,
+                            category_codes=category_codes,
+                            means=means,
+                            scales=scales,
+                            category_indexes=category_indexes,
+                            lookup_tables=lookup_tables,
+                            scaled_fill_values=scaled_fill_values)
+
+    @staticmethod
+    def scale_value(value: float, mean: float, scale: float) -> float:
+        """Applies StandardScaler.transform to a single value"""
+        if mean is not None:
+            value -= mean
+        if scale is not None:
+            value /= scale
+        return value
+
+    def transform_record(self, record: dict) -> np.ndarray:
+        """
+        Transforms one flight record (column name -> raw value) the same way
+        preprocessing_object.transform transforms a one row dataframe
+        :param record: dict
+        :return: feature vector of shape (1, n_features): np.ndarray
+        """
+        try:
+            features = np.empty((1, self.n_features), dtype=np.float64)
+            index = 0
+            for feature_group in self.feature_groups:
+                values = FastPreprocessor.extract_values(feature_group=feature_group, record=record)
+                for value, fill_value, category_codes, mean, scale in zip(values,
+                                                                           feature_group.fill_values,
+                                                                           feature_group.category_codes,
+                                                                           feature_group.means,
+                                                                           feature_group.scales):
+                    # only NaN is missing, as for SimpleImputer: None is an unknown category
+                    if value != value:
+                        value = fill_value
+                    if category_codes is not None:
+                        if value not in category_codes:
+                            raise ValueError(f"Found unknown category [{value}] during transform")
+                        value = category_codes[value]
+                    features[0, index] = FastPreprocessor.scale_value(float(value), mean, scale)
+                    index += 1
+            return features
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def transform(self, X: pd.DataFrame) -> np.ndarray:
+        """
+        Transforms a batch of flight records the same way
+        preprocessing_object.transform does
+        :param X: flight input dataframe
+        :return: feature array of shape (len(X), n_features): np.ndarray
+        """
+        try:
+            features = np.empty((len(X), self.n_features), dtype=np.float64)
+            index = 0
+            for feature_group in self.feature_groups:
+                columns = FastPreprocessor.extract_columns(feature_group=feature_group, X=X)
+                for column_index, values in enumerate(columns):
+                    FastPreprocessor.transform_column(values=values,
+                                                      feature_group=feature_group,
+                                                      column_index=column_index,
+                                                      out=features[:, index])
+                    index += 1
+            return features
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    @staticmethod
+    def transform_column(values: np.ndarray,
+                         feature_group: FeatureGroup,
+                         column_index: int,
+                         out: np.ndarray) -> None:
+        """
+        Imputes, encodes and scales one raw feature column into out
+        """
+        category_index = feature_group.category_indexes[column_index]
+        if category_index is not None:
+            missing = values != values
+            codes = category_index.get_indexer(values)
+            unknown = (codes < 0) & ~missing
+            if unknown.any():
+                raise ValueError(f"Found unknown categories {list(pd.unique(values[unknown]))} during transform")
+            codes[missing] = len(category_index)
+            np.take(feature_group.lookup_tables[column_index], codes, out=out)
+            return
+
+        mean = feature_group.means[column_index]
+        scale = feature_group.scales[column_index]
+        out[:] = values
+        missing = np.isnan(out)
+        if mean is not None:
+            out -= mean
+        if scale is not None:
+            out /= scale
+        out[missing] = feature_group.scaled_fill_values[column_index]
+
+    def get_probe_record(self) -> dict:
+        """
+        Builds a valid flight record out of the fitted imputer values, used to
+        compare this fast path against the preprocessing object
+        :return: dict
+        """
+        try:
+            record = dict()
+            for feature_group in self.feature_groups:
+                step, fill_values = feature_group.cleaning_step, feature_group.fill_values
+                if isinstance(step, CleanDurationCol):
+                    minutes = int(round(fill_values[0]))
+                    record[step.duration_col] = f"{minutes // 60}h {minutes % 60}m"
+                elif isinstance(step, DateTimeExtractor):
+                    day, month, dep_hour, dep_min, arrival_hour, arrival_min = map(int, fill_values)
+                    record[step.date_of_journey] = f"{day:02d}/{month:02d}/2019"
+                    record[step.dep_time] = f"{dep_hour:02d}:{dep_min:02d}"
+                    record[step.arrival_time] = f"{arrival_hour:02d}:{arrival_min:02d}"
+                else:
+                    record.update(zip(feature_group.columns, fill_values))
+            return record
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def is_consistent_with(self, preprocessing_object: ColumnTransformer, record: dict=None) -> bool:
+        """
+        Parity check: transforms a record with this fast path and with the
+        preprocessing object and compares the feature vectors
+        :param preprocessing_object: fitted ColumnTransformer
+        :param record: flight record, defaults to get_probe_record()
+        :return: bool
+        """
+        try:
+            record = self.get_probe_record() if record is None else record
+            probe_df = pd.DataFrame({column: [value] for column, value in record.items()})
+            expected = preprocessing_object.transform(probe_df)
+            return np.array_equal(self.transform_record(record), expected) and \
+                np.array_equal(self.transform(probe_df), expected)
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    @staticmethod
+    def compile(preprocessing_object: ColumnTransformer):
+        """
+        Compiles a fitted preprocessing object and checks the result against it
+        :param preprocessing_object: fitted ColumnTransformer
+        :return: FastPreprocessor, None when it cannot reproduce the preprocessing object
+        """
+        try:
+            fast_preprocessor = FastPreprocessor(preprocessing_object=preprocessing_object)
+            if fast_preprocessor.is_consistent_with(preprocessing_object=preprocessing_object):
+                return fast_preprocessor
+            logging.info("Fast preprocessor output differs from preprocessing object, not using it")
+        except Exception as e:
+            logging.info(f"Preprocessing object cannot be compiled: {e}")
+        return None
@@ -1,9 +1,40 @@
 import os
 import sys
+import threading
 
+import numpy as np
 import pandas as pd
+from typing import List
+from collections import namedtuple
+from flight.logger import logging
 from flight.exception import FlightException
 from flight.utils.utils import load_object
+from flight.entity.model_registry import ModelRegistry
+from flight.metrics import prediction_stage_seconds, prediction_batch_size, \
+    model_cache_hits, model_cache_reloads
+from flight.entity.shared_model import load_shared_model
+from flight.constant import SHARED_MODEL_DIR_NAME, MODEL_LOAD_MODE_PICKLE, MODEL_LOAD_MODE_MMAP
+from flight.entity.fast_preprocessor import FastPreprocessor
+from flight.component.data_transformation import run_preprocessing
+
+
+# request field name of each flight input mapped to its dataset column name
+FLIGHT_DATA_COLUMNS = {
+    "airline": "Airline",
+    "date_of_journey": "Date_of_Journey",
+    "source": "Source",
+    "destination": "Destination",
+    "duration": "Duration",
+    "total_stops": "Total_Stops",
+    "additional_info": "Additional_Info",
+    "arrival_time": "Arrival_Time",
+    "dep_time": "Dep_Time",
+}
+
+CachedModel = namedtuple("CachedModel", ["model_path",
+                                         "model_dir_mtime",
+                                         "model",
+                                         "fast_preprocessor"])
 
 
 class FlightData:
@@ -55,30 +86,259 @@ class FlightData:
         except Exception as e:
             raise FlightException(e, sys)
 
+    def get_flight_data_as_record(self) -> dict:
+        """
+        :return: flight data as column name -> value, without wrapping
+        values in lists or building a dataframe: dict
+        """
+        try:
+            return {column_name: getattr(self, field_name)
+                    for field_name, column_name in FLIGHT_DATA_COLUMNS.items()}
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    @staticmethod
+    def validate_flight_records(flight_records: list) -> List[str]:
+        """
+        Checks that every flight record is a dict holding a non empty string
+        for each field in FLIGHT_DATA_COLUMNS
+        :param flight_records: list of flight records: list
+        :return: error messages, empty when all records are valid: List[str]
+        """
+        try:
+            errors = []
+            for index, flight_record in enumerate(flight_records):
+                if not isinstance(flight_record, dict):
+                    errors.append(f"Record [{index}] is not a JSON object")
+                    continue
+                for field_name in FLIGHT_DATA_COLUMNS:
+                    value = flight_record.get(field_name)
+                    if not isinstance(value, str) or not value.strip():
+                        errors.append(f"Record [{index}] field [{field_name}] must be a non empty string")
+            return errors
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    @staticmethod
+    def get_flight_batch_data_frame(flight_records: List[dict]) -> pd.DataFrame:
+        """
+        Builds one dataframe holding all flight records, in input order,
+        so the whole batch goes through a single transform and predict call
+        :param flight_records: validated flight records: List[dict]
+        :return: pd.DataFrame
+        """
+        try:
+            flight_input_dict = {
+                column_name: [flight_record[field_name] for flight_record in flight_records]
+                for field_name, column_name in FLIGHT_DATA_COLUMNS.items()
+            }
+            return pd.DataFrame(flight_input_dict)
+        except Exception as e:
+            raise FlightException(e, sys)
+
 
 class FlightPredictor:
+    # process wide cache of loaded models shared by every FlightPredictor,
+    # keyed by model_dir so each request does not unpickle the model again
+    model_cache = dict()
+    model_cache_lock = threading.Lock()
 
-    def __init__(self, model_dir):
+    def __init__(self, model_dir, model_load_mode: str=MODEL_LOAD_MODE_PICKLE):
         try:
             self.model_dir = model_dir
+            self.model_load_mode = model_load_mode
+            self.model_registry = ModelRegistry(model_dir=model_dir)
         except Exception as e:
             raise FlightException(e, sys)
 
     def get_latest_model_path(self):
+        """
+        Resolves the current model from the registry manifest. Model
+        directories exported before the registry existed are scanned instead.
+        :return: file path of the current model: str
+        """
         try:
-            folder_name = list(map(int, os.listdir(self.model_dir)))
+            if self.model_registry.is_available():
+                return self.model_registry.get_current_model_path()
+
+            folder_name = list(map(int, filter(str.isdigit, os.listdir(self.model_dir))))
             latest_model_dir = os.path.join(self.model_dir, f"{max(folder_name)}")
-            file_name = os.listdir(latest_model_dir)[0]
+            file_name = sorted(os.listdir(latest_model_dir))[0]
             latest_model_path = os.path.join(latest_model_dir, file_name)
             return latest_model_path
         except Exception as e:
             raise FlightException(e, sys)
 
+    def get_model_dir_mtime(self) -> int:
+        """
+        Registering a model rewrites the manifest through a rename inside
+        model_dir, and a legacy export creates a new folder in it, both of
+        which update the mtime of model_dir itself. Comparing it with the
+        cached value is a single stat call, so no directory listing is
+        needed per request.
+        :return: mtime of model_dir in nanoseconds: int
+        """
+        try:
+            return os.stat(self.model_dir).st_mtime_ns
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def load_model(self, model_path: str):
+        """
+        In mmap load mode the shared model exported next to the model file
+        is loaded, so its node arrays are memory mapped instead of copied
+        into this process. Models without a shared model are unpickled.
+        :param model_path: exported model file
+        :return: FlightEstimatorModel
+        """
+        try:
+            if self.model_load_mode == MODEL_LOAD_MODE_MMAP:
+                shared_model_dir = os.path.join(os.path.dirname(model_path), SHARED_MODEL_DIR_NAME)
+                if os.path.isdir(shared_model_dir):
+                    return load_shared_model(shared_model_dir=shared_model_dir)
+                logging.info(f"No shared model in [{os.path.dirname(model_path)}], unpickling the model")
+            return load_object(file_path=model_path)
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def load_latest_model(self, model_dir_mtime: int) -> CachedModel:
+        """
+        Loads the newest exported model and swaps it into the cache.
+        The cache entry is replaced in a single assignment, so requests
+        already holding the previous model keep using it undisturbed.
+        :param model_dir_mtime: mtime of model_dir observed before loading
+        :return: CachedModel
+        """
+        try:
+            cached_model = FlightPredictor.model_cache.get(self.model_dir)
+            latest_model_path = self.get_latest_model_path()
+
+            if cached_model is not None and cached_model.model_path == latest_model_path:
+                model = cached_model.model
+                fast_preprocessor = cached_model.fast_preprocessor
+            else:
+                logging.info(f"Loading model: [{latest_model_path}]")
+                model = self.load_model(model_path=latest_model_path)
+                model_cache_reloads.inc()
+                fast_preprocessor = FlightPredictor.get_fast_preprocessor(model=model)
+
+            cached_model = CachedModel(model_path=latest_model_path,
+                                       model_dir_mtime=model_dir_mtime,
+                                       model=model,
+                                       fast_preprocessor=fast_preprocessor)
+            FlightPredictor.model_cache[self.model_dir] = cached_model
+            return cached_model
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    @staticmethod
+    def get_fast_preprocessor(model) -> FastPreprocessor:
+        """
+        Models trained before the preprocessing object was compiled at
+        training time get it compiled when they are loaded
+        :param model: FlightEstimatorModel
+        :return: FastPreprocessor, None when the fast path cannot be used
+        """
+        try:
+            fast_preprocessor = getattr(model, "fast_preprocessor", None)
+            if fast_preprocessor is None:
+                fast_preprocessor = FastPreprocessor.compile(preprocessing_object=model.preprocessing_object)
+            return fast_preprocessor
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def get_latest_cached_model(self) -> CachedModel:
+        """
+        Returns the newest exported model from the process wide cache.
+        The model is only unpickled again when model_dir has changed since
+        it was loaded. While one request reloads, other requests keep being
+        served with the cached model instead of waiting for the reload.
+        :return: CachedModel
+        """
+        try:
+            model_dir_mtime = self.get_model_dir_mtime()
+            cached_model = FlightPredictor.model_cache.get(self.model_dir)
+            if cached_model is not None and cached_model.model_dir_mtime == model_dir_mtime:
+                model_cache_hits.inc()
+                return cached_model
+
+            # only wait for the lock when there is no model to serve yet
+            if not FlightPredictor.model_cache_lock.acquire(blocking=cached_model is None):
+                model_cache_hits.inc()
+                return cached_model
+            try:
+                cached_model = FlightPredictor.model_cache.get(self.model_dir)
+                if cached_model is not None and cached_model.model_dir_mtime == model_dir_mtime:
+                    return cached_model
+                try:
+                    return self.load_latest_model(model_dir_mtime=model_dir_mtime)
+                except Exception as e:
+                    # a model export may still be in progress, keep serving the
+                    # cached model and retry on the next request
+                    if cached_model is None:
+                        raise e
+                    logging.info(f"Model reload failed, serving cached model: [{cached_model.model_path}]: {e}")
+                    return cached_model
+            finally:
+                FlightPredictor.model_cache_lock.release()
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def get_latest_model(self):
+        """
+        :return: newest exported FlightEstimatorModel
+        """
+        try:
+            return self.get_latest_cached_model().model
+        except Exception as e:
+            raise FlightException(e, sys)
+
     def predict(self, X):
         try:
-            model_path = self.get_latest_model_path()
-            model = load_object(file_path=model_path)
-            price = model.predict(X)
+            cached_model = self.get_latest_cached_model()
+            prediction_batch_size.observe(len(X))
+            with prediction_stage_seconds.time(stage="transform"):
+                if cached_model.fast_preprocessor is None:
+                    features = run_preprocessing(cached_model.model.preprocessing_object, X)
+                else:
+                    features = cached_model.fast_preprocessor.transform(X)
+            with prediction_stage_seconds.time(stage="predict"):
+                price = cached_model.model.trained_model_object.predict(features)
             return price
         except Exception as e:
-            raise FlightException(e, sys)
\ No newline at end of file
+            raise FlightException(e, sys)
+
+    def predict_flight_data(self, flight_data: FlightData):
+        """
+        Predicts the price of a single flight
+        :param flight_data: FlightData
+        :return: predicted price
+        """
+        try:
+            return self.predict_records(flight_records=[flight_data.get_flight_data_as_record()])
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def predict_records(self, flight_records: List[dict]):
+        """
+        Predicts the prices of flight records (column name -> value). When
+        the model has a fast preprocessing path each record is turned into
+        its feature vector directly, otherwise they go through a dataframe
+        and the preprocessing object.
+        :param flight_records: List[dict]
+        :return: predicted prices, in input order
+        """
+        try:
+            cached_model = self.get_latest_cached_model()
+            prediction_batch_size.observe(len(flight_records))
+            with prediction_stage_seconds.time(stage="transform"):
+                if cached_model.fast_preprocessor is None:
+                    features = run_preprocessing(cached_model.model.preprocessing_object,
+                                                 pd.DataFrame(flight_records))
+                else:
+                    features = np.vstack([cached_model.fast_preprocessor.transform_record(flight_record)
+                                          for flight_record in flight_records])
+            with prediction_stage_seconds.time(stage="predict"):
+                return cached_model.model.trained_model_object.predict(features)
+        except Exception as e:
+            raise FlightException(e, sys)
@@ -0,0 +1,224 @@
+import os
+import sys
+import json
+import shutil
+
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from pandas.api.types import is_numeric_dtype
+from flight.logger import logging
+from flight.exception import FlightException
+from typing import List
+from flight.utils.utils import save_object, load_object, write_json_atomic, link_or_copy_file
+from flight.constant import INGESTION_STATE_FILE_NAME, INGESTION_ROW_INDEX_FILE_NAME, INGESTION_SAMPLER_FILE_NAME, \
+    INGESTION_PARTS_DIR_NAME
+
+
+# column types of config/schema.yaml whose values are hashed as numbers
+NUMERIC_COLUMN_TYPES = ("int", "float")
+
+
+def get_row_hashes(dataframe: pd.DataFrame, column_types: dict=None) -> np.ndarray:
+    """
+    :param dataframe: rows of a raw file
+    :param column_types: column name -> type of config/schema.yaml
+    :return: uint64 hash of the values of each row: np.ndarray
+    """
+    try:
+        # numbers are hashed as float64 and everything else as text, so a row keeps its
+        # hash when a column changes type between files or chunks, e.g. int prices gaining
+        # a missing one, or a chunk missing every price read as text. Columns of the schema
+        # are numbers by their schema type, other ones by the type of their values.
+        column_types = column_types or dict()
+        columns = dict()
+        for column in sorted(dataframe.columns):
+            values = dataframe[column]
+            if column_types.get(column) in NUMERIC_COLUMN_TYPES and not is_numeric_dtype(values):
+                try:
+                    values = pd.to_numeric(values)
+                except (ValueError, TypeError):
+                    # values the schema validation rejects later, hashed as text
+                    pass
+            is_numeric = is_numeric_dtype(values) and (column not in column_types
+                                                       or column_types[column] in NUMERIC_COLUMN_TYPES)
+            columns[column] = values.astype("float64") if is_numeric else values.astype(str)
+        return pd.util.hash_pandas_object(pd.DataFrame(columns), index=False).to_numpy()
+    except Exception as e:
+        raise FlightException(e, sys)
+
+
+class RowIndex:
+    """
+    Multiset of row hashes: the sorted distinct hashes and how many times
+    each occurs, so duplicated rows of a raw file are all counted.
+    """
+
+    def __init__(self, hashes: np.ndarray=None, counts: np.ndarray=None):
+        self.hashes = np.zeros(0, dtype=np.uint64) if hashes is None else hashes
+        self.counts = np.zeros(0, dtype=np.int64) if counts is None else counts
+
+    def __len__(self) -> int:
+        return int(self.counts.sum())
+
+    def get_counts(self, hashes: np.ndarray) -> np.ndarray:
+        """
+        :param hashes: row hashes
+        :return: occurrences of each hash in the index: np.ndarray
+        """
+        if len(self.hashes) == 0:
+            return np.zeros(len(hashes), dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self.hashes, hashes), len(self.hashes) - 1)
+        return np.where(self.hashes[positions] == hashes, self.counts[positions], 0)
+
+    def add(self, hashes: np.ndarray) -> None:
+        all_hashes = np.concatenate([self.hashes, hashes])
+        all_counts = np.concatenate([self.counts, np.ones(len(hashes), dtype=np.int64)])
+        self.hashes, inverse = np.unique(all_hashes, return_inverse=True)
+        self.counts = np.bincount(inverse, weights=all_counts).astype(np.int64)
+
+    def get_new_rows(self, hashes: np.ndarray, seen: "RowIndex") -> np.ndarray:
+        """
+        A row is new when its hash occurs more times in the raw file than in
+        the index, its first occurrences being the ones already ingested
+        :param hashes: row hashes of a chunk of the raw file
+        :param seen: hashes of the previous chunks of the raw file
+        :return: True for the new rows of the chunk: np.ndarray
+        """
+        occurrence = seen.get_counts(hashes) + pd.Series(hashes).groupby(hashes).cumcount().to_numpy()
+        return occurrence >= self.get_counts(hashes)
+
+    def save(self, file_path: str) -> None:
+        np.savez(file_path, hashes=self.hashes, counts=self.counts)
+
+    @classmethod
+    def load(cls, file_path: str) -> "RowIndex":
+        with np.load(file_path) as row_index_file:
+            return cls(hashes=row_index_file["hashes"], counts=row_index_file["counts"])
+
+
+class IngestionState:
+    """
+    Rows ingested by the previous incremental runs, kept across runs:
+        <state_dir>/parts/<split>/part-<version>.parquet   rows a run added to a split, never modified
+        <state_dir>/<version>/row_index.npz   RowIndex of every ingested row
+        <state_dir>/<version>/sampler.pkl     sampler assigning the next rows to a split
+        <state_dir>/state.json                current version, part files of each split and
+                                              checksum of the last raw file
+    A split is the concatenation of its part files, so a run writes its new
+    rows only. It writes a new version and then switches state.json to it,
+    so an interrupted run leaves the previous state untouched.
+    """
+
+    def __init__(self, state_dir: str):
+        try:
+            self.state_dir = state_dir
+            self.state_file_path = os.path.join(state_dir, INGESTION_STATE_FILE_NAME)
+            self.state = None
+            if os.path.exists(self.state_file_path):
+                with open(self.state_file_path) as state_file:
+                    self.state = json.load(state_file)
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def is_empty(self) -> bool:
+        return self.state is None
+
+    def get_version_dir(self, version: str=None) -> str:
+        """
+        :param version: None for the current version
+        :return: directory of the version: str
+        """
+        return os.path.join(self.state_dir, version or self.state["version"])
+
+    def get_file_path(self, file_name: str) -> str:
+        return os.path.join(self.get_version_dir(), file_name)
+
+    def get_row_index(self) -> RowIndex:
+        if self.is_empty():
+            return RowIndex()
+        return RowIndex.load(self.get_file_path(INGESTION_ROW_INDEX_FILE_NAME))
+
+    def get_sampler(self):
+        if self.is_empty():
+            return None
+        return load_object(self.get_file_path(INGESTION_SAMPLER_FILE_NAME))
+
+    def get_part_dir(self, split_file_name: str) -> str:
+        return os.path.join(self.state_dir, INGESTION_PARTS_DIR_NAME, os.path.splitext(split_file_name)[0])
+
+    def get_part_file_path(self, split_file_name: str, version_dir: str) -> str:
+        """
+        :param split_file_name: file name of the train or validation split
+        :param version_dir: directory returned by new_version
+        :return: part file holding the rows the version adds to the split: str
+        """
+        return os.path.join(self.get_part_dir(split_file_name), f"part-{os.path.basename(version_dir)}.parquet")
+
+    def get_part_file_paths(self, split_file_name: str) -> List[str]:
+        """
+        :return: part files of a split in the current version, in ingestion order: List[str]
+        """
+        if self.is_empty():
+            return []
+        return [os.path.join(self.get_part_dir(split_file_name), part_file_name)
+                for part_file_name in self.state["parts"][split_file_name]]
+
+    def link_split(self, split_file_name: str, dataset_dir: str) -> None:
+        """
+        Links the part files of a split into dataset_dir, a parquet dataset
+        directory, without copying any row
+        """
+        try:
+            if os.path.isdir(dataset_dir):
+                shutil.rmtree(dataset_dir)
+            elif os.path.exists(dataset_dir):
+                os.remove(dataset_dir)
+            os.makedirs(dataset_dir)
+            for part_file_path in self.get_part_file_paths(split_file_name):
+                link_or_copy_file(src=part_file_path, dst=os.path.join(dataset_dir, os.path.basename(part_file_path)))
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def new_version(self) -> str:
+        """
+        :return: directory to write the files of the next version into: str
+        """
+        try:
+            version = datetime.now().strftime("%Y-%m-%d-%H-%M-%S-%f")
+            version_dir = self.get_version_dir(version)
+            os.makedirs(version_dir)
+            return version_dir
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def commit(self, version_dir: str, row_index: RowIndex, sampler, state: dict) -> None:
+        """
+        Makes version_dir the current version and removes the previous ones,
+        and the part files of interrupted runs. Files linked into earlier runs
+        stay available to them.
+        :param version_dir: directory returned by new_version
+        :param row_index: RowIndex of every ingested row
+        :param sampler: sampler to assign the rows of the next run
+        :param state: part file names of each split, checksum of the raw file, number of rows, ...
+        """
+        try:
+            row_index.save(os.path.join(version_dir, INGESTION_ROW_INDEX_FILE_NAME))
+            save_object(file_path=os.path.join(version_dir, INGESTION_SAMPLER_FILE_NAME), obj=sampler)
+            state = dict(state, version=os.path.basename(version_dir), updated_at=datetime.now().isoformat())
+            write_json_atomic(file_path=self.state_file_path, data=state)
+            self.state = state
+
+            for version in os.listdir(self.state_dir):
+                version_path = os.path.join(self.state_dir, version)
+                if os.path.isdir(version_path) and version not in (state["version"], INGESTION_PARTS_DIR_NAME):
+                    shutil.rmtree(version_path, ignore_errors=True)
+            for split_file_name, part_file_names in state["parts"].items():
+                part_dir = self.get_part_dir(split_file_name)
+                if not os.path.isdir(part_dir):
+                    continue
+                for part_file_name in set(os.listdir(part_dir)) - set(part_file_names):
+                    os.remove(os.path.join(part_dir, part_file_name))
+            logging.info(f"Ingestion state version [{state['version']}]: [{len(row_index)}] rows ingested")
+        except Exception as e:
+            raise FlightException(e, sys)
@@ -0,0 +1,192 @@
+import os
+import sys
+import time
+import queue
+import threading
+
+import pandas as pd
+from typing import List
+from collections import namedtuple
+from concurrent.futures import Future, TimeoutError
+from flight.logger import logging
+from flight.exception import FlightException
+from flight.metrics import micro_batch_queue_wait_seconds, micro_batch_timeouts
+from flight.entity.flight_predictor import FlightPredictor, FlightData
+
+
+# rows to predict: a dataframe, or a single flight record (column name -> value)
+# which takes the record fast path when the whole batch is made of records
+PendingPrediction = namedtuple("PendingPrediction", ["flight_df",
+                                                     "flight_record",
+                                                     "future",
+                                                     "enqueue_time"])
+
+
+def get_n_rows(pending_prediction: PendingPrediction) -> int:
+    if pending_prediction.flight_df is None:
+        return 1
+    return len(pending_prediction.flight_df)
+
+
+class MicroBatchPredictor:
+    """
+    Coalesces prediction requests that arrive within batch_window_ms of each
+    other, up to max_batch_size rows, into a single transform and predict
+    call. sklearn has a large fixed cost per call compared to the cost per
+    row, so predicting many small requests together raises throughput.
+    Each caller gets back only the prices of its own rows, or fails after
+    waiting prediction_timeout_seconds for them.
+    """
+
+    def __init__(self,
+                 flight_predictor: FlightPredictor,
+                 batch_window_ms: float=5,
+                 max_batch_size: int=64,
+                 prediction_timeout_seconds: float=10):
+        try:
+            self.flight_predictor = flight_predictor
+            self.batch_window = batch_window_ms / 1000
+            self.max_batch_size = max_batch_size
+            self.prediction_timeout = prediction_timeout_seconds
+
+            self.pending_predictions = queue.Queue()
+            self.worker = None
+            self.worker_pid = None
+            self.worker_lock = threading.Lock()
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def start_worker(self) -> None:
+        """
+        Starts the batching thread on first use. Threads do not survive a
+        fork, so a new one is started when running in a forked worker process,
+        or when the thread died.
+        """
+        try:
+            with self.worker_lock:
+                if self.worker is not None and self.worker_pid == os.getpid() and self.worker.is_alive():
+                    return
+                self.pending_predictions = queue.Queue()
+                self.worker_pid = os.getpid()
+                self.worker = threading.Thread(target=self.run, daemon=True, name="micro_batch_predictor")
+                self.worker.start()
+                logging.info(f"Micro batch predictor started: window [{self.batch_window}s], "
+                             f"max batch size [{self.max_batch_size}]")
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def get_prediction(self, flight_df: pd.DataFrame=None, flight_record: dict=None):
+        """
+        Queues rows for the next batch and waits for their prices
+        :param flight_df: flight input dataframe
+        :param flight_record: single flight record, when flight_df is None
+        :return: predicted prices of the rows
+        """
+        if self.worker is None or self.worker_pid != os.getpid() or not self.worker.is_alive():
+            self.start_worker()
+        future = Future()
+        self.pending_predictions.put(PendingPrediction(flight_df=flight_df,
+                                                       flight_record=flight_record,
+                                                       future=future,
+                                                       enqueue_time=time.monotonic()))
+        try:
+            return future.result(timeout=self.prediction_timeout)
+        except TimeoutError:
+            # a batch already running still completes it, the result is dropped
+            future.cancel()
+            micro_batch_timeouts.inc()
+            raise Exception(f"Prediction not completed within [{self.prediction_timeout}] seconds")
+
+    def predict(self, X: pd.DataFrame):
+        """
+        :param X: flight input dataframe
+        :return: predicted prices of the rows in X
+        """
+        try:
+            return self.get_prediction(flight_df=X)
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def predict_flight_data(self, flight_data: FlightData):
+        """
+        :param flight_data: FlightData
+        :return: predicted price of a single flight
+        """
+        try:
+            return self.get_prediction(flight_record=flight_data.get_flight_data_as_record())
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def collect_batch(self) -> List[PendingPrediction]:
+        """
+        Blocks for the first pending prediction, then keeps collecting until
+        the batch window closes or max_batch_size rows have been collected
+        :return: List[PendingPrediction]
+        """
+        pending_prediction = self.pending_predictions.get()
+        batch = [pending_prediction]
+        batch_size = get_n_rows(pending_prediction)
+        deadline = time.monotonic() + self.batch_window
+
+        while batch_size < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                pending_prediction = self.pending_predictions.get(timeout=timeout)
+            except queue.Empty:
+                break
+            batch.append(pending_prediction)
+            batch_size += get_n_rows(pending_prediction)
+        return batch
+
+    def start_batch(self, batch: List[PendingPrediction]) -> List[PendingPrediction]:
+        """
+        Records the queue wait of each pending prediction and drops the ones
+        whose caller timed out
+        :return: pending predictions still awaited: List[PendingPrediction]
+        """
+        now = time.monotonic()
+        for pending_prediction in batch:
+            micro_batch_queue_wait_seconds.observe(now - pending_prediction.enqueue_time)
+        return [pending_prediction for pending_prediction in batch
+                if pending_prediction.future.set_running_or_notify_cancel()]
+
+    def predict_batch(self, batch: List[PendingPrediction]) -> None:
+        """
+        Predicts all pending predictions of a batch with a single call and
+        hands each caller the slice of prices belonging to its rows
+        :param batch: List[PendingPrediction]
+        """
+        try:
+            if all(pending_prediction.flight_df is None for pending_prediction in batch):
+                prices = self.flight_predictor.predict_records(
+                    flight_records=[pending_prediction.flight_record for pending_prediction in batch]
+                )
+            else:
+                flight_df = pd.concat([pending_prediction.flight_df if pending_prediction.flight_df is not None
+                                       else pd.DataFrame([pending_prediction.flight_record])
+                                       for pending_prediction in batch],
+                                      ignore_index=True)
+                prices = self.flight_predictor.predict(X=flight_df)
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0].future.set_exception(e)
+                return
+            # one invalid request must not fail the others, so predict them one by one
+            logging.info(f"Batch prediction of [{len(batch)}] requests failed, predicting separately: {e}")
+            for pending_prediction in batch:
+                self.predict_batch([pending_prediction])
+            return
+
+        offset = 0
+        for pending_prediction in batch:
+            batch_size = get_n_rows(pending_prediction)
+            pending_prediction.future.set_result(prices[offset:offset + batch_size])
+            offset += batch_size
+
+    def run(self) -> None:
+        while True:
+            batch = self.start_batch(self.collect_batch())
+            if batch:
+                self.predict_batch(batch)
@@ -0,0 +1,116 @@
+import os
+import sys
+import json
+
+from datetime import datetime
+from flight.logger import logging
+from flight.exception import FlightException
+from flight.utils.utils import get_file_checksum, write_json_atomic
+from flight.constant import MODEL_REGISTRY_FILE_NAME, MODEL_REGISTRY_CURRENT_KEY, MODEL_REGISTRY_MODELS_KEY
+
+
+class ModelRegistry:
+    """
+    Index of the models exported to model_dir, kept in a single manifest file:
+    {
+        "current": "20220805072026",
+        "models": {
+            "20220805072026": {"version": ..., "path": ..., "size": ..., "checksum": ...,
+                               "metrics": {...}, "promoted": true, "registered_at": ...}
+        }
+    }
+    The manifest is rewritten atomically, so the current model can be
+    resolved by reading one file instead of scanning model_dir.
+    """
+
+    def __init__(self, model_dir: str):
+        try:
+            self.model_dir = model_dir
+            self.manifest_file_path = os.path.join(model_dir, MODEL_REGISTRY_FILE_NAME)
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def is_available(self) -> bool:
+        return os.path.exists(self.manifest_file_path)
+
+    def get_manifest_mtime(self) -> int:
+        """
+        :return: mtime of the manifest in nanoseconds, changes on every registration: int
+        """
+        try:
+            return os.stat(self.manifest_file_path).st_mtime_ns
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def read_manifest(self) -> dict:
+        try:
+            if not self.is_available():
+                return {MODEL_REGISTRY_CURRENT_KEY: None, MODEL_REGISTRY_MODELS_KEY: dict()}
+            with open(self.manifest_file_path) as manifest_file:
+                return json.load(manifest_file)
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def register_model(self,
+                       version: str,
+                       model_file_path: str,
+                       metrics: dict=None,
+                       promoted: bool=True) -> dict:
+        """
+        Records an exported model in the manifest
+        :param version: version of the model, the name of its export folder: str
+        :param model_file_path: exported model file inside model_dir: str
+        :param metrics: training metrics of the model: dict
+        :param promoted: whether the model becomes the current model: bool
+        :return: manifest entry of the model: dict
+        """
+        try:
+            manifest = self.read_manifest()
+            model_entry = {
+                "version": version,
+                "path": os.path.relpath(model_file_path, self.model_dir),
+                "size": os.path.getsize(model_file_path),
+                "checksum": get_file_checksum(model_file_path),
+                "metrics": metrics or dict(),
+                "promoted": promoted,
+                "registered_at": datetime.now().isoformat(),
+            }
+            if promoted:
+                for other_model_entry in manifest[MODEL_REGISTRY_MODELS_KEY].values():
+                    other_model_entry["promoted"] = False
+                manifest[MODEL_REGISTRY_CURRENT_KEY] = version
+            manifest[MODEL_REGISTRY_MODELS_KEY][version] = model_entry
+
+            write_json_atomic(file_path=self.manifest_file_path, data=manifest)
+            logging.info(f"Model registered in [{self.manifest_file_path}]: {model_entry}")
+            return model_entry
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def get_current_model_entry(self) -> dict:
+        """
+        :return: manifest entry of the promoted model, None if there is none: dict
+        """
+        try:
+            manifest = self.read_manifest()
+            current_version = manifest[MODEL_REGISTRY_CURRENT_KEY]
+            if current_version is None:
+                return None
+            return manifest[MODEL_REGISTRY_MODELS_KEY][current_version]
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def get_current_model_path(self) -> str:
+        """
+        :return: file path of the promoted model: str
+        """
+        try:
+            model_entry = self.get_current_model_entry()
+            if model_entry is None:
+                raise Exception(f"No promoted model in [{self.manifest_file_path}]")
+            model_file_path = os.path.join(self.model_dir, model_entry["path"])
+            if os.path.getsize(model_file_path) != model_entry["size"]:
+                raise Exception(f"Model file [{model_file_path}] size differs from the manifest")
+            return model_file_path
+        except Exception as e:
+            raise FlightException(e, sys)
@@ -0,0 +1,182 @@
+import sys
+import json
+
+import numpy as np
+import pandas as pd
+from typing import List
+from flight.exception import FlightException
+from flight.utils.utils import read_yaml
+from flight.constant import SCHEMA_COLUMNS_KEY, SCHEMA_DOMAIN_VALUE_KEY, SCHEMA_TARGET_COLUMN_KEY, \
+    COLUMN_ADDITIONAL_INFO
+from flight.component.data_transformation import normalize_additional_info
+
+
+# columns whose spellings the preprocessing cleans, e.g. "No Info" to "No info",
+# so they are compared to the domain values once normalized the same way
+VALUE_NORMALIZERS = {COLUMN_ADDITIONAL_INFO: normalize_additional_info}
+
+
+class SchemaValidator:
+    """
+    Checks of config/schema.yaml compiled once: the expected columns and
+    dtype kinds, and the domain values of the categorical columns as arrays
+    for vectorized set membership over a dataframe, and as sets for single
+    records. Missing values are counted apart, they are not domain
+    violations since the preprocessing imputes them. Columns with a value
+    normalizer are checked on normalized values.
+    """
+
+    def __init__(self,
+                 columns: dict,
+                 domain_values: dict,
+                 target_column: str=None,
+                 n_sample_rows: int=5,
+                 value_normalizers: dict=None):
+        try:
+            self.columns = columns
+            self.target_column = target_column
+            self.n_sample_rows = n_sample_rows
+            self.value_normalizers = VALUE_NORMALIZERS if value_normalizers is None else value_normalizers
+            # "int" matches int32 and int64 alike
+            self.column_kinds = {column: np.dtype(dtype).kind for column, dtype in columns.items()}
+            self.domain_values = {column: np.array(values, dtype=object) for column, values in domain_values.items()}
+            self.domain_value_sets = {column: frozenset(self.normalize(column, value) for value in values)
+                                      for column, values in domain_values.items()}
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def normalize(self, column: str, value):
+        normalizer = self.value_normalizers.get(column)
+        return value if normalizer is None else normalizer(value)
+
+    def get_invalid_mask(self, column: str, values: pd.Series) -> np.ndarray:
+        """
+        :return: True for the values of column outside its domain, missing values excluded: np.ndarray
+        """
+        if column not in self.value_normalizers:
+            return ~(values.isin(self.domain_values[column]).to_numpy() | values.isna().to_numpy())
+        # each distinct value is normalized once, code -1 marks missing values
+        codes, uniques = pd.factorize(values)
+        is_invalid_unique = np.array([self.normalize(column, value) not in self.domain_value_sets[column]
+                                      for value in uniques] + [False])
+        return is_invalid_unique[codes]
+
+    @classmethod
+    def from_schema_file(cls, schema_file_path: str, n_sample_rows: int=5) -> "SchemaValidator":
+        try:
+            schema = read_yaml(file_path=schema_file_path)
+            return cls(columns=schema[SCHEMA_COLUMNS_KEY],
+                       domain_values=schema[SCHEMA_DOMAIN_VALUE_KEY],
+                       target_column=schema.get(SCHEMA_TARGET_COLUMN_KEY),
+                       n_sample_rows=n_sample_rows)
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def validate(self, dataframe: pd.DataFrame, columns: List[str]=None) -> dict:
+        """
+        :param dataframe: rows to check
+        :param columns: columns dataframe must hold, all the schema columns by default
+        :return: missing, unexpected and mistyped columns, and per categorical column the
+        number of missing and of out of domain values, the most frequent out of domain
+        values and the first offending rows: dict
+        """
+        try:
+            columns = list(self.columns) if columns is None else columns
+            report = {
+                "n_rows": len(dataframe),
+                "missing_columns": [column for column in columns if column not in dataframe.columns],
+                "unexpected_columns": [column for column in dataframe.columns if column not in self.columns],
+                "dtype_mismatches": {column: {"expected": str(self.columns[column]),
+                                              "found": str(dataframe[column].dtype)}
+                                     for column in columns if column in dataframe.columns
+                                     and dataframe[column].dtype.kind != self.column_kinds[column]},
+                "domain_values": dict(),
+            }
+            for column in self.domain_values:
+                if column not in dataframe.columns:
+                    continue
+                values = dataframe[column]
+                is_missing = values.isna().to_numpy()
+                is_invalid = self.get_invalid_mask(column, values)
+                sample_rows = np.flatnonzero(is_invalid)[:self.n_sample_rows]
+                report["domain_values"][column] = {
+                    "n_missing": int(is_missing.sum()),
+                    "n_invalid": int(is_invalid.sum()),
+                    "invalid_values": {str(value): int(count) for value, count in
+                                       values[is_invalid].value_counts().head(self.n_sample_rows).items()},
+                    "sample_row_positions": sample_rows.tolist(),
+                    # through to_json so numpy scalars and NaN become json values
+                    "sample_rows": json.loads(dataframe.iloc[sample_rows].to_json(orient="records")),
+                }
+            report["is_valid"] = self.is_valid(report)
+            return report
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    @staticmethod
+    def is_structure_valid(report: dict) -> bool:
+        return not (report["missing_columns"] or report["unexpected_columns"] or report["dtype_mismatches"])
+
+    @staticmethod
+    def is_valid(report: dict) -> bool:
+        return SchemaValidator.is_structure_valid(report) and \
+            all(column_report["n_invalid"] == 0 for column_report in report["domain_values"].values())
+
+    def validate_record(self, record: dict) -> dict:
+        """
+        Domain value check of a single record, without building a dataframe
+        :param record: column name -> value
+        :return: column -> out of domain value, empty when the record is valid: dict
+        """
+        try:
+            invalid_values = dict()
+            for column, domain_value_set in self.domain_value_sets.items():
+                value = record.get(column)
+                if value is None or value != value:
+                    continue
+                if self.normalize(column, value) not in domain_value_set:
+                    invalid_values[column] = value
+            return invalid_values
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    @staticmethod
+    def get_structure_errors(report: dict, column_names: dict=None) -> List[str]:
+        """
+        :param report: report returned by validate
+        :param column_names: name to show for each column, e.g. the request field names
+        :return: one message per missing, unexpected or mistyped column: List[str]
+        """
+        column_names = column_names or dict()
+        errors = [f"Missing column [{column_names.get(column, column)}]" for column in report["missing_columns"]]
+        errors += [f"Unexpected column [{column}]" for column in report["unexpected_columns"]]
+        errors += [f"Column [{column}] has dtype [{mismatch['found']}], the schema expects [{mismatch['expected']}]"
+                   for column, mismatch in report["dtype_mismatches"].items()]
+        return errors
+
+    @staticmethod
+    def get_domain_value_errors(report: dict, column_names: dict=None, row_name: str="row") -> List[str]:
+        """
+        :param report: report returned by validate
+        :param column_names: name to show for each column, e.g. the request field names
+        :param row_name: what a row is called in the messages
+        :return: one message per column holding out of domain values: List[str]
+        """
+        column_names = column_names or dict()
+        errors = []
+        for column, column_report in report["domain_values"].items():
+            if column_report["n_invalid"] == 0:
+                continue
+            samples = ", ".join(f"{row_name} [{position}]: [{row[column]}]" for position, row in
+                                zip(column_report["sample_row_positions"], column_report["sample_rows"]))
+            errors.append(f"[{column_report['n_invalid']}] {row_name}s have a [{column_names.get(column, column)}] "
+                          f"outside the schema domain values, e.g. {samples}")
+        return errors
+
+    @staticmethod
+    def get_errors(report: dict, column_names: dict=None, row_name: str="row") -> List[str]:
+        """
+        :return: structure and domain value errors of the report: List[str]
+        """
+        return SchemaValidator.get_structure_errors(report, column_names) + \
+            SchemaValidator.get_domain_value_errors(report, column_names, row_name)
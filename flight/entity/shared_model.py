@@ -0,0 +1,186 @@
+import os
+import sys
+import copy
+
+import numpy as np
+from flight.logger import logging
+from flight.exception import FlightException
+from flight.utils.utils import save_object, load_object
+from sklearn.tree import DecisionTreeRegressor
+from sklearn.ensemble import RandomForestRegressor, ExtraTreesRegressor
+
+
+SHARED_MODEL_FILE_NAME = "model.pkl"
+SHARED_TREE_ARRAY_NAMES = ["roots", "children_left", "children_right", "feature", "threshold", "value"]
+# rows x trees walked at once, bounding the (rows, trees) node index arrays of predict to a few MB each
+PREDICT_BLOCK_CELLS = 1 << 18
+
+
+def is_shareable(estimator) -> bool:
+    """
+    :param estimator: trained model object of a FlightEstimatorModel
+    :return: True when its node arrays can be exported to a shared model: bool
+    """
+    if isinstance(estimator, DecisionTreeRegressor):
+        return estimator.tree_.n_outputs == 1
+    if isinstance(estimator, (RandomForestRegressor, ExtraTreesRegressor)):
+        return estimator.n_outputs_ == 1
+    return False
+
+
+class SharedTreeEnsemble:
+    """
+    Read only predictor over the node arrays of a fitted single output
+    DecisionTreeRegressor, RandomForestRegressor or ExtraTreesRegressor.
+    The nodes of every tree are concatenated into flat arrays saved as .npy
+    files and loaded with np.load(mmap_mode="r"), so all processes serving
+    the model share one copy of them through the page cache.
+    sklearn cannot be used for this: unpickling a Tree copies its node
+    arrays into memory owned by each process.
+    """
+
+    def __init__(self, n_features_in: int, n_trees: int, max_depth: int, average: bool):
+        self.n_features_in = n_features_in
+        self.n_trees = n_trees
+        self.max_depth = max_depth
+        self.average = average
+        self.arrays_loaded = False
+
+    @staticmethod
+    def get_trees(estimator) -> list:
+        if isinstance(estimator, DecisionTreeRegressor):
+            return [estimator.tree_]
+        return [tree_estimator.tree_ for tree_estimator in estimator.estimators_]
+
+    @classmethod
+    def from_estimator(cls, estimator) -> tuple:
+        """
+        :param estimator: fitted tree based regressor accepted by is_shareable
+        :return: SharedTreeEnsemble, dict of its flat node arrays: tuple
+        """
+        try:
+            trees = cls.get_trees(estimator)
+            n_nodes = np.array([tree.node_count for tree in trees], dtype=np.int64)
+            offsets = np.concatenate([[0], np.cumsum(n_nodes)[:-1]])
+
+            children_left, children_right = [], []
+            for tree, offset in zip(trees, offsets):
+                # child indexes are made global, leaves keep -1
+                children_left.append(np.where(tree.children_left < 0, -1, tree.children_left + offset))
+                children_right.append(np.where(tree.children_right < 0, -1, tree.children_right + offset))
+
+            arrays = {
+                "roots": offsets.astype(np.int64),
+                "children_left": np.concatenate(children_left).astype(np.int64),
+                "children_right": np.concatenate(children_right).astype(np.int64),
+                "feature": np.concatenate([tree.feature for tree in trees]).astype(np.int64),
+                "threshold": np.concatenate([tree.threshold for tree in trees]).astype(np.float64),
+                "value": np.concatenate([tree.value[:, 0, 0] for tree in trees]).astype(np.float64),
+            }
+            shared_tree_ensemble = cls(n_features_in=estimator.n_features_in_,
+                                       n_trees=len(trees),
+                                       max_depth=max(tree.max_depth for tree in trees),
+                                       average=not isinstance(estimator, DecisionTreeRegressor))
+            return shared_tree_ensemble, arrays
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def load_arrays(self, shared_model_dir: str) -> None:
+        try:
+            for array_name in SHARED_TREE_ARRAY_NAMES:
+                array_file_path = os.path.join(shared_model_dir, f"{array_name}.npy")
+                setattr(self, array_name, np.load(array_file_path, mmap_mode="r"))
+            self.arrays_loaded = True
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def __getstate__(self):
+        # node arrays live in their own .npy files, never in the pickle
+        state = self.__dict__.copy()
+        for array_name in SHARED_TREE_ARRAY_NAMES:
+            state.pop(array_name, None)
+        state["arrays_loaded"] = False
+        return state
+
+    def predict(self, X) -> np.ndarray:
+        """
+        Walks every tree for a block of rows at once, one tree level per
+        step, so the node indexes of a block hold at most
+        PREDICT_BLOCK_CELLS rows x trees whatever the number of rows.
+        Rows are compared as float32 against float64 thresholds and tree
+        outputs are summed in tree order, the same as sklearn does.
+        :param X: transformed features
+        :return: predicted values: np.ndarray
+        """
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in:
+            raise ValueError(f"Expected input of shape (n_samples, {self.n_features_in}), got {X.shape}")
+
+        block_size = max(1, PREDICT_BLOCK_CELLS // self.n_trees)
+        prediction = np.empty(X.shape[0], dtype=np.float64)
+        for start in range(0, X.shape[0], block_size):
+            prediction[start:start + block_size] = self.predict_block(X[start:start + block_size])
+        if self.average:
+            prediction /= self.n_trees
+        return prediction
+
+    def predict_block(self, X: np.ndarray) -> np.ndarray:
+        """
+        :param X: float32 transformed features of a block of rows
+        :return: sum of the outputs of every tree for each row: np.ndarray
+        """
+        rows = np.arange(X.shape[0])[:, np.newaxis]
+        nodes = np.repeat(np.asarray(self.roots)[np.newaxis, :], X.shape[0], axis=0)
+        for _ in range(self.max_depth):
+            feature = self.feature[nodes]
+            is_leaf = feature < 0
+            if is_leaf.all():
+                break
+            go_left = X[rows, np.where(is_leaf, 0, feature)] <= self.threshold[nodes]
+            next_nodes = np.where(go_left, self.children_left[nodes], self.children_right[nodes])
+            nodes = np.where(is_leaf, nodes, next_nodes)
+        return np.cumsum(self.value[nodes], axis=1)[:, -1]
+
+    def __repr__(self):
+        return f"{type(self).__name__}()"
+
+
+def export_shared_model(model, shared_model_dir: str) -> bool:
+    """
+    Writes a copy of a FlightEstimatorModel whose trained model object is a
+    SharedTreeEnsemble, along with the node arrays it memory maps
+    :param model: FlightEstimatorModel
+    :param shared_model_dir: directory the shared model is written to
+    :return: False when the trained model object cannot be shared: bool
+    """
+    try:
+        if not is_shareable(model.trained_model_object):
+            logging.info(f"Shared model not exported, [{type(model.trained_model_object).__name__}] "
+                         f"is not a supported tree based regressor")
+            return False
+
+        shared_tree_ensemble, arrays = SharedTreeEnsemble.from_estimator(model.trained_model_object)
+        os.makedirs(shared_model_dir, exist_ok=True)
+        for array_name, array in arrays.items():
+            np.save(os.path.join(shared_model_dir, f"{array_name}.npy"), array)
+
+        shared_model = copy.copy(model)
+        shared_model.trained_model_object = shared_tree_ensemble
+        save_object(file_path=os.path.join(shared_model_dir, SHARED_MODEL_FILE_NAME), obj=shared_model)
+        logging.info(f"Shared model of [{shared_tree_ensemble.n_trees}] trees exported to [{shared_model_dir}]")
+        return True
+    except Exception as e:
+        raise FlightException(e, sys)
+
+
+def load_shared_model(shared_model_dir: str):
+    """
+    :param shared_model_dir: directory written by export_shared_model
+    :return: FlightEstimatorModel with its node arrays memory mapped
+    """
+    try:
+        shared_model = load_object(file_path=os.path.join(shared_model_dir, SHARED_MODEL_FILE_NAME))
+        shared_model.trained_model_object.load_arrays(shared_model_dir=shared_model_dir)
+        return shared_model
+    except Exception as e:
+        raise FlightException(e, sys)
@@ -0,0 +1,161 @@
+import time
+import bisect
+import threading
+
+from contextlib import contextmanager
+
+
+# Minimal Prometheus text exposition format (version 0.0.4) metrics. Values
+# are kept per process, so with several gunicorn workers each scrape of
+# /metrics returns the metrics of the worker that served it.
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 1024, 4096, 16384, 65536)
+
+
+def format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+def format_labels(label_names, label_values) -> str:
+    if not label_names:
+        return ""
+    labels = ",".join(f'{name}="{value}"' for name, value in zip(label_names, label_values))
+    return f"{{{labels}}}"
+
+
+class Metric:
+    metric_type = None
+
+    def __init__(self, name: str, documentation: str, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        # label values -> value of the metric for those labels
+        self.values = dict()
+        self.lock = threading.Lock()
+
+    def get_label_values(self, labels: dict) -> tuple:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"Metric [{self.name}] expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[label_name]) for label_name in self.label_names)
+
+    def render_samples(self) -> list:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}",
+                 f"# TYPE {self.name} {self.metric_type}"]
+        with self.lock:
+            lines.extend(self.render_samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    metric_type = "counter"
+
+    def inc(self, amount: float=1, **labels) -> None:
+        label_values = self.get_label_values(labels)
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self.values.get(self.get_label_values(labels), 0)
+
+    def render_samples(self) -> list:
+        return [f"{self.name}{format_labels(self.label_names, label_values)} {format_value(value)}"
+                for label_values, value in sorted(self.values.items())]
+
+
+class Histogram(Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name=name, documentation=documentation, label_names=label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        label_values = self.get_label_values(labels)
+        # index of the first bucket whose upper bound is >= value, len(buckets) for +Inf
+        bucket_index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            bucket_counts, total = self.values.get(label_values, ([0] * (len(self.buckets) + 1), 0.0))
+            bucket_counts[bucket_index] += 1
+            self.values[label_values] = (bucket_counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        """
+        Observes the duration of the with block in seconds
+        """
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start_time, **labels)
+
+    def render_samples(self) -> list:
+        samples = []
+        label_names = self.label_names + ("le",)
+        for label_values, (bucket_counts, total) in sorted(self.values.items()):
+            cumulative_count = 0
+            for upper_bound, bucket_count in zip(self.buckets + (float("inf"),), bucket_counts):
+                cumulative_count += bucket_count
+                bucket_labels = format_labels(label_names, label_values + (format_value(upper_bound),))
+                samples.append(f"{self.name}_bucket{bucket_labels} {cumulative_count}")
+            labels = format_labels(self.label_names, label_values)
+            samples.append(f"{self.name}_sum{labels} {format_value(total)}")
+            samples.append(f"{self.name}_count{labels} {cumulative_count}")
+        return samples
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """
+        :return: every registered metric in text exposition format: str
+        """
+        return "\n".join(metric.render() for metric in self.metrics) + "\n"
+
+
+metrics_registry = MetricsRegistry()
+
+request_seconds = metrics_registry.register(Histogram(
+    name="flight_request_seconds",
+    documentation="Time spent handling a prediction request.",
+    label_names=("endpoint",)
+))
+prediction_stage_seconds = metrics_registry.register(Histogram(
+    name="flight_prediction_stage_seconds",
+    documentation="Time spent in each stage of a prediction: parse, flight_data, validate, transform, predict and render.",
+    label_names=("stage",)
+))
+prediction_batch_size = metrics_registry.register(Histogram(
+    name="flight_prediction_batch_size",
+    documentation="Number of flights predicted per model call.",
+    buckets=BATCH_SIZE_BUCKETS
+))
+micro_batch_queue_wait_seconds = metrics_registry.register(Histogram(
+    name="flight_micro_batch_queue_wait_seconds",
+    documentation="Time a request waited in the micro batch queue before its batch was predicted."
+))
+micro_batch_timeouts = metrics_registry.register(Counter(
+    name="flight_micro_batch_timeouts_total",
+    documentation="Requests that failed waiting longer than the prediction timeout for their micro batch."
+))
+model_cache_hits = metrics_registry.register(Counter(
+    name="flight_model_cache_hits_total",
+    documentation="Predictions served by the cached model without reloading it."
+))
+model_cache_reloads = metrics_registry.register(Counter(
+    name="flight_model_cache_reloads_total",
+    documentation="Models loaded from disk into the model cache."
+))
@@ -0,0 +1,163 @@
+import os
+import sys
+import time
+import argparse
+
+import pandas as pd
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from flight.logger import logging
+from flight.exception import FlightException
+from flight.entity.flight_predictor import FlightPredictor
+from flight.entity.artifact_entity import BatchPredictionArtifact
+from flight.utils.utils import load_object, read_dataframe_in_chunks
+
+
+PREDICTED_PRICE_COLUMN = "Predicted_Price"
+
+# model loaded once per worker process by init_worker
+worker_model = None
+
+
+def init_worker(model_file_path: str) -> None:
+    global worker_model
+    worker_model = load_object(file_path=model_file_path)
+
+
+def predict_chunk(flight_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Runs in a worker process: predicts the price of every row of a chunk
+    :param flight_df: chunk of flight records
+    :return: flight_df with the predicted price column: pd.DataFrame
+    """
+    flight_df[PREDICTED_PRICE_COLUMN] = worker_model.predict(flight_df)
+    return flight_df
+
+
+class BatchPrediction:
+    """
+    Scores a large file of flight records offline. The file is read in
+    chunks of chunk_size rows which are predicted across a pool of worker
+    processes. At most max_pending_chunks chunks are held in memory at once
+    and predictions are appended to the output file, in input order, as
+    soon as they are ready.
+    """
+
+    def __init__(self,
+                 model_dir: str,
+                 model_file_path: str=None,
+                 chunk_size: int=50000,
+                 n_workers: int=None):
+        try:
+            logging.info(f"{'>>' * 20} Batch prediction log started. {'<<' * 20}")
+            self.model_dir = model_dir
+            self.model_file_path = model_file_path
+            self.chunk_size = chunk_size
+            self.n_workers = n_workers or os.cpu_count()
+            self.max_pending_chunks = 2 * self.n_workers
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def get_model_file_path(self) -> str:
+        """
+        :return: the pinned model file, otherwise the latest model in model_dir: str
+        """
+        try:
+            if self.model_file_path is not None:
+                return self.model_file_path
+            return FlightPredictor(model_dir=self.model_dir).get_latest_model_path()
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    @staticmethod
+    def write_predictions(flight_df: pd.DataFrame, output_file_path: str, is_first_chunk: bool) -> None:
+        flight_df.to_csv(output_file_path,
+                         mode="w" if is_first_chunk else "a",
+                         header=is_first_chunk,
+                         index=False)
+
+    def initiate_batch_prediction(self, input_file_path: str, output_file_path: str) -> BatchPredictionArtifact:
+        try:
+            model_file_path = self.get_model_file_path()
+            logging.info(f"Scoring [{input_file_path}] with model [{model_file_path}] "
+                         f"in chunks of [{self.chunk_size}] rows across [{self.n_workers}] processes")
+
+            output_dir = os.path.dirname(output_file_path)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+
+            start_time = time.monotonic()
+            n_rows = 0
+            n_chunks_written = 0
+            pending_chunks = deque()
+            with ProcessPoolExecutor(max_workers=self.n_workers,
+                                     initializer=init_worker,
+                                     initargs=(model_file_path,)) as executor:
+                for flight_df in read_dataframe_in_chunks(file_path=input_file_path,
+                                                          chunk_size=self.chunk_size):
+                    pending_chunks.append(executor.submit(predict_chunk, flight_df))
+                    # wait for the oldest chunk before reading more, so memory stays bounded
+                    while len(pending_chunks) >= self.max_pending_chunks:
+                        n_rows += self.write_oldest_chunk(pending_chunks, output_file_path, n_chunks_written)
+                        n_chunks_written += 1
+
+                while pending_chunks:
+                    n_rows += self.write_oldest_chunk(pending_chunks, output_file_path, n_chunks_written)
+                    n_chunks_written += 1
+
+            execution_time = time.monotonic() - start_time
+            batch_prediction_artifact = BatchPredictionArtifact(
+                model_file_path=model_file_path,
+                output_file_path=output_file_path,
+                n_rows=n_rows,
+                execution_time=execution_time,
+                rows_per_second=n_rows / execution_time if execution_time > 0 else float("inf")
+            )
+            logging.info(f"Batch prediction artifact: [{batch_prediction_artifact}]")
+            return batch_prediction_artifact
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def write_oldest_chunk(self, pending_chunks: deque, output_file_path: str, n_chunks_written: int) -> int:
+        """
+        Waits for the oldest pending chunk and appends it to the output file
+        :return: number of rows written: int
+        """
+        try:
+            flight_df = pending_chunks.popleft().result()
+            BatchPrediction.write_predictions(flight_df=flight_df,
+                                              output_file_path=output_file_path,
+                                              is_first_chunk=n_chunks_written == 0)
+            logging.info(f"Chunk [{n_chunks_written}] of [{len(flight_df)}] rows written to [{output_file_path}]")
+            return len(flight_df)
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def __del__(self):
+        logging.info(f"{'>>' * 20} Batch prediction log completed. {'<<' * 20}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a csv, parquet or excel file of flights with a saved model")
+    parser.add_argument("--input", required=True, help="csv, parquet or excel file of flight records")
+    parser.add_argument("--output", required=True, help="csv file the predictions are written to")
+    parser.add_argument("--model-dir", default=os.path.join(os.getcwd(), "saved_models"),
+                        help="directory of exported models, the latest one is used")
+    parser.add_argument("--model-file-path", default=None, help="pin a specific model file instead of the latest")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="rows per chunk")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes, defaults to cpu count")
+    args = parser.parse_args()
+
+    batch_prediction = BatchPrediction(model_dir=args.model_dir,
+                                       model_file_path=args.model_file_path,
+                                       chunk_size=args.chunk_size,
+                                       n_workers=args.workers)
+    artifact = batch_prediction.initiate_batch_prediction(input_file_path=args.input,
+                                                          output_file_path=args.output)
+    print(f"Scored {artifact.n_rows} rows in {artifact.execution_time:.2f}s "
+          f"({artifact.rows_per_second:.0f} rows/s) with model {artifact.model_file_path}")
+    print(f"Predictions written to {artifact.output_file_path}")
+
+
+if __name__ == "__main__":
+    main()
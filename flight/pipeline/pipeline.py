@@ -15,6 +15,7 @@ from flight.component.data_ingestion import DataIngestion
 from flight.component.data_validation import DataValidation
 from flight.component.model_evaluation import ModelEvaluation
 from flight.component.data_transformation import DataTransformation
+from flight.entity.artifact_store import ArtifactStore
 from flight.constant import EXPERIMENT_DIR_NAME, EXPERIMENT_FILE_NAME
 from flight.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact, \
     DataTransformationArtifact, ModelTrainerArtifact, ModelEvaluationArtifact, \
@@ -51,12 +52,15 @@ class Pipeline(Thread):
             # creating another thread for training
             super().__init__(daemon=False, name="pipeline")
             self.config = config
+            # replaced at the start of every run
+            self.artifact_store = ArtifactStore()
         except Exception as e:
             raise FlightException(e, sys)
 
     def start_data_ingestion(self) -> DataIngestionArtifact:
         try:
-            data_ingestion = DataIngestion(data_ingestion_config=self.config.get_data_ingestion_config())
+            data_ingestion = DataIngestion(data_ingestion_config=self.config.get_data_ingestion_config(),
+                                           artifact_store=self.artifact_store)
             return data_ingestion.initiate_data_ingestion()
         except Exception as e:
             raise FlightException(e, sys)
@@ -65,7 +69,8 @@ class Pipeline(Thread):
         try:
             data_validation = DataValidation(
                 data_validation_config=self.config.get_data_validation_config(),
-                data_ingestion_artifact=data_ingestion_artifact
+                data_ingestion_artifact=data_ingestion_artifact,
+                artifact_store=self.artifact_store
             )
             return data_validation.initiate_data_validation()
         except Exception as e:
@@ -78,7 +83,8 @@ class Pipeline(Thread):
             data_transformation = DataTransformation(
                 data_transformation_config=self.config.get_data_transformation_config(),
                 data_ingestion_artifact=data_ingestion_artifact,
-                data_validation_artifact=data_validation_artifact
+                data_validation_artifact=data_validation_artifact,
+                artifact_store=self.artifact_store
             )
             return data_transformation.initiate_data_transformation()
         except Exception as e:
@@ -89,7 +95,8 @@ class Pipeline(Thread):
         try:
             model_trainer = ModelTrainer(
                 model_trainer_config=self.config.get_model_trainer_config(),
-                data_transformation_artifact=data_transformation_artifact
+                data_transformation_artifact=data_transformation_artifact,
+                artifact_store=self.artifact_store
             )
             return model_trainer.initiate_model_trainer()
         except Exception as e:
@@ -104,18 +111,21 @@ class Pipeline(Thread):
                 model_evaluation_config=self.config.get_model_evaluation_config(),
                 data_ingestion_artifact=data_ingestion_artifact,
                 data_validation_artifact=data_validation_artifact,
-                model_trainer_artifact=model_trainer_artifact
+                model_trainer_artifact=model_trainer_artifact,
+                artifact_store=self.artifact_store
             )
             return model_eval.initiate_model_evaluation()
         except Exception as e:
             raise FlightException(e, sys)
 
     def start_model_pusher(self,
-                           model_eval_artifact: ModelEvaluationArtifact) -> ModelPusherArtifact:
+                           model_eval_artifact: ModelEvaluationArtifact,
+                           model_trainer_artifact: ModelTrainerArtifact=None) -> ModelPusherArtifact:
         try:
             model_pusher = ModelPusher(
                 model_pusher_config=self.config.get_model_pusher_config(),
-                model_evaluation_artifact=model_eval_artifact
+                model_evaluation_artifact=model_eval_artifact,
+                model_trainer_artifact=model_trainer_artifact
             )
 
             return model_pusher.initiate_model_pusher()
@@ -149,6 +159,8 @@ class Pipeline(Thread):
 
             self.save_experiment()
 
+            artifact_store_max_mb = self.config.training_pipeline_config.artifact_store_max_mb
+            self.artifact_store = ArtifactStore(max_bytes=artifact_store_max_mb * 1024 * 1024)
             data_ingestion_artifact = self.start_data_ingestion()
             data_validation_artifact = self.start_data_validation(
                 data_ingestion_artifact=data_ingestion_artifact
@@ -168,7 +180,8 @@ class Pipeline(Thread):
             )
             if model_evaluation_artifact.is_model_accepted:
                 model_pusher_artifact = self.start_model_pusher(
-                    model_eval_artifact=model_evaluation_artifact
+                    model_eval_artifact=model_evaluation_artifact,
+                    model_trainer_artifact=model_trainer_artifact
                 )
                 logging.info(f"Model pusher artifact: {model_pusher_artifact}")
             else:
@@ -193,6 +206,8 @@ class Pipeline(Thread):
             self.save_experiment()
         except Exception as e:
             raise FlightException(e, sys)
+        finally:
+            self.artifact_store.clear()
 
     def run(self):
         try:
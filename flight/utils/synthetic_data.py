@@ -0,0 +1,282 @@
+import os
+import sys
+import argparse
+
+import numpy as np
+import pandas as pd
+from flight.logger import logging
+from flight.exception import FlightException
+from flight.utils.utils import read_yaml, write_dataframe, ParquetChunkWriter
+from flight.constant import ROOT_DIR, CONFIG_DIR, SCHEMA_COLUMNS_KEY, SCHEMA_DOMAIN_VALUE_KEY, \
+    SCHEMA_TARGET_COLUMN_KEY, COLUMN_DATE_OF_JOURNEY, COLUMN_DEP_TIME, COLUMN_ARRIVAL_TIME, COLUMN_DURATION, \
+    COLUMN_ADDITIONAL_INFO
+
+
+SCHEMA_FILE_PATH = os.path.join(ROOT_DIR, CONFIG_DIR, "schema.yaml")
+EXCEL_MAX_ROWS = 1048575
+
+# shares of the Kaggle dataset, domain values missing here get UNLISTED_WEIGHT
+COLUMN_WEIGHTS = {
+    "Airline": {"Jet Airways": 0.36, "IndiGo": 0.19, "Air India": 0.16, "Multiple carriers": 0.11,
+                "SpiceJet": 0.077, "Vistara": 0.045, "Air Asia": 0.03, "GoAir": 0.018},
+    "Source": {"Delhi": 0.42, "Kolkata": 0.27, "Banglore": 0.2, "Mumbai": 0.065, "Chennai": 0.036},
+    "Total_Stops": {"1 stop": 0.53, "non-stop": 0.33, "2 stops": 0.14, "3 stops": 0.004, "4 stops": 0.0001},
+    "Additional_Info": {"No info": 0.78, "In-flight meal not included": 0.18, "No check-in baggage included": 0.03},
+}
+UNLISTED_WEIGHT = 0.0005
+# the dataset only holds these routes
+SOURCE_DESTINATIONS = {
+    "Banglore": ["New Delhi", "Delhi"],
+    "Kolkata": ["Banglore"],
+    "Delhi": ["Cochin"],
+    "Chennai": ["Kolkata"],
+    "Mumbai": ["Hyderabad"],
+}
+CITY_CODES = {"Banglore": "BLR", "Kolkata": "CCU", "Delhi": "DEL", "New Delhi": "DEL", "Chennai": "MAA",
+              "Mumbai": "BOM", "Cochin": "COK", "Hyderabad": "HYD"}
+STOPOVER_CODES = np.array(["BOM", "DEL", "HYD", "BLR", "MAA", "CCU", "AMD", "GOI", "JAI", "IDR", "NAG", "BHO",
+                           "PNQ", "LKO", "IXC", "GAU", "TRV", "ATQ", "VGA", "IXR"])
+# median fare of each airline, in the dataset
+AIRLINE_BASE_PRICES = {"Jet Airways": 11600, "IndiGo": 5700, "Air India": 9600, "Multiple carriers": 10900,
+                       "SpiceJet": 4300, "Vistara": 7800, "Air Asia": 5600, "GoAir": 5900,
+                       "Vistara Premium economy": 8900, "Jet Airways Business": 58000,
+                       "Multiple carriers Premium economy": 11400, "Trujet": 4100}
+DEFAULT_BASE_PRICE = 7000
+MIN_PRICE = 1759
+FIRST_JOURNEY_DATE = np.datetime64("2019-03-01")
+N_JOURNEY_DAYS = 122
+MONTH_NAMES = np.array(["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"])
+TWO_DIGITS = np.char.zfill(np.arange(100).astype(str), 2)
+
+
+def get_probabilities(values: list, weights: dict) -> np.ndarray:
+    probabilities = np.array([weights.get(value, UNLISTED_WEIGHT) for value in values])
+    return probabilities / probabilities.sum()
+
+
+def choose(rng: np.random.Generator, values: list, n_rows: int, weights: dict=None) -> np.ndarray:
+    """
+    :return: n_rows values drawn with the weights of the dataset, uniformly when there are none: np.ndarray
+    """
+    probabilities = None if weights is None else get_probabilities(values, weights)
+    return np.asarray(values, dtype=object)[rng.choice(len(values), size=n_rows, p=probabilities)]
+
+
+def format_time(minutes: np.ndarray) -> np.ndarray:
+    """
+    :param minutes: minutes since midnight
+    :return: "HH:MM" strings: np.ndarray
+    """
+    return np.char.add(np.char.add(TWO_DIGITS[minutes // 60], ":"), TWO_DIGITS[minutes % 60])
+
+
+def format_duration(minutes: np.ndarray) -> np.ndarray:
+    """
+    :param minutes: flight durations
+    :return: "2h 50m", "19h" or "45m" strings: np.ndarray
+    """
+    hours = (minutes // 60).astype(str)
+    remainder = (minutes % 60).astype(str)
+    return np.where(minutes < 60, np.char.add(remainder, "m"),
+                    np.where(minutes % 60 == 0, np.char.add(hours, "h"),
+                             np.char.add(np.char.add(hours, "h "), np.char.add(remainder, "m"))))
+
+
+def make_flight_data(n_rows: int,
+                     rng: np.random.Generator,
+                     domain_values: dict,
+                     columns: list,
+                     target_column: str=None,
+                     missing_rate: float=0.0) -> pd.DataFrame:
+    """
+    Draws flights in the formats of the raw dataset: categories from the
+    schema domain values with the shares of the dataset, "24/03/2019" or
+    "1/05/2019" journey dates, arrival times carrying the arrival date when
+    the flight lands on a later day ("01:10 22 Mar"), durations consistent
+    with departure, arrival and number of stops, and a price from the
+    airline, stops and journey month
+    :param n_rows: number of flights
+    :param rng: random generator
+    :param domain_values: domain values of the schema
+    :param columns: columns of the schema, in order
+    :param target_column: price column, None to leave it out as in the test set
+    :param missing_rate: share of rows missing their Route and Total_Stops, as one row of the dataset
+    :return: pd.DataFrame
+    """
+    try:
+        airline = choose(rng, domain_values["Airline"], n_rows, COLUMN_WEIGHTS["Airline"])
+        source = choose(rng, domain_values["Source"], n_rows, COLUMN_WEIGHTS["Source"])
+        destination = np.empty(n_rows, dtype=object)
+        for source_value in np.unique(source):
+            rows = np.flatnonzero(source == source_value)
+            candidates = [value for value in SOURCE_DESTINATIONS.get(source_value, [])
+                          if value in domain_values["Destination"]]
+            candidates = candidates or [value for value in domain_values["Destination"] if value != source_value]
+            destination[rows] = choose(rng, candidates, len(rows))
+        total_stops = choose(rng, domain_values["Total_Stops"], n_rows, COLUMN_WEIGHTS["Total_Stops"])
+        n_stops = np.array([0 if value == "non-stop" else int(value.split()[0]) for value in total_stops])
+        additional_info = choose(rng, domain_values["Additional_Info"], n_rows, COLUMN_WEIGHTS["Additional_Info"])
+
+        # route through n_stops stopovers
+        route = np.array([CITY_CODES.get(value, value[:3].upper()) for value in source])
+        stopovers = STOPOVER_CODES[rng.integers(0, len(STOPOVER_CODES), size=(n_rows, 4))]
+        for stop in range(4):
+            route = np.where(n_stops > stop, np.char.add(np.char.add(route, " → "), stopovers[:, stop]), route)
+        route = np.char.add(np.char.add(route, " → "),
+                            np.array([CITY_CODES.get(value, value[:3].upper()) for value in destination]))
+
+        # 45 min to 3h20 per leg, and 30 min to 20h per layover, on a 5 minute grid
+        duration = rng.integers(9, 41, n_rows) * 5
+        for stop in range(4):
+            layover = rng.integers(9, 41, n_rows) * 5 + rng.integers(6, 241, n_rows) * 5
+            duration = duration + np.where(n_stops > stop, layover, 0)
+        dep_minutes = rng.integers(0, 24 * 12, n_rows) * 5
+        arrival_minutes = dep_minutes + duration
+
+        journey_offset = rng.integers(0, N_JOURNEY_DAYS, n_rows)
+        journey_date = pd.DatetimeIndex(FIRST_JOURNEY_DATE + journey_offset)
+        arrival_date = pd.DatetimeIndex(FIRST_JOURNEY_DATE + journey_offset + arrival_minutes // (24 * 60))
+        journey_day = journey_date.day.to_numpy()
+        # about half of the dataset writes the day of journey without its leading zero
+        day = np.where(rng.random(n_rows) < 0.5, journey_day.astype(str), TWO_DIGITS[journey_day])
+        date_of_journey = np.char.add(np.char.add(day, "/"),
+                                      np.char.add(TWO_DIGITS[journey_date.month.to_numpy()], "/2019"))
+        arrival_time = format_time(arrival_minutes % (24 * 60))
+        arrival_day = np.char.add(np.char.add(" ", TWO_DIGITS[arrival_date.day.to_numpy()]),
+                                  np.char.add(" ", MONTH_NAMES[arrival_date.month.to_numpy() - 1]))
+        arrival_time = np.where(arrival_minutes >= 24 * 60, np.char.add(arrival_time, arrival_day), arrival_time)
+
+        flight_df = pd.DataFrame({
+            "Airline": airline,
+            COLUMN_DATE_OF_JOURNEY: date_of_journey.astype(object),
+            "Source": source,
+            "Destination": destination,
+            "Route": route.astype(object),
+            COLUMN_DEP_TIME: format_time(dep_minutes).astype(object),
+            COLUMN_ARRIVAL_TIME: arrival_time.astype(object),
+            COLUMN_DURATION: format_duration(duration).astype(object),
+            "Total_Stops": total_stops,
+            COLUMN_ADDITIONAL_INFO: additional_info,
+        })
+        if missing_rate:
+            missing = rng.random(n_rows) < missing_rate
+            flight_df.loc[missing, ["Route", "Total_Stops"]] = np.nan
+
+        if target_column is not None:
+            base_price = np.array([AIRLINE_BASE_PRICES.get(value, DEFAULT_BASE_PRICE) for value in airline])
+            # march fares, booked closer to the journey, are the highest
+            month_factor = np.where(journey_date.month.to_numpy() == 3, 1.15, 1.0)
+            price = base_price * (1 + 0.3 * n_stops) * month_factor * rng.lognormal(0, 0.25, n_rows)
+            flight_df[target_column] = np.maximum(price.round(), MIN_PRICE).astype(np.int64)
+
+        return flight_df[[column for column in columns if column in flight_df.columns]]
+    except Exception as e:
+        raise FlightException(e, sys)
+
+
+def iter_flight_data(n_rows: int,
+                     seed: int=None,
+                     chunk_size: int=100000,
+                     with_price: bool=True,
+                     missing_rate: float=0.0,
+                     schema_file_path: str=SCHEMA_FILE_PATH):
+    """
+    Draws n_rows flights matching the schema, chunk_size rows at a time so
+    any number of rows can be written without holding them in memory. The
+    same seed and chunk_size give the same flights.
+    :param n_rows: number of flights
+    :param seed: seed of the random generator
+    :param chunk_size: rows per chunk
+    :param with_price: include the target column, as in the training file
+    :param missing_rate: share of rows missing their Route and Total_Stops
+    :param schema_file_path: schema the columns and domain values are read from
+    :return: generator of pd.DataFrame
+    """
+    try:
+        schema = read_yaml(file_path=schema_file_path)
+        columns = list(schema[SCHEMA_COLUMNS_KEY])
+        target_column = schema[SCHEMA_TARGET_COLUMN_KEY] if with_price else None
+        rng = np.random.default_rng(seed)
+        for start in range(0, n_rows, chunk_size):
+            yield make_flight_data(n_rows=min(chunk_size, n_rows - start),
+                                   rng=rng,
+                                   domain_values=schema[SCHEMA_DOMAIN_VALUE_KEY],
+                                   columns=columns,
+                                   target_column=target_column,
+                                   missing_rate=missing_rate)
+    except Exception as e:
+        raise FlightException(e, sys)
+
+
+def get_flight_data(n_rows: int, seed: int=None, **kwargs) -> pd.DataFrame:
+    """
+    :param n_rows: number of flights
+    :param seed: seed of the random generator
+    :param kwargs: with_price, missing_rate and schema_file_path of iter_flight_data
+    :return: n_rows synthetic flights: pd.DataFrame
+    """
+    return pd.concat(iter_flight_data(n_rows=n_rows, seed=seed, **kwargs), ignore_index=True)
+
+
+def write_flight_data(file_path: str, n_rows: int, chunk_size: int=100000, **kwargs) -> int:
+    """
+    Writes synthetic flights to a parquet or csv file chunk by chunk, or to
+    an excel file at once
+    :param file_path: output file, its extension gives the format
+    :param n_rows: number of flights
+    :param chunk_size: rows per chunk
+    :param kwargs: seed, with_price, missing_rate and schema_file_path of iter_flight_data
+    :return: number of rows written: int
+    """
+    try:
+        file_extension = os.path.splitext(file_path)[1].lower()
+        chunks = iter_flight_data(n_rows=n_rows, chunk_size=chunk_size, **kwargs)
+        if file_extension in (".xlsx", ".xlsm", ".xls"):
+            if n_rows > EXCEL_MAX_ROWS:
+                raise Exception(f"Excel sheets hold at most [{EXCEL_MAX_ROWS}] rows, use csv or parquet "
+                                f"for [{n_rows}] rows")
+            write_dataframe(dataframe=pd.concat(chunks, ignore_index=True), file_path=file_path)
+        elif file_extension == ".parquet":
+            schema = read_yaml(file_path=kwargs.get("schema_file_path", SCHEMA_FILE_PATH))
+            parquet_writer = ParquetChunkWriter(file_path=file_path, column_types=schema[SCHEMA_COLUMNS_KEY])
+            try:
+                for flight_df in chunks:
+                    parquet_writer.write(flight_df)
+            finally:
+                parquet_writer.close()
+        elif file_extension == ".csv":
+            os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+            for index, flight_df in enumerate(chunks):
+                flight_df.to_csv(file_path, mode="w" if index == 0 else "a", header=index == 0, index=False)
+        else:
+            raise Exception(f"Unsupported file format: [{file_extension}]")
+        logging.info(f"[{n_rows}] synthetic flights written to [{file_path}]")
+        return n_rows
+    except Exception as e:
+        raise FlightException(e, sys)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic flights matching config/schema.yaml")
+    parser.add_argument("--rows", type=int, required=True, help="number of flights")
+    parser.add_argument("--output", required=True, help="csv, parquet or excel file the flights are written to")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=100000, help="rows drawn and written at a time")
+    parser.add_argument("--no-price", action="store_true", help="leave the price out, as in the test set")
+    parser.add_argument("--missing-rate", type=float, default=0.0,
+                        help="share of rows missing their Route and Total_Stops")
+    parser.add_argument("--schema", default=SCHEMA_FILE_PATH, help="schema file of the columns and domain values")
+    args = parser.parse_args()
+
+    n_rows = write_flight_data(file_path=args.output,
+                               n_rows=args.rows,
+                               chunk_size=args.chunk_size,
+                               seed=args.seed,
+                               with_price=not args.no_price,
+                               missing_rate=args.missing_rate,
+                               schema_file_path=args.schema)
+    print(f"{n_rows} flights written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
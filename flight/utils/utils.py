@@ -1,10 +1,19 @@
 import os
+import json
 
 import yaml
 import sys
 import pickle
+import shutil
+import hashlib
+import zipfile
+import openpyxl
 import numpy as np
+import pandas as pd
+from typing import Tuple, List
 from flight.exception import FlightException
+from flight.constant import DATASET_HEADER_FILE_NAME, DATASET_ARRAYS_KEY, DATASET_FORMAT_VERSION_KEY, \
+    DATASET_FORMAT_VERSION
 
 
 def write_yaml(file_path: str, data: dict=None) -> None:
@@ -80,6 +89,385 @@ def load_numpy_array_data(file_path:str) -> np.array:
             return np.load(file_obj)
     except Exception as e:
         raise FlightException(e, sys)
+
+def get_dataset_header(arrays: dict, header: dict=None) -> dict:
+    return {
+        DATASET_FORMAT_VERSION_KEY: DATASET_FORMAT_VERSION,
+        DATASET_ARRAYS_KEY: {name: {"file": f"{name}.npy",
+                                    "dtype": np.dtype(array.dtype).str,
+                                    "shape": list(array.shape)}
+                             for name, array in arrays.items()},
+        **(header or dict()),
+    }
+
+def publish_dataset_dir(temp_dataset_dir: str, dataset_dir: str, header: dict) -> None:
+    """
+    Writes the header last and renames the directory into place, so a
+    dataset directory is either complete or absent
+    """
+    write_json_atomic(file_path=os.path.join(temp_dataset_dir, DATASET_HEADER_FILE_NAME), data=header)
+    if os.path.exists(dataset_dir):
+        shutil.rmtree(dataset_dir)
+    os.rename(temp_dataset_dir, dataset_dir)
+
+def save_dataset(dataset_dir: str, arrays: dict, header: dict=None) -> None:
+    """
+    Save named arrays as a dataset directory: one .npy file per array and a
+    header.json describing them, which load_dataset can memory map
+    :param dataset_dir: str directory to create
+    :param arrays: dict name -> np.array
+    :param header: dict of extra json serializable fields of the header
+    """
+    try:
+        temp_dataset_dir = f"{dataset_dir}.{os.getpid()}.tmp"
+        os.makedirs(temp_dataset_dir, exist_ok=True)
+        for name, array in arrays.items():
+            np.save(os.path.join(temp_dataset_dir, f"{name}.npy"), array)
+        publish_dataset_dir(temp_dataset_dir=temp_dataset_dir,
+                            dataset_dir=dataset_dir,
+                            header=get_dataset_header(arrays=arrays, header=header))
+    except Exception as e:
+        raise FlightException(e, sys)
+
+def save_dataset_chunks(dataset_dir: str, array_chunks, header: dict=None, block_rows: int=65536) -> dict:
+    """
+    Same as save_dataset for arrays arriving in chunks of rows, holding one
+    chunk in memory at a time. Rows of each array are appended to a raw
+    temporary file, then copied block by block behind a .npy header once
+    the number of rows is known.
+    :param dataset_dir: str directory to create
+    :param array_chunks: iterable of dict name -> np.array, the same names,
+    dtypes and trailing dimensions in every chunk
+    :param header: dict of extra json serializable fields of the header
+    :param block_rows: int rows copied at a time
+    :return: dict name -> shape of the saved array
+    """
+    try:
+        temp_dataset_dir = f"{dataset_dir}.{os.getpid()}.tmp"
+        os.makedirs(temp_dataset_dir, exist_ok=True)
+        raw_files, shapes, dtypes = dict(), dict(), dict()
+        try:
+            for array_chunk in array_chunks:
+                for name, array in array_chunk.items():
+                    array = np.ascontiguousarray(array)
+                    if name not in raw_files:
+                        raw_files[name] = open(os.path.join(temp_dataset_dir, f"{name}.raw"), "wb")
+                        shapes[name], dtypes[name] = (0,) + array.shape[1:], array.dtype
+                    shapes[name] = (shapes[name][0] + len(array),) + shapes[name][1:]
+                    array.tofile(raw_files[name])
+        finally:
+            for raw_file in raw_files.values():
+                raw_file.close()
+        if not shapes:
+            raise Exception(f"No rows to save in [{dataset_dir}]")
+
+        arrays = dict()
+        for name, shape in shapes.items():
+            raw_file_path = os.path.join(temp_dataset_dir, f"{name}.raw")
+            rows = np.memmap(raw_file_path, dtype=dtypes[name], mode="r", shape=shape)
+            array = np.lib.format.open_memmap(os.path.join(temp_dataset_dir, f"{name}.npy"),
+                                              mode="w+", dtype=dtypes[name], shape=shape)
+            for start in range(0, shape[0], block_rows):
+                array[start:start + block_rows] = rows[start:start + block_rows]
+            array.flush()
+            arrays[name] = array
+            del rows
+            os.remove(raw_file_path)
+        publish_dataset_dir(temp_dataset_dir=temp_dataset_dir,
+                            dataset_dir=dataset_dir,
+                            header=get_dataset_header(arrays=arrays, header=header))
+        return shapes
+    except Exception as e:
+        raise FlightException(e, sys)
+
+def load_dataset(dataset_dir: str, mmap_mode: str="r") -> Tuple[dict, dict]:
+    """
+    Opens a dataset directory written by save_dataset. With mmap_mode the
+    arrays are memory mapped: pages are read on demand and shared, through
+    the page cache, by every process that maps the same files.
+    :param dataset_dir: str directory to open
+    :param mmap_mode: str mode of np.load, None reads the arrays in memory
+    :return: dict name -> np.array, header: tuple
+    """
+    try:
+        with open(os.path.join(dataset_dir, DATASET_HEADER_FILE_NAME)) as header_file:
+            header = json.load(header_file)
+        if header[DATASET_FORMAT_VERSION_KEY] != DATASET_FORMAT_VERSION:
+            raise Exception(f"Unsupported dataset format version [{header[DATASET_FORMAT_VERSION_KEY]}] "
+                            f"in [{dataset_dir}]")
+        arrays = dict()
+        for name, array_header in header[DATASET_ARRAYS_KEY].items():
+            array = np.load(os.path.join(dataset_dir, array_header["file"]), mmap_mode=mmap_mode)
+            if list(array.shape) != array_header["shape"]:
+                raise Exception(f"Array [{name}] of [{dataset_dir}] has shape {array.shape}, "
+                                f"the header says {array_header['shape']}")
+            arrays[name] = array
+        return arrays, header
+    except Exception as e:
+        raise FlightException(e, sys)
+
+def get_file_checksum(file_path: str, block_size: int=1024 * 1024) -> str:
+    """
+    Compute the sha256 checksum of a file without loading it in memory
+    :param file_path: str location of file
+    :param block_size: int number of bytes read at a time
+    :return: hex digest: str
+    """
+    try:
+        checksum = hashlib.sha256()
+        with open(file_path, "rb") as file_obj:
+            for block in iter(lambda: file_obj.read(block_size), b""):
+                checksum.update(block)
+        return checksum.hexdigest()
+    except Exception as e:
+        raise FlightException(e, sys)
+
+
+def get_file_content_hash(file_path: str) -> str:
+    """
+    sha256 of the content of a file. Excel files are zip archives whose
+    docProps hold creation and modification times, so they are hashed member
+    by member without docProps: rewriting the same data gives the same hash.
+    Directories, such as parquet datasets of part files, are hashed file by file.
+    :param file_path: str location of file or directory
+    :return: hex digest: str
+    """
+    try:
+        if os.path.isdir(file_path):
+            content_hash = hashlib.sha256()
+            for file_name in sorted(os.listdir(file_path)):
+                content_hash.update(file_name.encode())
+                content_hash.update(get_file_content_hash(os.path.join(file_path, file_name)).encode())
+            return content_hash.hexdigest()
+        if not zipfile.is_zipfile(file_path):
+            return get_file_checksum(file_path)
+        content_hash = hashlib.sha256()
+        with zipfile.ZipFile(file_path) as zip_file:
+            for member_name in sorted(zip_file.namelist()):
+                if member_name.startswith("docProps/"):
+                    continue
+                content_hash.update(member_name.encode())
+                content_hash.update(zip_file.read(member_name))
+        return content_hash.hexdigest()
+    except Exception as e:
+        raise FlightException(e, sys)
+
+
+def link_or_copy_file(src: str, dst: str) -> None:
+    """
+    Hard links src to dst, copying it when the two are on different file
+    systems. Directories, such as datasets, are linked file by file.
+    :param src: str existing file or directory
+    :param dst: str file or directory to create
+    """
+    try:
+        if os.path.isdir(src):
+            if os.path.exists(dst):
+                shutil.rmtree(dst)
+            for file_name in os.listdir(src):
+                link_or_copy_file(src=os.path.join(src, file_name), dst=os.path.join(dst, file_name))
+            return
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        if os.path.exists(dst):
+            os.remove(dst)
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copy2(src, dst)
+    except Exception as e:
+        raise FlightException(e, sys)
+
+
+def write_json_atomic(file_path: str, data: dict) -> None:
+    """
+    Write a json file through a temporary file renamed over the target, so
+    readers never see a partially written file
+    :param file_path: str
+    :param data: dict
+    """
+    try:
+        dir_path = os.path.dirname(file_path)
+        os.makedirs(dir_path, exist_ok=True)
+        temp_file_path = f"{file_path}.{os.getpid()}.tmp"
+        with open(temp_file_path, "w") as json_file:
+            json.dump(data, json_file, indent=4)
+        os.replace(temp_file_path, file_path)
+    except Exception as e:
+        raise FlightException(e, sys)
+
+
+def get_parquet_part_paths(file_path: str) -> List[str]:
+    """
+    A parquet dataset is a single file, or a directory of part files whose
+    rows follow each other in the order of the part file names
+    :param file_path: str parquet file or directory
+    :return: parquet files of the dataset: List[str]
+    """
+    if not os.path.isdir(file_path):
+        return [file_path]
+    return [os.path.join(file_path, file_name) for file_name in sorted(os.listdir(file_path))
+            if file_name.endswith(".parquet")]
+
+def read_dataframe(file_path: str) -> pd.DataFrame:
+    """
+    Reads a parquet, csv or excel file, chosen by its extension, or a
+    directory of parquet part files
+    :param file_path: str location of file to read
+    :return: pd.DataFrame
+    """
+    try:
+        file_extension = os.path.splitext(file_path)[1].lower()
+        if file_extension == ".parquet":
+            # parts are concatenated by pandas, which reconciles their column
+            # types, e.g. int prices in one part and float prices in another
+            dataframes = [fill_missing_with_nan(pd.read_parquet(part_file_path))
+                          for part_file_path in get_parquet_part_paths(file_path)]
+            return dataframes[0] if len(dataframes) == 1 else pd.concat(dataframes, ignore_index=True)
+        if file_extension == ".csv":
+            return pd.read_csv(file_path)
+        if file_extension in (".xlsx", ".xlsm", ".xls"):
+            return pd.read_excel(file_path)
+        raise Exception(f"Unsupported file format: [{file_extension}]")
+    except Exception as e:
+        raise FlightException(e, sys)
+
+def write_dataframe(dataframe: pd.DataFrame, file_path: str) -> None:
+    """
+    Writes a dataframe, without its index, as a parquet, csv or excel file
+    chosen by the extension of file_path. Parquet keeps the column types
+    and is read back many times faster than excel.
+    :param dataframe: pd.DataFrame to write
+    :param file_path: str location of file to write
+    """
+    try:
+        dir_path = os.path.dirname(file_path)
+        os.makedirs(dir_path, exist_ok=True)
+        file_extension = os.path.splitext(file_path)[1].lower()
+        if file_extension == ".parquet":
+            dataframe.to_parquet(file_path, index=False)
+        elif file_extension == ".csv":
+            dataframe.to_csv(file_path, index=False)
+        elif file_extension in (".xlsx", ".xlsm"):
+            dataframe.to_excel(file_path, index=False)
+        else:
+            raise Exception(f"Unsupported file format: [{file_extension}]")
+    except Exception as e:
+        raise FlightException(e, sys)
+
+def fill_missing_with_nan(dataframe: pd.DataFrame) -> pd.DataFrame:
+    # missing strings of parquet files and empty cells of streamed excel rows
+    # come back as None, pd.read_excel reads them as NaN which the imputers expect
+    return dataframe.where(dataframe.notna(), np.nan)
+
+# pyarrow type of each column type of config/schema.yaml
+ARROW_TYPE_NAMES = {"object": "string", "str": "string", "int": "int64", "float": "float64", "bool": "bool_"}
+
+class ParquetChunkWriter:
+    """
+    Appends dataframes with the same columns to a parquet file, one row
+    group per dataframe, so a file larger than memory can be written chunk
+    by chunk. Columns listed in column_types, the columns of
+    config/schema.yaml, are written with their schema type whatever the
+    first dataframe holds, e.g. a column all missing in the first chunk
+    and holding numbers later. Other columns get the types of the first
+    dataframe, strings when they are all missing in it.
+    """
+
+    def __init__(self, file_path: str, column_types: dict=None):
+        """
+        :param file_path: str parquet file to write
+        :param column_types: dict column name -> schema type: object, int, float or bool
+        """
+        try:
+            self.file_path = file_path
+            self.column_types = column_types or dict()
+            self.writer = None
+            self.schema = None
+            self.n_rows = 0
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def get_schema(self, dataframe: pd.DataFrame):
+        """
+        :return: pyarrow schema of the file: pyarrow.Schema
+        """
+        import pyarrow
+        fields = []
+        for field in pyarrow.Schema.from_pandas(dataframe, preserve_index=False):
+            column_type = self.column_types.get(field.name)
+            if column_type is not None:
+                field = field.with_type(getattr(pyarrow, ARROW_TYPE_NAMES[column_type])())
+            elif pyarrow.types.is_null(field.type):
+                field = field.with_type(pyarrow.string())
+            fields.append(field)
+        return pyarrow.schema(fields).remove_metadata()
+
+    def write(self, dataframe: pd.DataFrame) -> None:
+        try:
+            import pyarrow
+            import pyarrow.parquet
+            if self.writer is None:
+                self.schema = self.get_schema(dataframe)
+                os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+                self.writer = pyarrow.parquet.ParquetWriter(self.file_path, self.schema)
+            table = pyarrow.Table.from_pandas(dataframe, schema=self.schema, preserve_index=False)
+            self.writer.write_table(table)
+            self.n_rows += len(dataframe)
+        except Exception as e:
+            raise FlightException(e, sys)
+
+    def close(self) -> None:
+        try:
+            if self.writer is not None:
+                self.writer.close()
+        except Exception as e:
+            raise FlightException(e, sys)
+
+def excel_rows_to_dataframe(rows: list, header: tuple) -> pd.DataFrame:
+    return fill_missing_with_nan(pd.DataFrame(rows, columns=header))
+
+def read_dataframe_in_chunks(file_path: str, chunk_size: int):
+    """
+    Reads a parquet, csv or excel file, or a directory of parquet part files,
+    as dataframes of at most chunk_size rows, so files larger than memory can
+    be processed block by block
+    :param file_path: str location of file to read
+    :param chunk_size: int number of rows per chunk
+    :return: generator of pd.DataFrame
+    """
+    try:
+        file_extension = os.path.splitext(file_path)[1].lower()
+        if file_extension == ".parquet":
+            # pyarrow is only needed by the training pipeline, not to serve predictions
+            import pyarrow.parquet
+            for part_file_path in get_parquet_part_paths(file_path):
+                parquet_file = pyarrow.parquet.ParquetFile(part_file_path)
+                for record_batch in parquet_file.iter_batches(batch_size=chunk_size):
+                    yield fill_missing_with_nan(record_batch.to_pandas())
+        elif file_extension == ".csv":
+            for chunk in pd.read_csv(file_path, chunksize=chunk_size):
+                yield chunk
+        elif file_extension in (".xlsx", ".xlsm"):
+            # read_only mode streams rows instead of loading the whole sheet
+            workbook = openpyxl.load_workbook(file_path, read_only=True)
+            try:
+                rows = workbook.active.iter_rows(values_only=True)
+                header = next(rows)
+                chunk = []
+                for row in rows:
+                    chunk.append(row)
+                    if len(chunk) == chunk_size:
+                        yield excel_rows_to_dataframe(chunk, header)
+                        chunk = []
+                if chunk:
+                    yield excel_rows_to_dataframe(chunk, header)
+            finally:
+                workbook.close()
+        else:
+            raise Exception(f"Unsupported file format: [{file_extension}]")
+    except Exception as e:
+        raise FlightException(e, sys)
+
 # print(read_yaml("config/config.yaml"))
 
 # import os
@@ -0,0 +1,18 @@
+import gc
+import os
+
+
+# the app, and with it the model, is imported once in the master process and
+# forked workers share its memory copy-on-write
+preload_app = True
+workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+bind = f"0.0.0.0:{os.environ.get('PORT', 8000)}"
+
+
+def when_ready(server):
+    from app import load_model_before_fork
+    load_model_before_fork()
+    # objects already allocated are moved out of the collector's reach, so
+    # garbage collections in the workers don't write to (and copy) the pages
+    # holding the model
+    gc.freeze()
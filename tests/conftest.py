@@ -0,0 +1,52 @@
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from flight.component.data_transformation import DataTransformation
+from flight.entity.config_entity import DataTransformationConfig
+from flight.entity.artifact_entity import DataValidationArtifact
+from flight.utils.synthetic_data import get_flight_data
+
+SCHEMA_FILE_PATH = os.path.join(ROOT_DIR, "config", "schema.yaml")
+
+
+@pytest.fixture(scope="session")
+def train_df():
+    """Synthetic training flights, a few missing their Route and Total_Stops"""
+    train_df = get_flight_data(n_rows=20000, seed=0, missing_rate=0.01, schema_file_path=SCHEMA_FILE_PATH)
+    # spellings of the raw data the preprocessing cleans
+    train_df.loc[::97, "Additional_Info"] = "No Info"
+    return train_df
+
+
+def get_data_transformation(chunk_size: int=None) -> DataTransformation:
+    """Transformation stage reading the schema of config/schema.yaml, without artifact dirs"""
+    return DataTransformation(
+        data_transformation_config=DataTransformationConfig(transformed_dir=None,
+                                                            transformed_train_dir=None,
+                                                            transformed_validation_dir=None,
+                                                            preprocessed_object_file_path=None,
+                                                            n_jobs=1,
+                                                            parallel_min_rows=None,
+                                                            cache_dir=None,
+                                                            chunk_size=chunk_size),
+        data_ingestion_artifact=None,
+        data_validation_artifact=DataValidationArtifact(schema_file_path=SCHEMA_FILE_PATH,
+                                                        report_file_path=None,
+                                                        report_file_page_path=None,
+                                                        is_validated=True,
+                                                        message="",
+                                                        schema_report_file_path=None,
+                                                        is_schema_valid=True))
+
+
+@pytest.fixture(scope="session")
+def preprocessing_object(train_df):
+    """Fitted preprocessing ColumnTransformer, as built by the transformation stage"""
+    preprocessing_object = get_data_transformation().get_data_transformer_object()
+    preprocessing_object.fit(train_df.drop(columns="Price"))
+    return preprocessing_object
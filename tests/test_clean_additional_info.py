@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.exceptions import NotFittedError
+from sklearn.utils.validation import check_is_fitted
+
+from flight.constant import COLUMN_ADDITIONAL_INFO
+from flight.component.data_transformation import CleanAddInfoCol
+
+SPELLINGS = ["No info", "No info", "No Info", "NO INFO", "In-flight meal not included", np.nan]
+
+
+def make_frame(values: list) -> pd.DataFrame:
+    return pd.DataFrame({COLUMN_ADDITIONAL_INFO: pd.Series(values, dtype=object)})
+
+
+def test_not_fitted_before_fit():
+    with pytest.raises(NotFittedError):
+        check_is_fitted(CleanAddInfoCol())
+    check_is_fitted(CleanAddInfoCol().fit(make_frame(SPELLINGS)))
+
+
+def test_cleans_to_most_frequent_spelling():
+    clean_add_info = CleanAddInfoCol().fit_transform(make_frame(SPELLINGS))
+    np.testing.assert_array_equal(clean_add_info[:, 0][:5], ["No info"] * 4 + ["In-flight meal not included"])
+    assert pd.isna(clean_add_info[5, 0])
+
+
+def test_models_fitted_before_the_mapping_use_the_default_mapping():
+    clean_add_info_col = CleanAddInfoCol()
+    # pickles of models fitted before the mapping was learned in fit lack the attribute
+    assert not hasattr(clean_add_info_col, "value_mapping_")
+    np.testing.assert_array_equal(clean_add_info_col.transform(make_frame(["No Info", "Business class"]))[:, 0],
+                                  ["No info", "Business class"])
@@ -0,0 +1,128 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from flight.component.data_ingestion import DataIngestion
+from flight.entity.config_entity import DataIngestionConfig
+from flight.utils.utils import read_dataframe, read_yaml, ParquetChunkWriter
+from flight.utils.synthetic_data import get_flight_data
+from flight.constant import SCHEMA_COLUMNS_KEY
+from conftest import SCHEMA_FILE_PATH
+
+DATASET_DIR_NAME = "flight_dataset"
+TRAIN_FILE_NAME = "Data_Train.xlsx"
+CHUNK_SIZE = 200
+
+
+def get_data_ingestion(tmp_path, chunk_size: int=CHUNK_SIZE, incremental: bool=False) -> DataIngestion:
+    ingested_dir = os.path.join(tmp_path, "ingested_data")
+    return DataIngestion(data_ingestion_config=DataIngestionConfig(
+        dataset_source="local",
+        dataset_download_url=None,
+        local_dataset_dir=None,
+        dataset_cache_dir=None,
+        refresh_dataset=False,
+        train_file_name=TRAIN_FILE_NAME,
+        test_file_name=None,
+        raw_data_dir=os.path.join(tmp_path, "raw_data"),
+        zip_download_dir=None,
+        ingested_dir=ingested_dir,
+        ingested_train_dir=os.path.join(ingested_dir, "train"),
+        ingested_validation_dir=os.path.join(ingested_dir, "validation"),
+        ingested_test_dir=os.path.join(ingested_dir, "test"),
+        export_excel=False,
+        chunk_size=chunk_size,
+        incremental=incremental,
+        ingestion_state_dir=os.path.join(tmp_path, "ingestion_state"),
+        schema_file_path=SCHEMA_FILE_PATH))
+
+
+def write_raw_data(data_ingestion: DataIngestion, flight_df: pd.DataFrame) -> None:
+    raw_data_dir_path = os.path.join(data_ingestion.data_ingestion_config.raw_data_dir, DATASET_DIR_NAME)
+    os.makedirs(raw_data_dir_path, exist_ok=True)
+    flight_df.to_excel(os.path.join(raw_data_dir_path, TRAIN_FILE_NAME), index=False)
+
+
+def sort_rows(flight_df: pd.DataFrame) -> pd.DataFrame:
+    # prices are read back as int or float depending on whether a part misses one
+    return flight_df.astype({"Price": float}).astype(str).sort_values(list(flight_df.columns)).reset_index(drop=True)
+
+
+@pytest.fixture(scope="module")
+def raw_df():
+    """Raw training flights whose first chunk misses every Price and Route"""
+    raw_df = get_flight_data(n_rows=3 * CHUNK_SIZE + 50, seed=9, schema_file_path=SCHEMA_FILE_PATH)
+    raw_df["Price"] = raw_df["Price"].astype(float)
+    raw_df.loc[:CHUNK_SIZE - 1, ["Price", "Route"]] = np.nan
+    return raw_df
+
+
+def test_chunk_writer_types_come_from_schema(tmp_path):
+    flight_df = get_flight_data(n_rows=20, seed=10, schema_file_path=SCHEMA_FILE_PATH)
+    first_chunk = flight_df.iloc[:10].astype(object)
+    first_chunk.loc[:, ["Price", "Route"]] = None
+    file_path = os.path.join(tmp_path, "train.parquet")
+    writer = ParquetChunkWriter(file_path=file_path,
+                                column_types=read_yaml(SCHEMA_FILE_PATH)[SCHEMA_COLUMNS_KEY])
+    writer.write(first_chunk)
+    writer.write(flight_df.iloc[10:])
+    writer.close()
+    assert str(writer.schema.field("Price").type) == "int64"
+    written_df = read_dataframe(file_path)
+    np.testing.assert_array_equal(written_df["Price"].iloc[10:], flight_df["Price"].iloc[10:])
+    assert written_df["Price"].iloc[:10].isna().all()
+    assert written_df["Route"].iloc[10:].tolist() == flight_df["Route"].iloc[10:].tolist()
+
+
+def test_split_in_chunks_keeps_every_row(tmp_path, raw_df):
+    data_ingestion = get_data_ingestion(tmp_path)
+    write_raw_data(data_ingestion, raw_df)
+    train_file_path, validation_file_path = data_ingestion.split_data_as_train_validation(DATASET_DIR_NAME)
+    train_df, validation_df = read_dataframe(train_file_path), read_dataframe(validation_file_path)
+    assert 0 < len(validation_df) < len(train_df)
+    pd.testing.assert_frame_equal(sort_rows(pd.concat([train_df, validation_df])), sort_rows(raw_df))
+
+
+def test_incremental_split_in_chunks_keeps_every_row(tmp_path, raw_df):
+    data_ingestion = get_data_ingestion(tmp_path, incremental=True)
+    write_raw_data(data_ingestion, raw_df)
+    train_file_path, validation_file_path, _, _, n_new_rows = \
+        data_ingestion.split_data_incrementally(DATASET_DIR_NAME)
+    assert n_new_rows == len(raw_df)
+    split_df = pd.concat([read_dataframe(train_file_path), read_dataframe(validation_file_path)])
+    pd.testing.assert_frame_equal(sort_rows(split_df), sort_rows(raw_df))
+
+
+@pytest.mark.parametrize("chunk_size", [None, CHUNK_SIZE])
+def test_incremental_split_appends_only_new_rows(tmp_path, raw_df, chunk_size):
+    data_ingestion = get_data_ingestion(tmp_path, chunk_size=chunk_size, incremental=True)
+    write_raw_data(data_ingestion, raw_df)
+    train_file_path, validation_file_path, _, _, _ = data_ingestion.split_data_incrementally(DATASET_DIR_NAME)
+    train_df, validation_df = read_dataframe(train_file_path), read_dataframe(validation_file_path)
+
+    # the same rows again, another copy of a row, and new rows
+    new_df = get_flight_data(n_rows=30, seed=15, schema_file_path=SCHEMA_FILE_PATH)
+    write_raw_data(data_ingestion, pd.concat([raw_df, raw_df.iloc[[CHUNK_SIZE + 1]], new_df], ignore_index=True))
+    train_file_path, validation_file_path, train_delta_file_path, validation_delta_file_path, n_new_rows = \
+        data_ingestion.split_data_incrementally(DATASET_DIR_NAME)
+    assert n_new_rows == 31
+    grown_train_df, grown_validation_df = read_dataframe(train_file_path), read_dataframe(validation_file_path)
+    assert len(grown_train_df) + len(grown_validation_df) == len(raw_df) + 31
+    # rows ingested before keep their split and their order
+    for split_df, grown_split_df in [(train_df, grown_train_df), (validation_df, grown_validation_df)]:
+        pd.testing.assert_frame_equal(sort_rows(grown_split_df.iloc[:len(split_df)]), sort_rows(split_df))
+    delta_df = pd.concat([read_dataframe(train_delta_file_path), read_dataframe(validation_delta_file_path)])
+    pd.testing.assert_frame_equal(sort_rows(delta_df),
+                                  sort_rows(pd.concat([raw_df.iloc[[CHUNK_SIZE + 1]], new_df])))
+
+    # nothing is appended from an unchanged raw file, or from rows all ingested before
+    for flight_df in [raw_df, raw_df.iloc[::-1]]:
+        write_raw_data(data_ingestion, flight_df)
+        train_file_path, validation_file_path, train_delta_file_path, validation_delta_file_path, n_new_rows = \
+            data_ingestion.split_data_incrementally(DATASET_DIR_NAME)
+        assert n_new_rows == 0
+        assert train_delta_file_path is None and validation_delta_file_path is None
+        assert len(read_dataframe(train_file_path)) == len(grown_train_df)
+        assert len(read_dataframe(validation_file_path)) == len(grown_validation_df)
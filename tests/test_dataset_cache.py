@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+from flight.entity.dataset_source import DatasetCache, LocalDatasetSource
+
+
+class CountingDatasetSource(LocalDatasetSource):
+    """Local source counting its fetches"""
+
+    def __init__(self, location: str):
+        super().__init__(location)
+        self.n_fetches = 0
+
+    def fetch(self, download_dir: str) -> str:
+        self.n_fetches += 1
+        return super().fetch(download_dir=download_dir)
+
+
+class UnhashedDatasetSource(CountingDatasetSource):
+    """Source which, like kaggle, only tells its content hash after fetching"""
+
+    def get_content_hash(self):
+        return None
+
+
+@pytest.fixture
+def dataset_dir(tmp_path):
+    dataset_dir = os.path.join(tmp_path, "source", "flight_dataset")
+    os.makedirs(dataset_dir)
+    for file_name in ["Data_Train.csv", "Test_set.csv"]:
+        with open(os.path.join(dataset_dir, file_name), "w") as dataset_file:
+            dataset_file.write(f"{file_name}\n1\n")
+    return dataset_dir
+
+
+def get_dataset(tmp_path, dataset_source, run_name: str, refresh: bool=False) -> str:
+    raw_data_dir = os.path.join(tmp_path, run_name, "raw_data")
+    dataset_cache = DatasetCache(cache_dir=os.path.join(tmp_path, "dataset_cache"), refresh=refresh)
+    return os.path.join(raw_data_dir, dataset_cache.get_dataset(dataset_source=dataset_source,
+                                                                raw_data_dir=raw_data_dir))
+
+
+def test_cache_hit_links_instead_of_fetching(tmp_path, dataset_dir):
+    dataset_source = CountingDatasetSource(dataset_dir)
+    first_run_dir = get_dataset(tmp_path, dataset_source, "run1")
+    run_dir = get_dataset(tmp_path, dataset_source, "run2")
+    assert dataset_source.n_fetches == 1
+    assert sorted(os.listdir(run_dir)) == ["Data_Train.csv", "Test_set.csv"]
+    for file_name in os.listdir(run_dir):
+        # both runs link the same cached file
+        assert os.path.samefile(os.path.join(first_run_dir, file_name), os.path.join(run_dir, file_name))
+        assert not os.path.samefile(os.path.join(dataset_dir, file_name), os.path.join(run_dir, file_name))
+
+
+def test_changed_dataset_is_fetched_again(tmp_path, dataset_dir):
+    dataset_source = CountingDatasetSource(dataset_dir)
+    first_run_dir = get_dataset(tmp_path, dataset_source, "run1")
+    with open(os.path.join(dataset_dir, "Data_Train.csv"), "a") as dataset_file:
+        dataset_file.write("2\n")
+    run_dir = get_dataset(tmp_path, dataset_source, "run2")
+    assert dataset_source.n_fetches == 2
+    with open(os.path.join(run_dir, "Data_Train.csv")) as dataset_file:
+        assert dataset_file.read().endswith("1\n2\n")
+    # the dataset of the first run is not modified
+    with open(os.path.join(first_run_dir, "Data_Train.csv")) as dataset_file:
+        assert dataset_file.read().endswith("1\n")
+
+
+def test_unhashed_source_is_fetched_again_on_refresh(tmp_path, dataset_dir):
+    dataset_source = UnhashedDatasetSource(dataset_dir)
+    get_dataset(tmp_path, dataset_source, "run1")
+    get_dataset(tmp_path, dataset_source, "run2")
+    assert dataset_source.n_fetches == 1
+    get_dataset(tmp_path, dataset_source, "run3", refresh=True)
+    assert dataset_source.n_fetches == 2
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from flight.constant import COLUMN_DATE_OF_JOURNEY, COLUMN_DEP_TIME, COLUMN_ARRIVAL_TIME
+from flight.component.data_transformation import DateTimeExtractor
+from flight.entity.fast_preprocessor import parse_journey_date, parse_clock_time
+from flight.utils.synthetic_data import get_flight_data
+from conftest import SCHEMA_FILE_PATH
+
+DATE_TIME_COLUMNS = [COLUMN_DATE_OF_JOURNEY, COLUMN_DEP_TIME, COLUMN_ARRIVAL_TIME]
+
+# formats found in the dataset, and their expected features
+FORMAT_CASES = [
+    ("24/03/2019", "22:20", "01:10 22 Mar", [24, 3, 22, 20, 1, 10]),
+    ("1/05/2019", "05:50", "13:15", [1, 5, 5, 50, 13, 15]),
+    ("09/06/2019", "09:25", "04:25 10 Jun", [9, 6, 9, 25, 4, 25]),
+    ("12/05/2019", "18:05", "23:30", [12, 5, 18, 5, 23, 30]),
+    ("27/05/2019", "00:40", "00:30 28 May", [27, 5, 0, 40, 0, 30]),
+    ("3/03/2019", "23:55", "12:35 04 Mar", [3, 3, 23, 55, 12, 35]),
+    ("1/3/2019", "5:05", "23:59 01 Apr", [1, 3, 5, 5, 23, 59]),
+]
+
+# malformed or out of range values, and the features left missing for the imputer
+INVALID_CASES = [
+    ("99/99/2019", "22:20", "01:10", [np.nan, np.nan, 22, 20, 1, 10]),
+    ("24-03-2019", "25:00", "01:10", [np.nan, np.nan, np.nan, np.nan, 1, 10]),
+    ("24/03", "22:60", "x", [np.nan, np.nan, np.nan, np.nan, np.nan, np.nan]),
+    (None, None, None, [np.nan, np.nan, np.nan, np.nan, np.nan, np.nan]),
+    ("", "noon", "24:10 22 Mar", [np.nan, np.nan, np.nan, np.nan, np.nan, np.nan]),
+    # the arrival date is not parsed, so an impossible one does not matter
+    ("31/02/2019", "22:20", "01:10 30 Feb", [31, 2, 22, 20, 1, 10]),
+]
+
+
+def to_datetime_extract_date_and_time(X: pd.DataFrame) -> np.ndarray:
+    """The previous implementation of DateTimeExtractor.extract_date_and_time"""
+    journey_day = X.loc[:, COLUMN_DATE_OF_JOURNEY].str.split('/').str[0].astype(int)
+    journey_month = X.loc[:, COLUMN_DATE_OF_JOURNEY].str.split('/').str[1].astype(int)
+    dep_hour = pd.to_datetime(X.loc[:, COLUMN_DEP_TIME]).dt.hour
+    dep_min = pd.to_datetime(X.loc[:, COLUMN_DEP_TIME]).dt.minute
+    arrival_hour = pd.to_datetime(X.loc[:, COLUMN_ARRIVAL_TIME]).dt.hour
+    arrival_min = pd.to_datetime(X.loc[:, COLUMN_ARRIVAL_TIME]).dt.minute
+    return np.c_[journey_day, journey_month, dep_hour, dep_min, arrival_hour, arrival_min]
+
+
+def make_frame(cases: list) -> pd.DataFrame:
+    return pd.DataFrame([case[:3] for case in cases], columns=DATE_TIME_COLUMNS, dtype=object)
+
+
+def test_dataset_formats():
+    X = make_frame(FORMAT_CASES)
+    expected = np.array([case[3] for case in FORMAT_CASES])
+    np.testing.assert_array_equal(DateTimeExtractor().transform(X), expected)
+    np.testing.assert_array_equal(to_datetime_extract_date_and_time(X), expected)
+
+
+def test_single_rows_match_batch():
+    # every row alone, as at serving time, gives the features of the whole batch
+    X = make_frame(FORMAT_CASES + INVALID_CASES)
+    expected = DateTimeExtractor().transform(X)
+    for index in range(len(X)):
+        np.testing.assert_array_equal(DateTimeExtractor().transform(X.iloc[[index]]), expected[[index]])
+
+
+def test_matches_to_datetime_extraction():
+    X = get_flight_data(n_rows=20000, seed=6, with_price=False, schema_file_path=SCHEMA_FILE_PATH)
+    X = X[DATE_TIME_COLUMNS]
+    assert X[COLUMN_ARRIVAL_TIME].str.len().gt(5).any()
+    np.testing.assert_array_equal(DateTimeExtractor().transform(X), to_datetime_extract_date_and_time(X))
+
+
+@pytest.mark.parametrize("case", INVALID_CASES)
+def test_invalid_values_are_missing(case):
+    X = make_frame([FORMAT_CASES[0], case])
+    np.testing.assert_array_equal(DateTimeExtractor().transform(X), [FORMAT_CASES[0][3], case[3]])
+
+
+@pytest.mark.parametrize("case", FORMAT_CASES + INVALID_CASES)
+def test_single_value_parsers_match_extractor(case):
+    features = [*parse_journey_date(case[0]), *parse_clock_time(case[1]), *parse_clock_time(case[2])]
+    np.testing.assert_array_equal(features, DateTimeExtractor().transform(make_frame([case]))[0])
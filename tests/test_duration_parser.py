@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from flight.constant import COLUMN_DURATION
+from flight.component.data_transformation import CleanDurationCol
+from flight.entity.fast_preprocessor import parse_duration_minutes
+from flight.utils.synthetic_data import get_flight_data
+from conftest import SCHEMA_FILE_PATH
+
+# formats found in the dataset, and their minutes
+FORMAT_CASES = [
+    ("2h 50m", 170),
+    ("19h", 1140),
+    ("5m", 5),
+    ("0h 5m", 5),
+    ("47h 40m", 2860),
+    ("1h 0m", 60),
+]
+
+# values the eval based conversion crashed on or turned into a wrong number
+MALFORMED_DURATIONS = [None, np.nan, "", "abc", "5", "h", "m", "2 h", "-3h", "1h 5m 3s"]
+
+
+def eval_convert_duration_to_minutes(X: pd.DataFrame) -> np.ndarray:
+    """The previous implementation of CleanDurationCol.convert_duration_to_minutes"""
+    clean_duration = \
+        X.loc[:, COLUMN_DURATION].str.replace("h", '*60').str.replace(' ', '+').str.replace('m', '*1').apply(eval)
+    return np.array(clean_duration).reshape(-1, 1)
+
+
+def test_dataset_formats():
+    X = pd.DataFrame({COLUMN_DURATION: [case[0] for case in FORMAT_CASES]})
+    expected = np.array([[case[1]] for case in FORMAT_CASES])
+    np.testing.assert_array_equal(CleanDurationCol().transform(X), expected)
+    np.testing.assert_array_equal(eval_convert_duration_to_minutes(X), expected)
+
+
+def test_matches_eval_conversion():
+    X = get_flight_data(n_rows=20000, seed=5, with_price=False, schema_file_path=SCHEMA_FILE_PATH)[[COLUMN_DURATION]]
+    np.testing.assert_array_equal(CleanDurationCol().transform(X), eval_convert_duration_to_minutes(X))
+
+
+@pytest.mark.parametrize("duration", MALFORMED_DURATIONS)
+def test_malformed_durations_are_missing(duration):
+    X = pd.DataFrame({COLUMN_DURATION: pd.Series(["2h 50m", duration], dtype=object)})
+    np.testing.assert_array_equal(CleanDurationCol().transform(X), [[170.0], [np.nan]])
+
+
+@pytest.mark.parametrize("duration", [case[0] for case in FORMAT_CASES] + MALFORMED_DURATIONS)
+def test_single_value_parser_matches_column_parser(duration):
+    X = pd.DataFrame({COLUMN_DURATION: pd.Series([duration], dtype=object)})
+    np.testing.assert_array_equal(parse_duration_minutes(duration), CleanDurationCol().transform(X)[0, 0])
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from flight.exception import FlightException
+from flight.entity.fast_preprocessor import FastPreprocessor
+from flight.utils.synthetic_data import get_flight_data
+from conftest import SCHEMA_FILE_PATH
+
+# raw values the dataset does not hold, each replacing the value of one column
+UNUSUAL_VALUES = {
+    "Duration": [None, np.nan, "", "abc", "5", "h", "19h", "5m", " 3h 7m ", "2h50m", "47h 40m"],
+    "Date_of_Journey": [None, np.nan, "", "24-03-2019", "99/99/2019", "31/02/2019", "1/3/2019", "24/03"],
+    "Dep_Time": [None, np.nan, "", "25:00", "5:05", "22:6", "noon", "00:00"],
+    "Arrival_Time": [None, np.nan, "01:10 22 Mar", "01:10 29 Feb", "23:59 01 Apr", "24:10", "1:10", "x"],
+    "Additional_Info": [None, np.nan, "No Info", "NO INFO", "  no   info ", "No info"],
+    "Airline": [np.nan],
+    "Source": [np.nan],
+    "Destination": [np.nan],
+    "Total_Stops": [np.nan],
+}
+
+# None is not a missing value for the imputer of the categorical columns, but an unknown category
+UNSEEN_CATEGORIES = [
+    ("Airline", "Air Atlantis"),
+    ("Airline", None),
+    ("Source", "Paris"),
+    ("Destination", "London"),
+    ("Destination", None),
+    ("Total_Stops", "7 stops"),
+    ("Total_Stops", None),
+    ("Additional_Info", "Free lounge access"),
+]
+
+
+@pytest.fixture(scope="module")
+def fast_preprocessor(preprocessing_object):
+    return FastPreprocessor(preprocessing_object=preprocessing_object)
+
+
+@pytest.fixture(scope="module")
+def flight_df():
+    """Unseen synthetic flights, with every unusual value in a few rows"""
+    flight_df = get_flight_data(n_rows=1500, seed=1, with_price=False, missing_rate=0.05,
+                                schema_file_path=SCHEMA_FILE_PATH)
+    rng = np.random.default_rng(2)
+    for column, values in UNUSUAL_VALUES.items():
+        for value in values:
+            flight_df.loc[rng.choice(len(flight_df), size=5, replace=False), column] = value
+    return flight_df
+
+
+def get_record(flight_df: pd.DataFrame, index: int) -> dict:
+    """Record as sent to the prediction service, column name -> raw value"""
+    return {column: flight_df[column].iat[index] for column in flight_df.columns}
+
+
+def test_compile_checks_parity(preprocessing_object):
+    assert isinstance(FastPreprocessor.compile(preprocessing_object), FastPreprocessor)
+
+
+def test_transform_matches_column_transformer(preprocessing_object, fast_preprocessor, flight_df):
+    expected = preprocessing_object.transform(flight_df)
+    actual = fast_preprocessor.transform(flight_df)
+    assert actual.shape == expected.shape
+    np.testing.assert_array_equal(actual, expected)
+
+
+@pytest.mark.parametrize("n_rows", [1, 2, 17])
+def test_transform_matches_column_transformer_on_small_batches(preprocessing_object, fast_preprocessor,
+                                                               flight_df, n_rows):
+    for start in range(0, 170, n_rows):
+        batch = flight_df.iloc[start:start + n_rows]
+        np.testing.assert_array_equal(fast_preprocessor.transform(batch), preprocessing_object.transform(batch))
+
+
+def test_transform_record_matches_column_transformer(preprocessing_object, fast_preprocessor, flight_df):
+    expected = preprocessing_object.transform(flight_df)
+    for index in range(len(flight_df)):
+        np.testing.assert_array_equal(fast_preprocessor.transform_record(get_record(flight_df, index)),
+                                      expected[[index]])
+
+
+@pytest.mark.parametrize("column,values", list(UNUSUAL_VALUES.items()))
+def test_unusual_values_match_column_transformer(preprocessing_object, fast_preprocessor, column, values):
+    flight_df = get_flight_data(n_rows=len(values), seed=3, with_price=False, schema_file_path=SCHEMA_FILE_PATH)
+    flight_df[column] = pd.Series(values, dtype=object)
+    expected = preprocessing_object.transform(flight_df)
+    np.testing.assert_array_equal(fast_preprocessor.transform(flight_df), expected)
+    for index in range(len(flight_df)):
+        np.testing.assert_array_equal(fast_preprocessor.transform_record(get_record(flight_df, index)),
+                                      expected[[index]])
+
+
+@pytest.mark.parametrize("column,value", UNSEEN_CATEGORIES)
+def test_unseen_categories_are_rejected_like_column_transformer(preprocessing_object, fast_preprocessor,
+                                                                column, value):
+    flight_df = get_flight_data(n_rows=3, seed=4, with_price=False, schema_file_path=SCHEMA_FILE_PATH)
+    flight_df[column] = pd.Series([flight_df[column].iat[0], value, flight_df[column].iat[2]], dtype=object)
+    with pytest.raises(ValueError):
+        preprocessing_object.transform(flight_df)
+    with pytest.raises(FlightException):
+        fast_preprocessor.transform(flight_df)
+    with pytest.raises(FlightException):
+        fast_preprocessor.transform_record(get_record(flight_df, 1))
+    # the other rows still transform alone
+    np.testing.assert_array_equal(fast_preprocessor.transform_record(get_record(flight_df, 0)),
+                                  preprocessing_object.transform(flight_df.iloc[[0]]))
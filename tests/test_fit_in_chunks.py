@@ -0,0 +1,49 @@
+import os
+
+import numpy as np
+import pytest
+from sklearn.impute import SimpleImputer
+from sklearn.preprocessing import OrdinalEncoder
+
+from flight.utils.synthetic_data import get_flight_data
+from conftest import SCHEMA_FILE_PATH, get_data_transformation
+
+
+def get_steps(preprocessing_object, step_type) -> list:
+    return [step for _, pipeline, _ in preprocessing_object.transformers_[:len(preprocessing_object.transformers)]
+            for _, step in pipeline.steps if isinstance(step, step_type)]
+
+
+@pytest.fixture(scope="module")
+def chunked_preprocessing_object(tmp_path_factory, train_df):
+    """Preprocessing ColumnTransformer fitted on train_df read from a csv file in uneven chunks"""
+    train_file_path = os.path.join(tmp_path_factory.mktemp("train"), "train.csv")
+    train_df.to_csv(train_file_path, index=False)
+    data_transformation = get_data_transformation(chunk_size=3000)
+    preprocessing_object = data_transformation.get_data_transformer_object()
+    data_transformation.fit_in_chunks(preprocessing_obj=preprocessing_object,
+                                      train_file_path=train_file_path,
+                                      target_column_name="Price")
+    return preprocessing_object
+
+
+def test_fitted_statistics_match_fit(preprocessing_object, chunked_preprocessing_object):
+    for imputer, chunked_imputer in zip(get_steps(preprocessing_object, SimpleImputer),
+                                        get_steps(chunked_preprocessing_object, SimpleImputer)):
+        np.testing.assert_array_equal(chunked_imputer.statistics_, imputer.statistics_)
+    encoders = get_steps(preprocessing_object, OrdinalEncoder)
+    assert encoders
+    for encoder, chunked_encoder in zip(encoders, get_steps(chunked_preprocessing_object, OrdinalEncoder)):
+        for categories, chunked_categories in zip(encoder.categories_, chunked_encoder.categories_):
+            np.testing.assert_array_equal(chunked_categories, categories)
+
+
+@pytest.mark.parametrize("seed", [None, 12])
+def test_transform_matches_fit(train_df, preprocessing_object, chunked_preprocessing_object, seed):
+    # the training flights, and unseen ones
+    flight_df = train_df if seed is None else \
+        get_flight_data(n_rows=2000, seed=seed, with_price=False, schema_file_path=SCHEMA_FILE_PATH)
+    flight_df = flight_df.drop(columns="Price", errors="ignore")
+    # the scalers are fitted incrementally, their float sums differ in the last bits
+    np.testing.assert_allclose(chunked_preprocessing_object.transform(flight_df),
+                               preprocessing_object.transform(flight_df), rtol=1e-10, atol=1e-10)
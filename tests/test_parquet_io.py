@@ -0,0 +1,34 @@
+import os
+
+import pandas as pd
+
+from flight.utils.utils import read_dataframe, write_dataframe, read_dataframe_in_chunks, ParquetChunkWriter
+from flight.utils.synthetic_data import get_flight_data
+from conftest import SCHEMA_FILE_PATH
+
+
+def test_parquet_round_trip(tmp_path):
+    flight_df = get_flight_data(n_rows=500, seed=7, missing_rate=0.05, schema_file_path=SCHEMA_FILE_PATH)
+    file_path = os.path.join(tmp_path, "train.parquet")
+    write_dataframe(flight_df, file_path)
+    pd.testing.assert_frame_equal(read_dataframe(file_path), flight_df)
+    # missing strings come back as NaN, which the imputers expect
+    assert read_dataframe(file_path)["Route"].isna().sum() == flight_df["Route"].isna().sum() > 0
+    chunks = list(read_dataframe_in_chunks(file_path, chunk_size=120))
+    assert [len(chunk) for chunk in chunks] == [120, 120, 120, 120, 20]
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), flight_df)
+
+
+def test_parquet_part_files_round_trip(tmp_path):
+    flight_df = get_flight_data(n_rows=300, seed=8, schema_file_path=SCHEMA_FILE_PATH)
+    dataset_dir = os.path.join(tmp_path, "train.parquet")
+    for part_index, start in enumerate(range(0, len(flight_df), 100)):
+        writer = ParquetChunkWriter(os.path.join(dataset_dir, f"part-{part_index:05d}.parquet"))
+        writer.write(flight_df.iloc[start:start + 50])
+        writer.write(flight_df.iloc[start + 50:start + 100])
+        writer.close()
+        assert writer.n_rows == 100
+    pd.testing.assert_frame_equal(read_dataframe(dataset_dir), flight_df)
+    chunks = list(read_dataframe_in_chunks(dataset_dir, chunk_size=1000))
+    assert [len(chunk) for chunk in chunks] == [100, 100, 100]
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), flight_df)
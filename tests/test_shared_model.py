@@ -0,0 +1,58 @@
+import os
+
+import numpy as np
+import pytest
+from sklearn.tree import DecisionTreeRegressor
+from sklearn.ensemble import RandomForestRegressor, ExtraTreesRegressor
+from sklearn.linear_model import LinearRegression
+
+from flight.component.model_trainer import FlightEstimatorModel
+from flight.entity import shared_model
+from flight.entity.shared_model import SharedTreeEnsemble, export_shared_model, load_shared_model
+from flight.utils.synthetic_data import get_flight_data
+from conftest import SCHEMA_FILE_PATH
+
+ESTIMATORS = [
+    DecisionTreeRegressor(random_state=0),
+    RandomForestRegressor(n_estimators=25, random_state=0, n_jobs=1),
+    ExtraTreesRegressor(n_estimators=10, max_depth=12, random_state=0, n_jobs=1),
+]
+
+
+@pytest.fixture(scope="module")
+def flight_df():
+    """Unseen flights to predict"""
+    return get_flight_data(n_rows=3000, seed=11, with_price=False, missing_rate=0.01,
+                           schema_file_path=SCHEMA_FILE_PATH)
+
+
+def get_model(preprocessing_object, train_df, estimator) -> FlightEstimatorModel:
+    train_df = train_df.iloc[:5000]
+    estimator.fit(preprocessing_object.transform(train_df.drop(columns="Price")), train_df["Price"])
+    return FlightEstimatorModel(preprocessing_object=preprocessing_object, trained_model_object=estimator)
+
+
+@pytest.mark.parametrize("estimator", ESTIMATORS, ids=lambda estimator: type(estimator).__name__)
+def test_shared_model_matches_estimator(tmp_path, preprocessing_object, train_df, flight_df, estimator):
+    model = get_model(preprocessing_object, train_df, estimator)
+    assert export_shared_model(model=model, shared_model_dir=str(tmp_path))
+    loaded_model = load_shared_model(shared_model_dir=str(tmp_path))
+    assert isinstance(loaded_model.trained_model_object, SharedTreeEnsemble)
+    assert isinstance(loaded_model.trained_model_object.value, np.memmap)
+    np.testing.assert_array_equal(loaded_model.predict(flight_df), model.predict(flight_df))
+
+
+def test_blocks_match_estimator(tmp_path, monkeypatch, preprocessing_object, train_df, flight_df):
+    model = get_model(preprocessing_object, train_df, RandomForestRegressor(n_estimators=8, random_state=1))
+    export_shared_model(model=model, shared_model_dir=str(tmp_path))
+    loaded_model = load_shared_model(shared_model_dir=str(tmp_path))
+    # 8 trees, blocks of 7 rows, the last one partial
+    monkeypatch.setattr(shared_model, "PREDICT_BLOCK_CELLS", 7 * 8)
+    np.testing.assert_array_equal(loaded_model.predict(flight_df), model.predict(flight_df))
+    np.testing.assert_array_equal(loaded_model.predict(flight_df.iloc[:1]), model.predict(flight_df.iloc[:1]))
+
+
+def test_unsupported_estimator_is_not_exported(tmp_path, preprocessing_object, train_df):
+    model = get_model(preprocessing_object, train_df, LinearRegression())
+    assert not export_shared_model(model=model, shared_model_dir=str(tmp_path))
+    assert not os.listdir(tmp_path)
@@ -0,0 +1,111 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+import yaml
+
+from flight.component.data_transformation import DataTransformation, load_transformed_arrays
+from flight.entity.config_entity import DataTransformationConfig
+from flight.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact
+from flight.utils.utils import write_dataframe, read_yaml
+from flight.constant import SCHEMA_DOMAIN_VALUE_KEY
+from flight.utils.synthetic_data import get_flight_data
+from conftest import SCHEMA_FILE_PATH
+
+
+class CountingDataTransformation(DataTransformation):
+    """Transformation stage counting the runs of the feature pipeline"""
+    n_transforms = 0
+
+    def transform_data(self, file_paths):
+        CountingDataTransformation.n_transforms += 1
+        return super().transform_data(file_paths=file_paths)
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """Ingested train and validation files, and a copy of the schema"""
+    flight_df = get_flight_data(n_rows=1200, seed=13, schema_file_path=SCHEMA_FILE_PATH)
+    write_dataframe(flight_df.iloc[:1000], os.path.join(tmp_path, "data", "train.parquet"))
+    write_dataframe(flight_df.iloc[1000:], os.path.join(tmp_path, "data", "validation.parquet"))
+    shutil.copy(SCHEMA_FILE_PATH, os.path.join(tmp_path, "data", "schema.yaml"))
+    CountingDataTransformation.n_transforms = 0
+    return os.path.join(tmp_path, "data")
+
+
+def run_transformation(tmp_path, data_dir: str, run_name: str, chunk_size: int=None):
+    run_dir = os.path.join(tmp_path, run_name)
+    data_transformation = CountingDataTransformation(
+        data_transformation_config=DataTransformationConfig(
+            transformed_dir=run_dir,
+            transformed_train_dir=os.path.join(run_dir, "train"),
+            transformed_validation_dir=os.path.join(run_dir, "validation"),
+            preprocessed_object_file_path=os.path.join(run_dir, "preprocessed", "preprocessed.pkl"),
+            n_jobs=1,
+            parallel_min_rows=None,
+            cache_dir=os.path.join(tmp_path, "cache"),
+            chunk_size=chunk_size),
+        data_ingestion_artifact=DataIngestionArtifact(test_file_path=None,
+                                                      train_file_path=os.path.join(data_dir, "train.parquet"),
+                                                      validation_file_path=os.path.join(data_dir,
+                                                                                        "validation.parquet"),
+                                                      is_ingested=True,
+                                                      message="",
+                                                      train_delta_file_path=None,
+                                                      validation_delta_file_path=None,
+                                                      n_new_rows=None),
+        data_validation_artifact=DataValidationArtifact(schema_file_path=os.path.join(data_dir, "schema.yaml"),
+                                                        report_file_path=None,
+                                                        report_file_page_path=None,
+                                                        is_validated=True,
+                                                        message="",
+                                                        schema_report_file_path=None,
+                                                        is_schema_valid=True))
+    return data_transformation.initiate_data_transformation()
+
+
+def assert_same_artifacts(artifact, other_artifact):
+    for dataset_dir, other_dataset_dir in [
+        (artifact.transformed_train_file_path, other_artifact.transformed_train_file_path),
+        (artifact.transformed_validation_file_path, other_artifact.transformed_validation_file_path)
+    ]:
+        for array, other_array in zip(load_transformed_arrays(dataset_dir), load_transformed_arrays(other_dataset_dir)):
+            np.testing.assert_array_equal(array, other_array)
+    assert os.path.exists(other_artifact.preprocessed_object_file_path)
+
+
+def test_unchanged_inputs_hit_the_cache(tmp_path, data_dir):
+    first_artifact = run_transformation(tmp_path, data_dir, "run1")
+    assert CountingDataTransformation.n_transforms == 1
+    artifact = run_transformation(tmp_path, data_dir, "run2")
+    assert CountingDataTransformation.n_transforms == 1
+    assert_same_artifacts(first_artifact, artifact)
+
+
+def test_changed_file_misses_the_cache(tmp_path, data_dir):
+    run_transformation(tmp_path, data_dir, "run1")
+    flight_df = get_flight_data(n_rows=200, seed=14, schema_file_path=SCHEMA_FILE_PATH)
+    write_dataframe(flight_df, os.path.join(data_dir, "validation.parquet"))
+    run_transformation(tmp_path, data_dir, "run2")
+    assert CountingDataTransformation.n_transforms == 2
+    # the new entry is cached in turn
+    run_transformation(tmp_path, data_dir, "run3")
+    assert CountingDataTransformation.n_transforms == 2
+
+
+def test_changed_schema_misses_the_cache(tmp_path, data_dir):
+    run_transformation(tmp_path, data_dir, "run1")
+    schema_file_path = os.path.join(data_dir, "schema.yaml")
+    schema = read_yaml(schema_file_path)
+    schema[SCHEMA_DOMAIN_VALUE_KEY]["Airline"].append("Air Atlantis")
+    with open(schema_file_path, "w") as schema_file:
+        yaml.safe_dump(schema, schema_file)
+    run_transformation(tmp_path, data_dir, "run2")
+    assert CountingDataTransformation.n_transforms == 2
+
+
+def test_chunk_size_misses_the_cache(tmp_path, data_dir):
+    run_transformation(tmp_path, data_dir, "run1")
+    run_transformation(tmp_path, data_dir, "run2", chunk_size=300)
+    assert CountingDataTransformation.n_transforms == 2